@@ -24,7 +24,7 @@ class GuangyaDisk(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/GuangyaDisk.png"
     # 插件版本
-    plugin_version = "1.1.1"
+    plugin_version = "1.1.7"
     # 插件作者
     plugin_author = "KoWming"
     # 作者主页
@@ -177,6 +177,7 @@ class GuangyaDisk(_PluginBase):
                 on_token_refresh=on_token_refresh,
             )
             self._device_id = self._client.device_id
+            self._close_api()
             self._guangya_api = GuangYaApi(
                 client=self._client,
                 disk_name=self._disk_name,
@@ -184,6 +185,7 @@ class GuangyaDisk(_PluginBase):
                 order_by=self._order_by,
                 sort_type=self._sort_type,
                 permanently_delete=self._permanently_delete,
+                hash_cache_file=self.get_data_path() / "hash_cache.json",
             )
         except Exception as err:
             logger.error(f"光鸭云盘客户端创建失败: {err}")
@@ -705,35 +707,28 @@ class GuangyaDisk(_PluginBase):
 
         files_info: Dict[str, Dict] = {}
 
-        def _snapshot(_fileitem: schemas.FileItem, current_depth: int = 0):
-            try:
-                if _fileitem.type == "dir":
-                    if current_depth >= max_depth:
-                        return
-                    if (
-                        self.snapshot_check_folder_modtime  # noqa
-                        and last_snapshot_time
-                        and _fileitem.modify_time
-                        and _fileitem.modify_time <= last_snapshot_time
-                    ):
-                        return
-                    for sub_file in self._guangya_api.list(_fileitem):
-                        _snapshot(sub_file, current_depth + 1)
-                else:
-                    modify_time = getattr(_fileitem, "modify_time", 0) or 0
-                    if not last_snapshot_time or modify_time > last_snapshot_time:
-                        files_info[_fileitem.path] = {
-                            "size": _fileitem.size or 0,
-                            "modify_time": modify_time,
-                            "type": _fileitem.type,
-                        }
-            except Exception as err:
-                logger.debug(f"Snapshot error for {_fileitem.path}: {err}")
+        def _need_walk(_dir: schemas.FileItem) -> bool:
+            return not (
+                self.snapshot_check_folder_modtime  # noqa
+                and last_snapshot_time
+                and _dir.modify_time
+                and _dir.modify_time <= last_snapshot_time
+            )
 
         root_item = self._guangya_api.get_item(path)
         if not root_item:
             return {}
-        _snapshot(root_item)
+        try:
+            for _fileitem in self._guangya_api.iter_snapshot(root_item, max_depth=max_depth, dir_filter=_need_walk):
+                modify_time = getattr(_fileitem, "modify_time", 0) or 0
+                if not last_snapshot_time or modify_time > last_snapshot_time:
+                    files_info[_fileitem.path] = {
+                        "size": _fileitem.size or 0,
+                        "modify_time": modify_time,
+                        "type": _fileitem.type,
+                    }
+        except Exception as err:
+            logger.debug(f"Snapshot error for {root_item.path}: {err}")
         return files_info
 
     def storage_usage(self, storage: str) -> Optional[schemas.StorageUsage]:
@@ -858,7 +853,7 @@ class GuangyaDisk(_PluginBase):
         self._verification_uri = ""
         self._qr_expires_at = 0
         self._client = None
-        self._guangya_api = None
+        self._close_api()
 
         self.update_config(
             {
@@ -880,4 +875,15 @@ class GuangyaDisk(_PluginBase):
         """
         退出插件。
         """
-        pass
+        self._close_api()
+
+    def _close_api(self):
+        """
+        释放当前光鸭云盘操作实例的后台线程。
+        """
+        if self._guangya_api:
+            try:
+                self._guangya_api.close()
+            except Exception as err:
+                logger.debug(f"【光鸭云盘】释放操作实例失败: {err}")
+            self._guangya_api = None
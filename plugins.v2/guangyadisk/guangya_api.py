@@ -5,20 +5,22 @@
 import ast
 import shutil
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from hashlib import md5
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
-
 from app import schemas
 from app.core.config import global_vars, settings
 from app.log import logger
 from app.modules.filemanager.storages import transfer_process
 
+from .guangya_cache import DirectoryCache
 from .guangya_client import GuangYaClient
+from .guangya_download import DownloadStopped, RangeDownloader
+from .guangya_hash import FileHasher
+from .guangya_upload import FolderUploadPipeline
 
 
 class GuangYaApi:
@@ -31,9 +33,6 @@ class GuangYaApi:
     _DOWNLOAD_URL = "https://api.guangyapan.com/nd.bizuserres.s/v1/get_res_download_url"
     _VOD_DOWNLOAD_URL = "https://api.guangyapan.com/nd.bizuserres.s/v1/file/get_vod_download_url"
 
-    _id_cache: Dict[str, str] = {}
-    _item_cache: Dict[str, Dict[str, Any]] = {}
-
     def __init__(
         self,
         client: GuangYaClient,
@@ -42,6 +41,13 @@ class GuangYaApi:
         order_by: int = 3,
         sort_type: int = 1,
         permanently_delete: bool = False,
+        download_workers: int = 4,
+        hash_cache_file: Optional[Path] = None,
+        hash_workers: int = 2,
+        upload_concurrency: int = 4,
+        cache_ttl: int = 120,
+        cache_max_items: int = 50000,
+        snapshot_workers: int = 4,
     ):
         """
         初始化光鸭云盘操作实例。
@@ -52,8 +58,18 @@ class GuangYaApi:
         self._order_by = order_by
         self._sort_type = sort_type
         self._permanently_delete = permanently_delete
+        self._download_workers = max(1, download_workers or 1)
+        self._hasher = FileHasher(cache_file=hash_cache_file, workers=hash_workers)
+        self._upload_concurrency = max(1, upload_concurrency or 1)
         self.transtype = {"move": "移动", "copy": "复制"}
-        self._id_cache["/"] = ""
+        self._dir_cache = DirectoryCache(ttl=cache_ttl, max_items=cache_max_items)
+        self._snapshot_workers = max(1, snapshot_workers or 1)
+
+    def close(self) -> None:
+        """
+        释放后台资源（文件哈希计算线程池）。
+        """
+        self._hasher.close()
 
     @staticmethod
     def _normalize_path(path: str) -> str:
@@ -76,63 +92,11 @@ class GuangYaApi:
         item_path = f"{normalized_parent.rstrip('/')}/{name}" if normalized_parent != "/" else f"/{name}"
         return item_path + ("/" if is_dir else "")
 
-    @staticmethod
-    def _normalize_fileid(fileid: Optional[str], path: Optional[str] = None) -> str:
-        """
-        规范化文件 ID。
-        """
-        normalized_fileid = str(fileid or "")
-        normalized_path = str(path or "").replace("\\", "/")
-        if normalized_fileid == "root" and normalized_path in ("", "/"):
-            return ""
-        return normalized_fileid
-
-    def _cache_item(self, item: schemas.FileItem) -> None:
-        """
-        缓存文件项与路径映射。
-        """
-        normalized_path = self._normalize_path(item.path)
-        normalized_fileid = self._normalize_fileid(item.fileid, normalized_path)
-        if normalized_path != "/" and normalized_fileid:
-            self._id_cache[normalized_path] = normalized_fileid
-        self._item_cache[normalized_path] = {
-            "storage": item.storage,
-            "fileid": normalized_fileid,
-            "parent_fileid": str(item.parent_fileid or ""),
-            "name": item.name,
-            "basename": item.basename,
-            "extension": item.extension,
-            "type": item.type,
-            "path": item.path,
-            "size": item.size,
-            "modify_time": item.modify_time,
-            "thumbnail": getattr(item, "thumbnail", None),
-            "pickcode": item.pickcode,
-            "drive_id": getattr(item, "drive_id", None),
-        }
-
     def _invalidate_path_cache(self, path: str) -> None:
         """
         失效指定路径相关缓存。
         """
-        normalized_path = self._normalize_path(path)
-        self._id_cache.pop(normalized_path, None)
-        self._item_cache.pop(normalized_path, None)
-        dir_key = normalized_path if normalized_path == "/" else f"{normalized_path.rstrip('/')}/"
-        file_key = normalized_path.rstrip("/") or "/"
-        self._id_cache.pop(dir_key, None)
-        self._item_cache.pop(dir_key, None)
-        self._id_cache.pop(file_key, None)
-        self._item_cache.pop(file_key, None)
-
-    def _cache_path_id(self, path: str, file_id: str) -> None:
-        """
-        缓存路径与文件 ID 的映射关系。
-        """
-        normalized_path = self._normalize_path(path)
-        normalized_fileid = self._normalize_fileid(file_id, normalized_path)
-        if normalized_path != "/" and normalized_fileid:
-            self._id_cache[normalized_path] = normalized_fileid
+        self._dir_cache.invalidate_path(path)
 
     @staticmethod
     def _is_success(resp: Dict[str, Any]) -> bool:
@@ -249,11 +213,6 @@ class GuangYaApi:
             self._first_value(item, ["utime", "updateTime", "updatedAt", "UpdateAt", "modifyTime", "mtime"])
         )
 
-        if file_id:
-            self._id_cache[path] = file_id
-            if is_dir:
-                self._id_cache[file_path.rstrip("/")] = file_id
-
         file_item = schemas.FileItem(
             storage=self._disk_name,
             fileid=file_id,
@@ -269,7 +228,6 @@ class GuangYaApi:
             pickcode=str(item),
             drive_id=str(self._first_value(item, ["gcid", "GCID", "md5"], "")) or None,
         )
-        self._cache_item(file_item)
         return file_item
 
     def _iter_parent_items(self, parent_id: str, parent_path: str) -> List[schemas.FileItem]:
@@ -300,6 +258,18 @@ class GuangYaApi:
             page += 1
         return results
 
+    def _list_dir(self, parent_id: str, parent_path: str, refresh: bool = False) -> List[schemas.FileItem]:
+        """
+        获取目录下的完整子项列表，优先使用缓存。
+        """
+        if not refresh:
+            cached = self._dir_cache.get_children(parent_path)
+            if cached is not None:
+                return cached
+        items = self._iter_parent_items(parent_id or "", parent_path)
+        self._dir_cache.put_children(parent_path, parent_id, items)
+        return items
+
     def _path_to_id(self, path: str) -> str:
         """
         根据路径解析对应的文件 ID。
@@ -307,61 +277,42 @@ class GuangYaApi:
         normalized_path = self._normalize_path(path)
         if normalized_path == "/":
             return ""
-        if normalized_path in self._id_cache:
-            return self._id_cache[normalized_path]
+        cached_id = self._dir_cache.get_id(normalized_path)
+        if cached_id is not None:
+            return cached_id
 
         current_id = ""
         current_path = "/"
         parts = Path(normalized_path).parts[1:]
         for part in parts:
-            found = None
-            parent_item = schemas.FileItem(
-                storage=self._disk_name,
-                fileid=current_id,
-                path=current_path,
-                type="dir",
-            )
-            for item in self.list(parent_item):
-                if item.name == part:
-                    found = item
-                    break
+            next_path = f"{current_path.rstrip('/')}/{part}"
+            found = self._dir_cache.get_item(next_path)
+            if not found:
+                found = next((item for item in self._list_dir(current_id, current_path) if item.name == part), None)
             if not found:
                 raise FileNotFoundError(f"【光鸭云盘】{normalized_path} 不存在")
             current_id = found.fileid or ""
-            current_path = found.path if found.type == "dir" else str(Path(found.path).parent)
-        self._id_cache[normalized_path] = current_id
+            current_path = next_path
         return current_id
 
     def list(self, fileitem: schemas.FileItem, page: int = 0, page_size: int = 100) -> List[schemas.FileItem]:
         """
-        获取目录下的文件列表。
+        获取目录下的文件列表，page 为 0 时返回完整列表。
         """
         if fileitem.type == "file":
             item = self.detail(fileitem)
             return [item] if item else []
 
-        if fileitem.path == "/":
-            file_id = ""
-        else:
-            file_id = fileitem.fileid or self._path_to_id(fileitem.path)
-
-        items: List[schemas.FileItem] = []
+        parent_path = self._normalize_path(fileitem.path)
         try:
-            response = self.client.get_file_list(
-                parent_id=file_id or "",
-                page_size=max(page_size, self._page_size),
-                order_by=self._order_by,
-                sort_type=self._sort_type,
-                file_types=[],
-                page=page,
-            )
-            if not self._is_success(response):
-                logger.debug(f"【光鸭云盘】获取文件列表失败: {response}")
-                return items
-            for raw in self._extract_list(response):
-                items.append(self._to_file_item(raw, fileitem.path or "/"))
+            file_id = "" if parent_path == "/" else (fileitem.fileid or self._path_to_id(parent_path))
+            items = self._list_dir(file_id, parent_path)
         except Exception as err:
             logger.debug(f"【光鸭云盘】获取信息失败: {err}")
+            return []
+        if page:
+            page_size = max(page_size, self._page_size)
+            return items[page * page_size:(page + 1) * page_size]
         return items
 
     def detail(self, fileitem: schemas.FileItem) -> Optional[schemas.FileItem]:
@@ -388,7 +339,6 @@ class GuangYaApi:
             data = self._get_data(response)
             raw = data.get("info") or data.get("Info") or data if isinstance(data, dict) else {}
             file_id = str(self._first_value(raw, ["fileId", "id", "FileId"], ""))
-            self._id_cache[str(new_path).replace("\\", "/")] = file_id
             folder_item = schemas.FileItem(
                 storage=self._disk_name,
                 fileid=file_id,
@@ -400,7 +350,8 @@ class GuangYaApi:
                 modify_time=int(datetime.now().timestamp()),
                 pickcode=str(raw),
             )
-            self._cache_item(folder_item)
+            self._dir_cache.add_child(fileitem.path, folder_item)
+            self._dir_cache.put_children(new_path.as_posix(), file_id, [])
             return folder_item
         except Exception as err:
             logger.debug(f"【光鸭云盘】创建目录失败: {err}")
@@ -443,27 +394,17 @@ class GuangYaApi:
                 basename=self._disk_name,
                 type="dir",
             )
-            self._cache_item(root_item)
             return root_item
 
-        cached = self._item_cache.get(normalized)
-        if cached:
-            return schemas.FileItem(**cached)
+        cached = self._dir_cache.get_item(normalized)
+        if cached or self._dir_cache.is_known_missing(normalized):
+            return cached
 
         try:
-            parent_path = path.parent if path.parent.as_posix() else Path("/")
-            parent_id = self._path_to_id(parent_path.as_posix())
-            parent = schemas.FileItem(
-                storage=self._disk_name,
-                path=parent_path.as_posix() if parent_path.as_posix() != "." else "/",
-                fileid=parent_id,
-                type="dir",
-            )
-            target_name = path.name
-            for item in self.list(parent):
-                if item.name == target_name:
-                    return item
-            return None
+            parent_path = Path(normalized).parent.as_posix()
+            parent_id = self._path_to_id(parent_path)
+            target_name = Path(normalized).name
+            return next((item for item in self._list_dir(parent_id, parent_path) if item.name == target_name), None)
         except FileNotFoundError:
             return None
         except Exception as err:
@@ -666,29 +607,32 @@ class GuangYaApi:
             logger.error(f"【光鸭云盘】获取下载链接失败: {fileitem.name} - {err}")
             return None
 
-        file_size = fileitem.size
         progress_callback = transfer_process(Path(fileitem.path).as_posix())
-
+        urls = [download_url]
+
+        def _url_provider() -> Optional[str]:
+            # 首次使用已获取的链接，之后链接失效时重新获取
+            return urls.pop() if urls else self._get_download_url(fileitem)
+
+        downloader = RangeDownloader(
+            url_provider=_url_provider,
+            local_path=local_path,
+            file_key=fileitem.fileid or fileitem.path,
+            file_size=fileitem.size,
+            workers=self._download_workers,
+            is_stopped=lambda: global_vars.is_transfer_stopped(fileitem.path),
+            progress_callback=progress_callback,
+        )
         try:
-            with requests.get(download_url, stream=True, timeout=300) as response_obj:
-                response_obj.raise_for_status()
-                downloaded_size = 0
-                with open(local_path, "wb") as file_obj:
-                    for chunk in response_obj.iter_content(chunk_size=10 * 1024 * 1024):
-                        if global_vars.is_transfer_stopped(fileitem.path):
-                            return None
-                        if not chunk:
-                            continue
-                        file_obj.write(chunk)
-                        downloaded_size += len(chunk)
-                        if file_size:
-                            progress_callback((downloaded_size * 100) / file_size)
-            progress_callback(100)
-            return local_path
+            return downloader.download()
+        except DownloadStopped:
+            logger.info(f"【光鸭云盘】下载已停止，保留已完成部分用于续传: {fileitem.name}")
+            return None
         except Exception as err:
             logger.error(f"【光鸭云盘】下载失败: {fileitem.name} - {err}")
             try:
-                if local_path.exists():
+                # 没有续传清单的残缺文件无法复用，直接删除
+                if local_path.exists() and not downloader.resumable:
                     local_path.unlink()
             except Exception:
                 pass
@@ -762,22 +706,7 @@ class GuangYaApi:
         确认上传后的文件在云盘中可见。
         """
         target_path = Path(target_path)
-        for index in range(retry):
-            parent_path = target_path.parent if target_path.parent.as_posix() else Path("/")
-            parent_id = self._path_to_id(parent_path.as_posix())
-            parent = schemas.FileItem(
-                storage=self._disk_name,
-                path=parent_path.as_posix() if parent_path.as_posix() != "." else "/",
-                fileid=parent_id,
-                type="dir",
-            )
-            for item in self.list(parent):
-                if item.name == target_path.name:
-                    return item
-            self._id_cache.pop(target_path.as_posix(), None)
-            if index < retry - 1:
-                time.sleep(interval)
-        return None
+        return self._confirm_uploaded_items(target_path.parent, [target_path.name], retry, interval).get(target_path.name)
 
     def _build_uploaded_item(self, target_path: Path, target_name: str, parent_id: str, file_size: int, raw: Dict[str, Any] = None) -> schemas.FileItem:
         """
@@ -801,6 +730,100 @@ class GuangYaApi:
             drive_id=str(self._first_value(raw, ["gcid", "GCID", "md5"], "")) or None,
         )
 
+    def _check_flash_upload(self, target_name: str, parent_id: str, file_size: int, file_md5: str) -> bool:
+        """
+        检查文件是否可秒传。
+        """
+        flash_response = self.client.check_flash_upload(
+            task_id="",
+            gcid=file_md5,
+            file_size=file_size,
+            file_name=target_name,
+            parent_id=parent_id or "",
+        )
+        return bool(self._is_success(flash_response) and flash_response.get("data"))
+
+    def _request_upload_token(
+        self, target_name: str, parent_id: str, file_size: int, file_md5: str
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        申请上传凭证。
+
+        :return: (云盘中是否已存在同名文件, 凭证数据)，申请失败时凭证数据为 None
+        """
+        response = self.client.get_upload_token(
+            file_name=target_name,
+            file_size=file_size,
+            file_md5=file_md5,
+            parent_id=parent_id or "",
+            capacity=2,
+        )
+        exists = response.get("code") == 156
+        if not self._is_success(response):
+            return exists, None
+        return exists, response.get("data", {}) or {}
+
+    def _transfer_upload(self, local_path: Path, data: Dict[str, Any], progress_callback: Callable) -> None:
+        """
+        按上传凭证将文件分片传输到对象存储。
+        """
+        object_path = data.get("objectPath", "")
+        bucket_name = data.get("bucketName", "")
+        endpoint = data.get("endPoint", "") or data.get("fullEndPoint", "")
+        creds = data.get("creds", {}) or {}
+        access_key_id = creds.get("accessKeyID", "")
+        secret_access_key = creds.get("secretAccessKey", "")
+        session_token = creds.get("sessionToken", "")
+
+        if endpoint and bucket_name and object_path and access_key_id and secret_access_key and session_token:
+            parsed = urlparse(endpoint if endpoint.startswith("http") else f"https://{endpoint}")
+            host = parsed.netloc or parsed.path
+            if bucket_name and host.startswith(bucket_name + "."):
+                host = host[len(bucket_name) + 1 :]
+            self.client.upload_file_multipart(
+                endpoint=f"https://{host}",
+                bucket_name=bucket_name,
+                object_path=object_path,
+                file_path=str(local_path),
+                oss_access_key_id=access_key_id,
+                oss_access_key_secret=secret_access_key,
+                security_token=session_token,
+                progress_callback=lambda consumed, total: progress_callback((consumed * 100) / total) if total else None,
+            )
+
+    def _finish_upload(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        等待上传任务在云盘侧完成，返回任务结果。
+        """
+        task_id = str(self._first_value(data, ["taskId", "task_id"], ""))
+        if task_id:
+            return self._wait_upload_done({"data": {"taskId": task_id}})
+        return {"code": 0, "data": data}
+
+    def _confirm_uploaded_items(
+        self, parent_path: Path, names: List[str], retry: int = 20, interval: float = 0.5
+    ) -> Dict[str, schemas.FileItem]:
+        """
+        批量确认同一目录下上传的文件在云盘中可见，每轮只列出一次父目录。
+        """
+        parent_path = Path(parent_path) if Path(parent_path).as_posix() not in ("", ".") else Path("/")
+        pending = set(names)
+        found: Dict[str, schemas.FileItem] = {}
+        for index in range(retry):
+            try:
+                parent_id = self._path_to_id(parent_path.as_posix())
+                for item in self._list_dir(parent_id, parent_path.as_posix(), refresh=True):
+                    if item.name in pending:
+                        found[item.name] = item
+                        pending.discard(item.name)
+            except Exception as err:
+                logger.debug(f"【光鸭云盘】确认上传结果失败: {parent_path} - {err}")
+            if not pending:
+                break
+            if index < retry - 1:
+                time.sleep(interval)
+        return found
+
     def upload(self, target_dir: schemas.FileItem, local_path: Path, new_name: Optional[str] = None) -> Optional[schemas.FileItem]:
         """
         上传本地文件到目标目录。
@@ -815,71 +838,26 @@ class GuangYaApi:
         try:
             progress_callback = transfer_process(local_path.as_posix())
             file_size = local_path.stat().st_size
-            hash_md5 = md5()
-            with open(local_path, "rb") as file_obj:
-                for chunk in iter(lambda: file_obj.read(4096), b""):
-                    hash_md5.update(chunk)
-            file_md5 = hash_md5.hexdigest().upper()
-
-            flash_response = self.client.check_flash_upload(
-                task_id="",
-                gcid=file_md5,
-                file_size=file_size,
-                file_name=target_name,
-                parent_id=parent_id or "",
-            )
-            if self._is_success(flash_response) and flash_response.get("data"):
+            file_md5 = self._hasher.md5(local_path)
+
+            if self._check_flash_upload(target_name, parent_id, file_size, file_md5):
                 visible_item = self._confirm_uploaded_item(target_path, retry=10, interval=0.3)
                 if visible_item:
                     progress_callback(100)
                     return visible_item
 
-            response = self.client.get_upload_token(
-                file_name=target_name,
-                file_size=file_size,
-                file_md5=file_md5,
-                parent_id=parent_id or "",
-                capacity=2,
-            )
-
-            if response.get("code") == 156:
+            exists, data = self._request_upload_token(target_name, parent_id, file_size, file_md5)
+            if exists:
                 visible_item = self._confirm_uploaded_item(target_path, retry=20, interval=0.5)
                 if visible_item:
                     progress_callback(100)
                     return visible_item
 
-            if not self._is_success(response):
+            if data is None:
                 return None
 
-            data = response.get("data", {}) or {}
-            object_path = data.get("objectPath", "")
-            bucket_name = data.get("bucketName", "")
-            endpoint = data.get("endPoint", "") or data.get("fullEndPoint", "")
-            creds = data.get("creds", {}) or {}
-            access_key_id = creds.get("accessKeyID", "")
-            secret_access_key = creds.get("secretAccessKey", "")
-            session_token = creds.get("sessionToken", "")
-
-            if endpoint and bucket_name and object_path and access_key_id and secret_access_key and session_token:
-                parsed = urlparse(endpoint if endpoint.startswith("http") else f"https://{endpoint}")
-                host = parsed.netloc or parsed.path
-                if bucket_name and host.startswith(bucket_name + "."):
-                    host = host[len(bucket_name) + 1 :]
-                self.client.upload_file_multipart(
-                    endpoint=f"https://{host}",
-                    bucket_name=bucket_name,
-                    object_path=object_path,
-                    file_path=str(local_path),
-                    oss_access_key_id=access_key_id,
-                    oss_access_key_secret=secret_access_key,
-                    security_token=session_token,
-                    progress_callback=lambda consumed, total: progress_callback((consumed * 100) / total) if total else None,
-                )
-
-            task_id = str(self._first_value(data, ["taskId", "task_id"], ""))
-            result = response
-            if task_id:
-                result = self._wait_upload_done({"data": {"taskId": task_id}})
+            self._transfer_upload(local_path, data, progress_callback)
+            result = self._finish_upload(data)
 
             item = self._confirm_uploaded_item(target_path)
             if item:
@@ -899,22 +877,9 @@ class GuangYaApi:
 
     def upload_folder(self, target_dir: schemas.FileItem, local_path: Path, new_name: Optional[str] = None) -> Optional[schemas.FileItem]:
         """
-        递归上传本地文件夹。
+        上传本地文件夹，目录结构先行创建，文件经哈希、凭证、传输、确认各阶段并发处理。
         """
-        folder_name = new_name or local_path.name
-        cloud_folder = self.create_folder(target_dir, folder_name)
-        if not cloud_folder:
-            return None
-        for child in local_path.iterdir():
-            if global_vars.is_transfer_stopped(child.as_posix()):
-                return None
-            if child.is_dir():
-                if not self.upload_folder(cloud_folder, child):
-                    return None
-            else:
-                if not self.upload(cloud_folder, child):
-                    return None
-        return cloud_folder
+        return FolderUploadPipeline(self, max_inflight=self._upload_concurrency).run(target_dir, local_path, new_name)
 
     def _wait_item_visible(self, parent_path: Path, name: str, retry: int = 10, interval: float = 0.5) -> Optional[schemas.FileItem]:
         """
@@ -922,6 +887,7 @@ class GuangYaApi:
         """
         target_path = Path(parent_path) / name
         for index in range(retry):
+            self._dir_cache.invalidate_dir(parent_path.as_posix())
             item = self.get_item(target_path)
             if item:
                 return item
@@ -972,6 +938,7 @@ class GuangYaApi:
             response = self.client.move_file([file_id], target_parent_id=target_id or "")
             if not self._is_success(response):
                 return False
+            self._invalidate_path_cache(fileitem.path)
             task_id = str(self._first_value(self._get_data(response) if isinstance(self._get_data(response), dict) else {}, ["taskId", "task_id"], ""))
             if task_id:
                 self._wait_upload_done({"data": {"taskId": task_id}})
@@ -985,21 +952,67 @@ class GuangYaApi:
             logger.debug(f"【光鸭云盘】移动文件异常: {err}")
             return False
 
-    def snapshot(self, fileitem: schemas.FileItem) -> List[schemas.FileItem]:
+    def _list_snapshot_dir(self, fileitem: schemas.FileItem) -> List[schemas.FileItem]:
         """
-        递归获取目录下全部文件快照。
+        获取快照所需的最新目录列表。
         """
-        result: List[schemas.FileItem] = []
+        path = self._normalize_path(fileitem.path)
+        file_id = "" if path == "/" else (fileitem.fileid or self._path_to_id(path))
+        return self._list_dir(file_id, path, refresh=True)
 
-        def __walk(_item: schemas.FileItem):
-            for child in self.list(_item):
-                if child.type == "dir":
-                    __walk(child)
-                else:
-                    result.append(child)
+    def iter_snapshot(
+        self,
+        fileitem: schemas.FileItem,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        dir_filter: Optional[Callable[[schemas.FileItem], bool]] = None,
+    ) -> Iterator[schemas.FileItem]:
+        """
+        按层并发遍历目录，逐个返回其中的文件。
+
+        :param fileitem: 起始目录
+        :param max_depth: 最大遍历深度，起始目录为第 0 层
+        :param max_items: 最多返回的文件数
+        :param dir_filter: 返回 False 的目录不再展开
+        """
+        if fileitem.type != "dir":
+            yield fileitem
+            return
+        if (max_depth is not None and max_depth <= 0) or (dir_filter and not dir_filter(fileitem)):
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self._snapshot_workers, thread_name_prefix="guangya-snapshot")
+        pending: Dict[Future, Tuple[schemas.FileItem, int]] = {}
+        count = 0
+        try:
+            pending[executor.submit(self._list_snapshot_dir, fileitem)] = (fileitem, 0)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_item, depth = pending.pop(future)
+                    try:
+                        children = future.result()
+                    except Exception as err:
+                        logger.debug(f"【光鸭云盘】快照获取目录失败: {dir_item.path} - {err}")
+                        continue
+                    for child in children:
+                        if child.type == "dir":
+                            if (max_depth is None or depth + 1 < max_depth) and (not dir_filter or dir_filter(child)):
+                                pending[executor.submit(self._list_snapshot_dir, child)] = (child, depth + 1)
+                            continue
+                        yield child
+                        count += 1
+                        if max_items and count >= max_items:
+                            logger.info(f"【光鸭云盘】快照文件数达到上限 {max_items}，停止遍历: {fileitem.path}")
+                            return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-        __walk(fileitem)
-        return result
+    def snapshot(self, fileitem: schemas.FileItem) -> List[schemas.FileItem]:
+        """
+        获取目录下全部文件快照。
+        """
+        return list(self.iter_snapshot(fileitem))
 
     def exists(self, fileitem: schemas.FileItem) -> bool:
         """
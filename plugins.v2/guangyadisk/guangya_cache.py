@@ -0,0 +1,155 @@
+"""
+光鸭云盘目录列表缓存
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app import schemas
+
+
+class DirectoryCache:
+    """
+    单个账号的目录列表缓存。
+
+    以目录路径为键保存完整分页后的子项列表，超过有效期后失效；
+    子项总数超过上限时按最近访问顺序淘汰整个目录。
+    """
+
+    def __init__(self, ttl: int = 120, max_items: int = 50000):
+        """
+        :param ttl: 目录列表有效期(秒)
+        :param max_items: 缓存的子项总数上限
+        """
+        self._ttl = ttl
+        self._max_items = max_items
+        self._lock = threading.RLock()
+        # 目录路径 -> (目录ID, 子项名称 -> 子项, 过期时间)
+        self._dirs: "OrderedDict[str, Tuple[str, Dict[str, schemas.FileItem], float]]" = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        """
+        规范化路径格式。
+        """
+        normalized = str(path or "/").replace("\\", "/")
+        if normalized in ("", "."):
+            return "/"
+        if not normalized.startswith("/"):
+            normalized = f"/{normalized}"
+        return normalized.rstrip("/") or "/"
+
+    @staticmethod
+    def _split(path: str) -> Tuple[str, str]:
+        parent, _, name = path.rpartition("/")
+        return parent or "/", name
+
+    def _get(self, dir_path: str) -> Optional[Tuple[str, Dict[str, schemas.FileItem], float]]:
+        entry = self._dirs.get(dir_path)
+        if not entry:
+            return None
+        if entry[2] < time.time():
+            self._drop(dir_path)
+            return None
+        self._dirs.move_to_end(dir_path)
+        return entry
+
+    def _drop(self, dir_path: str) -> None:
+        entry = self._dirs.pop(dir_path, None)
+        if entry:
+            self._size -= len(entry[1])
+
+    def get_children(self, dir_path: str) -> Optional[List[schemas.FileItem]]:
+        """
+        获取目录的缓存子项，未缓存或已过期时返回 None。
+        """
+        with self._lock:
+            entry = self._get(self.normalize(dir_path))
+            return list(entry[1].values()) if entry else None
+
+    def put_children(self, dir_path: str, dir_id: str, items: List[schemas.FileItem]) -> None:
+        """
+        保存目录的完整子项列表。
+        """
+        dir_path = self.normalize(dir_path)
+        with self._lock:
+            self._drop(dir_path)
+            children = {item.name: item for item in items if item.name}
+            self._dirs[dir_path] = (dir_id or "", children, time.time() + self._ttl)
+            self._size += len(children)
+            while self._size > self._max_items and len(self._dirs) > 1:
+                oldest = next(iter(self._dirs))
+                self._drop(oldest)
+
+    def get_item(self, path: str) -> Optional[schemas.FileItem]:
+        """
+        从父目录缓存中查找文件项。
+
+        :return: 父目录未缓存时返回 None；父目录已缓存但不存在该项时同样返回 None，
+                 调用方可用 ``is_known_missing`` 区分
+        """
+        parent, name = self._split(self.normalize(path))
+        with self._lock:
+            entry = self._get(parent)
+            return entry[1].get(name) if entry else None
+
+    def is_known_missing(self, path: str) -> bool:
+        """
+        父目录已缓存且其中不存在该项。
+        """
+        parent, name = self._split(self.normalize(path))
+        with self._lock:
+            entry = self._get(parent)
+            return bool(entry) and name not in entry[1]
+
+    def get_id(self, path: str) -> Optional[str]:
+        """
+        获取路径对应的文件 ID，未缓存时返回 None。
+        """
+        path = self.normalize(path)
+        if path == "/":
+            return ""
+        with self._lock:
+            entry = self._get(path)
+            if entry and entry[0]:
+                return entry[0]
+            item = self.get_item(path)
+            return item.fileid if item and item.fileid else None
+
+    def add_child(self, parent_path: str, item: schemas.FileItem) -> None:
+        """
+        向已缓存的父目录中加入子项，父目录未缓存时忽略。
+        """
+        with self._lock:
+            entry = self._get(self.normalize(parent_path))
+            if entry and item.name:
+                if item.name not in entry[1]:
+                    self._size += 1
+                entry[1][item.name] = item
+
+    def invalidate_dir(self, dir_path: str) -> None:
+        """
+        失效单个目录的列表。
+        """
+        with self._lock:
+            self._drop(self.normalize(dir_path))
+
+    def invalidate_path(self, path: str) -> None:
+        """
+        文件或目录发生变化时，失效其父目录列表以及自身和全部子目录的列表。
+        """
+        path = self.normalize(path)
+        parent, _ = self._split(path)
+        prefix = f"{path.rstrip('/')}/"
+        with self._lock:
+            self._drop(parent)
+            for dir_path in [key for key in self._dirs if key == path or key.startswith(prefix)]:
+                self._drop(dir_path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dirs.clear()
+            self._size = 0
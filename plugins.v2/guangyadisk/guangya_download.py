@@ -0,0 +1,255 @@
+"""
+光鸭云盘分段并发下载
+"""
+
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+import requests
+
+from app.log import logger
+
+
+class DownloadStopped(Exception):
+    """
+    下载被用户中止。
+    """
+
+
+class DownloadUrlExpired(Exception):
+    """
+    下载链接已失效，需要重新获取。
+    """
+
+
+class RangeDownloader:
+    """
+    按字节范围分段、多线程写入预分配文件的下载器。
+
+    进度保存在同目录的 ``.gydl`` 清单文件中，中断后再次下载同一文件会跳过已完成的分段；
+    签名链接过期时通过 ``url_provider`` 重新获取。
+    """
+
+    MANIFEST_SUFFIX = ".gydl"
+    # 每个分段的大小
+    PART_SIZE = 32 * 1024 * 1024
+    # 单次读取大小
+    READ_SIZE = 1024 * 1024
+    # 单个分段最大重试次数
+    PART_RETRY = 3
+    # 链接过期时的状态码
+    EXPIRED_STATUS = (401, 403, 410)
+
+    def __init__(
+        self,
+        url_provider: Callable[[], Optional[str]],
+        local_path: Path,
+        file_key: str,
+        file_size: Optional[int] = None,
+        workers: int = 4,
+        is_stopped: Callable[[], bool] = None,
+        progress_callback: Callable[[float], None] = None,
+    ):
+        """
+        :param url_provider: 获取（或重新获取）下载链接
+        :param local_path: 本地保存路径
+        :param file_key: 文件唯一标识，用于校验续传清单
+        :param file_size: 文件大小，未知时通过 Range 请求探测
+        :param workers: 并发线程数
+        :param is_stopped: 是否已中止
+        :param progress_callback: 进度回调，参数为百分比
+        """
+        self._url_provider = url_provider
+        self._local_path = Path(local_path)
+        self._manifest_path = self._local_path.with_name(self._local_path.name + self.MANIFEST_SUFFIX)
+        self._file_key = str(file_key or "")
+        self._file_size = int(file_size) if file_size else 0
+        self._workers = max(1, int(workers or 1))
+        self._is_stopped = is_stopped or (lambda: False)
+        self._progress_callback = progress_callback or (lambda _: None)
+        self._url: Optional[str] = None
+        self._url_version = 0
+        self._lock = threading.Lock()
+        self._done: Set[int] = set()
+        self._downloaded = 0
+
+    @property
+    def resumable(self) -> bool:
+        """
+        本地是否保留了可续传的分段。
+        """
+        return self._manifest_path.exists()
+
+    def _current_url(self) -> tuple:
+        with self._lock:
+            if not self._url:
+                self._url = self._url_provider()
+                self._url_version += 1
+            if not self._url:
+                raise RuntimeError("获取下载链接失败")
+            return self._url, self._url_version
+
+    def _refresh_url(self, version: int) -> None:
+        """
+        链接失效后重新获取，同一版本只刷新一次。
+        """
+        with self._lock:
+            if version == self._url_version:
+                logger.info(f"【光鸭云盘】下载链接已失效，重新获取: {self._local_path.name}")
+                self._url = None
+
+    def _probe_size(self) -> bool:
+        """
+        探测文件大小及是否支持 Range 请求。
+        """
+        for _ in range(2):
+            url, version = self._current_url()
+            with requests.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=60) as response:
+                if response.status_code in self.EXPIRED_STATUS:
+                    self._refresh_url(version)
+                    continue
+                if response.status_code != 206:
+                    return False
+                match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+                if match:
+                    self._file_size = self._file_size or int(match.group(1))
+                return bool(self._file_size)
+        return False
+
+    def _load_manifest(self, part_count: int) -> None:
+        """
+        读取续传清单，文件信息不一致时丢弃。
+        """
+        try:
+            if not self._manifest_path.exists() or not self._local_path.exists():
+                return
+            manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            if (
+                manifest.get("file_key") != self._file_key
+                or manifest.get("size") != self._file_size
+                or manifest.get("part_size") != self.PART_SIZE
+            ):
+                return
+            self._done = {index for index in manifest.get("done", []) if 0 <= index < part_count}
+            self._downloaded = sum(self._part_length(index) for index in self._done)
+            if self._done:
+                logger.info(f"【光鸭云盘】续传 {self._local_path.name}，已完成 {len(self._done)}/{part_count} 个分段")
+        except Exception as err:
+            logger.debug(f"【光鸭云盘】读取下载清单失败: {err}")
+            self._done = set()
+            self._downloaded = 0
+
+    def _save_manifest(self) -> None:
+        manifest = {
+            "file_key": self._file_key,
+            "size": self._file_size,
+            "part_size": self.PART_SIZE,
+            "done": sorted(self._done),
+        }
+        tmp_path = self._manifest_path.with_name(self._manifest_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        tmp_path.replace(self._manifest_path)
+
+    def _part_length(self, index: int) -> int:
+        start = index * self.PART_SIZE
+        return min(self.PART_SIZE, self._file_size - start)
+
+    def _download_part(self, index: int) -> None:
+        """
+        下载单个分段并写入文件对应位置。
+        """
+        start = index * self.PART_SIZE
+        end = start + self._part_length(index) - 1
+        last_error: Optional[Exception] = None
+        for _ in range(self.PART_RETRY):
+            url, version = self._current_url()
+            written = 0
+            try:
+                with requests.get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=300) as response:
+                    if response.status_code in self.EXPIRED_STATUS:
+                        self._refresh_url(version)
+                        raise DownloadUrlExpired(f"HTTP {response.status_code}")
+                    if response.status_code != 206:
+                        raise RuntimeError(f"分段请求返回 HTTP {response.status_code}")
+                    with open(self._local_path, "r+b") as file_obj:
+                        file_obj.seek(start)
+                        for chunk in response.iter_content(chunk_size=self.READ_SIZE):
+                            if self._is_stopped():
+                                raise DownloadStopped()
+                            if not chunk:
+                                continue
+                            file_obj.write(chunk)
+                            written += len(chunk)
+                            with self._lock:
+                                self._downloaded += len(chunk)
+                                downloaded = self._downloaded
+                            self._progress_callback(downloaded * 100 / self._file_size)
+                if written != end - start + 1:
+                    raise RuntimeError(f"分段长度不完整: {written}/{end - start + 1}")
+                with self._lock:
+                    self._done.add(index)
+                    self._save_manifest()
+                return
+            except DownloadStopped:
+                raise
+            except Exception as err:
+                last_error = err
+                with self._lock:
+                    self._downloaded -= written
+        raise RuntimeError(f"分段 {index} 下载失败: {last_error}")
+
+    def _download_stream(self) -> None:
+        """
+        不支持 Range 时单线程整体下载。
+        """
+        url, _ = self._current_url()
+        with requests.get(url, stream=True, timeout=300) as response:
+            response.raise_for_status()
+            downloaded = 0
+            with open(self._local_path, "wb") as file_obj:
+                for chunk in response.iter_content(chunk_size=10 * 1024 * 1024):
+                    if self._is_stopped():
+                        raise DownloadStopped()
+                    if not chunk:
+                        continue
+                    file_obj.write(chunk)
+                    downloaded += len(chunk)
+                    if self._file_size:
+                        self._progress_callback(downloaded * 100 / self._file_size)
+
+    def download(self) -> Path:
+        """
+        执行下载，失败时抛出异常并保留已完成的分段供下次续传。
+        """
+        if not self._probe_size() or self._file_size <= self.PART_SIZE:
+            self._download_stream()
+            self._manifest_path.unlink(missing_ok=True)
+            return self._local_path
+
+        part_count = (self._file_size + self.PART_SIZE - 1) // self.PART_SIZE
+        self._load_manifest(part_count)
+        if not self._done:
+            # 预分配稀疏文件
+            with open(self._local_path, "wb") as file_obj:
+                file_obj.truncate(self._file_size)
+            self._save_manifest()
+
+        pending = [index for index in range(part_count) if index not in self._done]
+        with ThreadPoolExecutor(max_workers=min(self._workers, len(pending) or 1),
+                                thread_name_prefix="guangya-download") as executor:
+            futures = [executor.submit(self._download_part, index) for index in pending]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        self._manifest_path.unlink(missing_ok=True)
+        self._progress_callback(100)
+        return self._local_path
@@ -0,0 +1,173 @@
+"""
+光鸭云盘上传文件哈希计算与缓存
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import md5
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.log import logger
+
+
+class FileHasher:
+    """
+    上传前的文件 MD5 计算器。
+
+    使用大块缓冲区读取并在线程池中并发计算，结果按 (路径, 大小, 修改时间) 持久化；
+    同一文件被移动到其他路径后，按 (设备, inode, 大小, 修改时间) 仍可命中缓存。
+    """
+
+    # 单次读取大小
+    READ_SIZE = 8 * 1024 * 1024
+    # 缓存条目上限
+    MAX_ENTRIES = 20000
+
+    def __init__(self, cache_file: Optional[Path] = None, workers: int = 2):
+        """
+        :param cache_file: 缓存文件路径，为空时仅在内存中缓存
+        :param workers: 并发计算的线程数
+        """
+        self._cache_file = Path(cache_file) if cache_file else None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="guangya-hash")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._entries: Dict[str, Dict] = self._load()
+        self._by_inode: Dict[Tuple, str] = {
+            self._inode_key(entry): path for path, entry in self._entries.items() if entry.get("ino")
+        }
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if self._cache_file and self._cache_file.exists():
+                data = json.loads(self._cache_file.read_text(encoding="utf-8"))
+                if isinstance(data, dict):
+                    return data
+        except Exception as err:
+            logger.warning(f"【光鸭云盘】加载文件哈希缓存失败，将重建: {err}")
+        return {}
+
+    def _flush(self) -> None:
+        if not self._cache_file:
+            return
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self._cache_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+            tmp_file.replace(self._cache_file)
+        except Exception as err:
+            logger.warning(f"【光鸭云盘】保存文件哈希缓存失败: {err}")
+
+    @staticmethod
+    def _inode_key(entry: Dict) -> Tuple:
+        return entry.get("dev"), entry.get("ino"), entry.get("size"), entry.get("mtime")
+
+    def _lookup(self, path: str, stat) -> Optional[str]:
+        """
+        查找缓存，文件大小或修改时间变化时视为未命中。
+        """
+        entry = self._entries.get(path)
+        if not entry or entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime_ns:
+            old_path = self._by_inode.get((stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            entry = self._entries.get(old_path) if old_path else None
+            if not entry:
+                return None
+            # 文件被移动，按新路径记录
+            self._entries.pop(old_path, None)
+            self._entries[path] = entry
+            self._by_inode[self._inode_key(entry)] = path
+        entry["used"] = int(time.time())
+        return entry.get("md5")
+
+    def _store(self, path: str, stat, file_md5: str) -> None:
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "dev": stat.st_dev,
+            "ino": stat.st_ino,
+            "md5": file_md5,
+            "used": int(time.time()),
+        }
+        self._entries[path] = entry
+        self._by_inode[self._inode_key(entry)] = path
+        if len(self._entries) > self.MAX_ENTRIES:
+            for old_path, old_entry in sorted(self._entries.items(), key=lambda item: item[1].get("used", 0))[
+                : len(self._entries) - self.MAX_ENTRIES
+            ]:
+                self._entries.pop(old_path, None)
+                self._by_inode.pop(self._inode_key(old_entry), None)
+        self._flush()
+
+    def _compute(self, path: Path) -> str:
+        """
+        计算文件 MD5（大写）。
+        """
+        hash_md5 = md5()
+        buffer = bytearray(self.READ_SIZE)
+        view = memoryview(buffer)
+        with open(path, "rb", buffering=0) as file_obj:
+            while True:
+                size = file_obj.readinto(buffer)
+                if not size:
+                    break
+                hash_md5.update(view[:size])
+        return hash_md5.hexdigest().upper()
+
+    def _run(self, path: Path, key: str) -> str:
+        try:
+            stat = path.stat()
+            file_md5 = self._compute(path)
+            # 计算期间文件被修改时不写入缓存
+            if path.stat().st_mtime_ns == stat.st_mtime_ns:
+                with self._lock:
+                    self._store(key, stat, file_md5)
+            return file_md5
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def submit(self, path: Path) -> Future:
+        """
+        提交文件哈希计算，已缓存或正在计算时直接复用。
+        """
+        path = Path(path)
+        key = path.resolve().as_posix()
+        stat = path.stat()
+        with self._lock:
+            cached = self._lookup(key, stat)
+            if cached:
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._pending.get(key)
+            if not future:
+                future = self._executor.submit(self._run, path, key)
+                self._pending[key] = future
+            return future
+
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """
+        预先提交一批文件的哈希计算。
+        """
+        for path in paths:
+            try:
+                self.submit(path)
+            except Exception as err:
+                logger.debug(f"【光鸭云盘】预计算文件哈希失败: {path} - {err}")
+
+    def md5(self, path: Path) -> str:
+        """
+        获取文件 MD5，必要时等待计算完成。
+        """
+        return self.submit(path).result()
+
+    def close(self) -> None:
+        """
+        关闭计算线程池，取消尚未开始的计算。
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._pending.clear()
@@ -0,0 +1,236 @@
+"""
+光鸭云盘文件夹并发上传
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from app import schemas
+from app.core.config import global_vars
+from app.log import logger
+from app.modules.filemanager.storages import transfer_process
+
+if TYPE_CHECKING:
+    from .guangya_api import GuangYaApi
+
+
+@dataclass
+class UploadJob:
+    """
+    单个文件的上传任务。
+    """
+
+    local_path: Path
+    cloud_dir: schemas.FileItem
+    size: int = 0
+    file_md5: str = ""
+    # flash: 秒传 / exists: 云盘已存在 / transferred: 已传输 / failed: 失败
+    state: str = ""
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def parent_id(self) -> str:
+        return self.cloud_dir.fileid or ""
+
+    @property
+    def target_path(self) -> Path:
+        return Path(self.cloud_dir.path) / self.local_path.name
+
+
+class FolderUploadPipeline:
+    """
+    文件夹上传流水线。
+
+    目录结构先按层级创建，文件依次经过哈希、申请凭证、分片传输、等待完成四个阶段，
+    每个阶段使用独立线程池，同时在途的文件数受 ``max_inflight`` 限制；
+    全部传输结束后按目录批量确认，一次列目录即可确认多个文件，未能确认的文件回退为单文件上传。
+    """
+
+    def __init__(
+        self,
+        api: "GuangYaApi",
+        max_inflight: int = 4,
+        token_workers: int = 2,
+        transfer_workers: int = 3,
+        finish_workers: int = 4,
+    ):
+        """
+        :param api: 光鸭云盘操作实例
+        :param max_inflight: 同时在途的文件数上限
+        :param token_workers: 申请凭证线程数
+        :param transfer_workers: 分片传输线程数
+        :param finish_workers: 等待上传完成线程数
+        """
+        self._api = api
+        self._max_inflight = max(1, max_inflight)
+        self._token_workers = max(1, token_workers)
+        self._transfer_workers = max(1, min(transfer_workers, self._max_inflight))
+        self._finish_workers = max(1, finish_workers)
+        self._slots = threading.BoundedSemaphore(self._max_inflight)
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._failed = threading.Event()
+        self._jobs: List[UploadJob] = []
+        self._token_pool: Optional[ThreadPoolExecutor] = None
+        self._transfer_pool: Optional[ThreadPoolExecutor] = None
+        self._finish_pool: Optional[ThreadPoolExecutor] = None
+
+    def _plan(
+        self, target_dir: schemas.FileItem, local_path: Path, folder_name: str
+    ) -> Optional[schemas.FileItem]:
+        """
+        逐层创建云盘目录并收集待上传文件。
+        """
+        cloud_root = self._api.create_folder(target_dir, folder_name)
+        if not cloud_root:
+            return None
+        queue = [(local_path, cloud_root)]
+        while queue:
+            local_dir, cloud_dir = queue.pop(0)
+            for child in sorted(local_dir.iterdir()):
+                if global_vars.is_transfer_stopped(child.as_posix()):
+                    return None
+                if child.is_dir():
+                    cloud_child = self._api.create_folder(cloud_dir, child.name)
+                    if not cloud_child:
+                        return None
+                    queue.append((child, cloud_child))
+                else:
+                    self._jobs.append(UploadJob(local_path=child, cloud_dir=cloud_dir, size=child.stat().st_size))
+        return cloud_root
+
+    def _done(self, job: UploadJob, state: str = None) -> None:
+        """
+        文件离开流水线，释放在途名额。
+        """
+        if state:
+            job.state = state
+        if job.state == "failed":
+            self._failed.set()
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+        self._slots.release()
+
+    def _stage(self, job: UploadJob, func: Callable[[UploadJob], None]) -> Callable[[], None]:
+        """
+        包装阶段函数，异常时标记任务失败。
+        """
+
+        def _run():
+            try:
+                if self._failed.is_set() or global_vars.is_transfer_stopped(job.local_path.as_posix()):
+                    self._done(job, "failed")
+                    return
+                func(job)
+            except Exception as err:
+                logger.error(f"【光鸭云盘】上传失败: {job.local_path.name} - {err}")
+                self._done(job, "failed")
+
+        return _run
+
+    def _on_hashed(self, job: UploadJob, future) -> None:
+        try:
+            job.file_md5 = future.result()
+        except Exception as err:
+            logger.error(f"【光鸭云盘】计算文件哈希失败: {job.local_path.name} - {err}")
+            self._done(job, "failed")
+            return
+        self._token_pool.submit(self._stage(job, self._token_stage))
+
+    def _token_stage(self, job: UploadJob) -> None:
+        api = self._api
+        name = job.local_path.name
+        if api._check_flash_upload(name, job.parent_id, job.size, job.file_md5):
+            self._done(job, "flash")
+            return
+        exists, data = api._request_upload_token(name, job.parent_id, job.size, job.file_md5)
+        if exists:
+            self._done(job, "exists")
+            return
+        if data is None:
+            logger.error(f"【光鸭云盘】申请上传凭证失败: {name}")
+            self._done(job, "failed")
+            return
+        job.result = data
+        self._transfer_pool.submit(self._stage(job, self._transfer_stage))
+
+    def _transfer_stage(self, job: UploadJob) -> None:
+        progress_callback = transfer_process(job.local_path.as_posix())
+        self._api._transfer_upload(job.local_path, job.result, progress_callback)
+        self._finish_pool.submit(self._stage(job, self._finish_stage))
+
+    def _finish_stage(self, job: UploadJob) -> None:
+        job.result = self._api._finish_upload(job.result)
+        self._done(job, "transferred")
+
+    def _confirm(self) -> bool:
+        """
+        按目录批量确认上传结果，无法确认的文件回退为单文件上传。
+        """
+        api = self._api
+        groups: Dict[str, List[UploadJob]] = defaultdict(list)
+        for job in self._jobs:
+            groups[job.cloud_dir.path].append(job)
+        for jobs in groups.values():
+            cloud_dir = jobs[0].cloud_dir
+            found = api._confirm_uploaded_items(Path(cloud_dir.path), [job.local_path.name for job in jobs])
+            for job in jobs:
+                progress_callback = transfer_process(job.local_path.as_posix())
+                if job.local_path.name in found:
+                    progress_callback(100)
+                    continue
+                if job.state == "transferred" and api._has_uploaded_file(job.result):
+                    progress_callback(100)
+                    continue
+                logger.info(f"【光鸭云盘】未能确认上传结果，改为单独上传: {job.local_path.name}")
+                if not api.upload(cloud_dir, job.local_path):
+                    return False
+        return True
+
+    def run(
+        self, target_dir: schemas.FileItem, local_path: Path, new_name: Optional[str] = None
+    ) -> Optional[schemas.FileItem]:
+        """
+        执行文件夹上传。
+        """
+        cloud_root = self._plan(target_dir, local_path, new_name or local_path.name)
+        if not cloud_root:
+            return None
+        if not self._jobs:
+            return cloud_root
+
+        hasher = self._api._hasher
+        hasher.prefetch(job.local_path for job in self._jobs)
+        self._token_pool = ThreadPoolExecutor(max_workers=self._token_workers, thread_name_prefix="guangya-token")
+        self._transfer_pool = ThreadPoolExecutor(max_workers=self._transfer_workers, thread_name_prefix="guangya-transfer")
+        self._finish_pool = ThreadPoolExecutor(max_workers=self._finish_workers, thread_name_prefix="guangya-finish")
+        try:
+            for job in self._jobs:
+                self._slots.acquire()
+                if self._failed.is_set() or global_vars.is_transfer_stopped(job.local_path.as_posix()):
+                    self._slots.release()
+                    self._failed.set()
+                    break
+                with self._cond:
+                    self._inflight += 1
+                try:
+                    hasher.submit(job.local_path).add_done_callback(lambda future, _job=job: self._on_hashed(_job, future))
+                except Exception as err:
+                    logger.error(f"【光鸭云盘】计算文件哈希失败: {job.local_path.name} - {err}")
+                    self._done(job, "failed")
+            with self._cond:
+                self._cond.wait_for(lambda: self._inflight == 0)
+        finally:
+            for pool in (self._token_pool, self._transfer_pool, self._finish_pool):
+                pool.shutdown(wait=True)
+
+        if self._failed.is_set():
+            return None
+        if not self._confirm():
+            return None
+        return cloud_root
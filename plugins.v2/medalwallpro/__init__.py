@@ -1,3 +1,6 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
@@ -7,14 +10,18 @@ from fastapi import Response
 
 from app.core.config import settings
 from app.core.cache import Cache
+from app.core.event import eventmanager
 from app.db.site_oper import SiteOper
 from app.helper.sites import SitesHelper
 from app.log import logger
 from app.plugins import _PluginBase
 from app.scheduler import Scheduler
 from app.schemas import NotificationType
+from app.schemas.types import EventType
 from app.utils.http import RequestUtils
-from .handlers import handler_manager
+from .handlers import BaseMedalSiteHandler, handler_manager
+from .image_cache import MedalImageCache
+from .medal_index import diff_medals
 
 class MedalWallPro(_PluginBase):
     # 插件名称
@@ -24,7 +31,7 @@ class MedalWallPro(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/Medal.png"
     # 插件版本
-    plugin_version = "1.2.6"
+    plugin_version = "1.2.11"
     # 插件作者
     plugin_author = "KoWming"
     # 作者主页
@@ -39,6 +46,13 @@ class MedalWallPro(_PluginBase):
     # 过滤的站点列表
     FILTERED_SITES = ['星空', '聆音', '朱雀', '馒头', '家园', '朋友', '彩虹岛', '天空', '听听歌', '皇后', '猫站']
 
+    # 并发刷新的最大线程数
+    REFRESH_MAX_WORKERS = 8
+    # 同一主域名的最大并发刷新数
+    REFRESH_PER_HOST_LIMIT = 2
+    # 一次刷新所有站点的总时限(秒)
+    REFRESH_DEADLINE = 300
+
     # 私有属性
     _enabled: bool = False
     _cron: Optional[str] = "0 9 * * *"
@@ -47,10 +61,12 @@ class MedalWallPro(_PluginBase):
     _use_proxy: bool = True
     _retry_times: int = 3
     _retry_interval: int = 5
+    _image_prefetch: bool = False
 
     sites: SitesHelper = None
     siteoper: SiteOper = None
     _cache: Cache = None
+    _image_cache: Optional[MedalImageCache] = None
 
     @staticmethod
     def _to_bool(val: Any) -> bool:
@@ -112,6 +128,9 @@ class MedalWallPro(_PluginBase):
         """初始化插件"""
         try:
             self.stop_service()
+            # 磁盘图片缓存在初始化时创建，避免并发请求各自创建实例
+            if not self._image_cache:
+                self._image_cache = MedalImageCache(self.get_data_path() / "images")
             
             if config:
                 self._enabled = self._to_bool(config.get("enabled", False))
@@ -119,6 +138,7 @@ class MedalWallPro(_PluginBase):
                 self._use_proxy = self._to_bool(config.get("use_proxy", True))
                 self._retry_times = self._to_int(config.get("retry_times"), 3)
                 self._retry_interval = self._to_int(config.get("retry_interval"), 5)
+                self._image_prefetch = self._to_bool(config.get("image_prefetch", False))
                 self._chat_sites = config.get("chat_sites", [])
                 
                 # 验证 Cron 表达式
@@ -251,6 +271,8 @@ class MedalWallPro(_PluginBase):
             self._cache.clear(region="medalwallpro")
             # 清理HTTP请求缓存 (handlers/base.py 中定义)
             self._cache.clear(region="medalwallpro_request")
+            # 清理磁盘图片缓存
+            self._image_cache.clear()
             
             # 为了兼容性，也清理旧的持久化数据
             self.save_data('medals', [], 'zmmedalprog')
@@ -304,7 +326,8 @@ class MedalWallPro(_PluginBase):
             "chat_sites": self._chat_sites,
             "use_proxy": self._use_proxy,
             "retry_times": self._retry_times,
-            "retry_interval": self._retry_interval
+            "retry_interval": self._retry_interval,
+            "image_prefetch": self._image_prefetch
         }
 
     def _save_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -315,6 +338,7 @@ class MedalWallPro(_PluginBase):
             self._use_proxy = self._to_bool(config.get("use_proxy", True))
             self._retry_times = self._to_int(config.get("retry_times"), 3)
             self._retry_interval = self._to_int(config.get("retry_interval"), 5)
+            self._image_prefetch = self._to_bool(config.get("image_prefetch", False))
             self._chat_sites = config.get("chat_sites", [])
             
             # 验证 Cron 表达式
@@ -333,7 +357,8 @@ class MedalWallPro(_PluginBase):
                 "chat_sites": self._chat_sites,
                 "use_proxy": self._use_proxy,
                 "retry_times": self._retry_times,
-                "retry_interval": self._retry_interval
+                "retry_interval": self._retry_interval,
+                "image_prefetch": self._image_prefetch
             }
             
             self.update_config(config_to_save)
@@ -386,16 +411,25 @@ class MedalWallPro(_PluginBase):
                 medal['use_image_proxy'] = use_image_proxy
         return medals
     
+    def _get_cached_site_data(self, site_id: str) -> Optional[List[Dict]]:
+        """
+        从缓存获取站点勋章数据，未命中返回None
+        """
+        cached_data = self._cache.get(str(site_id), region="medalwallpro")
+        if cached_data is None:
+            return None
+        enriched_data = self._enrich_medals_metadata(site_id, cached_data)
+        self._cache.set(str(site_id), enriched_data, region="medalwallpro")
+        return enriched_data
+
     def _fetch_site_data(self, site_id: str) -> List[Dict]:
         """
         尝试从缓存获取数据，如果没有则抓取
         """
         # 尝试从缓存获取
-        cached_data = self._cache.get(str(site_id), region="medalwallpro")
+        cached_data = self._get_cached_site_data(site_id)
         if cached_data is not None:
-            enriched_data = self._enrich_medals_metadata(site_id, cached_data)
-            self._cache.set(str(site_id), enriched_data, region="medalwallpro")
-            return enriched_data
+            return cached_data
             
         # 获取站点名称用于日志
         site_name = site_id
@@ -428,15 +462,64 @@ class MedalWallPro(_PluginBase):
              # 如果未配置站点，尝试返回空或者之前可能存在的持久化数据(如果需要兼容)
              return []
              
+        site_medals = {}
+        missing_sites = {}
+        for site_id in self._chat_sites:
+            cached_data = self._get_cached_site_data(site_id)
+            if cached_data is not None:
+                site_medals[site_id] = cached_data
+                continue
+            site = self.siteoper.get(site_id)
+            if site:
+                missing_sites[site_id] = site
+
+        # 缓存未命中的站点并发抓取
+        if missing_sites:
+            logger.info(f"{len(missing_sites)} 个站点缓存未命中，开始并发抓取...")
+            site_medals.update(self.__refresh_sites(missing_sites))
+
         all_medals = []
         for site_id in self._chat_sites:
-            medals = self._fetch_site_data(site_id)
+            medals = site_medals.get(site_id)
             if medals:
                 all_medals.extend(medals)
                 
         logger.info(f"API 获取勋章数据(缓存聚合): {len(all_medals)} 个")
         return all_medals
 
+    def __image_fetcher(self, site_url: str, site_cookie: Optional[str], imgurl: str):
+        """构造图片回源函数，参数为条件请求头"""
+        headers = {
+            "User-Agent": settings.NORMAL_USER_AGENT,
+            "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+            "Referer": site_url,
+        }
+        proxies = settings.PROXY if self._use_proxy and hasattr(settings, 'PROXY') else None
+
+        def _fetch(extra_headers: Dict[str, str]):
+            return RequestUtils(timeout=30, headers={**headers, **extra_headers},
+                                cookies=site_cookie, proxies=proxies).get_res(url=imgurl)
+
+        return _fetch
+
+    def __prefetch_images(self, site, medals: List[Dict]):
+        """后台预取站点勋章图片到磁盘缓存"""
+        site_url = getattr(site, 'url', None)
+        if not site_url:
+            return
+        site_cookie = getattr(site, 'cookie', None)
+        items = []
+        seen = set()
+        for medal in medals:
+            for imgurl in (medal.get('imageSmall'), medal.get('original_image_url')):
+                if not imgurl or not imgurl.startswith('http') or imgurl in seen:
+                    continue
+                seen.add(imgurl)
+                if self._is_allowed_image_host(site_url, imgurl):
+                    items.append((imgurl, self.__image_fetcher(site_url, site_cookie, imgurl)))
+        if items:
+            self._image_cache.prefetch(items)
+
     def _image_proxy(self, site_id: str, imgurl: str) -> Response:
         """
         代理勋章图片，自动携带站点 Cookie，避免前端跨域/防盗链问题
@@ -462,19 +545,14 @@ class MedalWallPro(_PluginBase):
             if not self._is_allowed_image_host(site_url, imgurl):
                 return Response(status_code=403, content="forbidden image host")
 
-            headers = {
-                "User-Agent": settings.NORMAL_USER_AGENT,
-                "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-                "Referer": site_url,
-            }
-            proxies = settings.PROXY if self._use_proxy and hasattr(settings, 'PROXY') else None
-            res = RequestUtils(timeout=30, headers=headers, cookies=site_cookie, proxies=proxies).get_res(url=imgurl)
-            if not res or res.status_code != 200:
+            # 优先从磁盘缓存返回，过期后条件请求重新验证
+            cached = self._image_cache.get(imgurl, self.__image_fetcher(site_url, site_cookie, imgurl))
+            if not cached:
                 return Response(status_code=404, content="image fetch failed")
 
-            media_type = res.headers.get("Content-Type") or "image/jpeg"
+            content, media_type = cached
             return Response(
-                content=res.content,
+                content=content,
                 media_type=media_type,
                 headers={"Cache-Control": "public, max-age=86400"}
             )
@@ -612,6 +690,28 @@ class MedalWallPro(_PluginBase):
             return {"success": False, "message": f"{action_text}勋章失败: {str(e)}"}
 
 
+    @staticmethod
+    def register_site_handler(domain: str, handler: BaseMedalSiteHandler):
+        """
+        按域名注册勋章处理器，匹配该域名及其子域名的站点，优先于内置处理器
+        """
+        handler_manager.register_domain_handler(domain, handler)
+
+    @eventmanager.register(EventType.SiteUpdated)
+    def site_updated(self, event):
+        """
+        站点信息变更时清除处理器解析缓存
+        """
+        handler_manager.invalidate()
+
+    @eventmanager.register(EventType.SiteDeleted)
+    def site_deleted(self, event):
+        """
+        站点删除时清除对应的处理器解析缓存
+        """
+        site_id = (event.event_data or {}).get("site_id") if event else None
+        handler_manager.invalidate(site_id)
+
     def __custom_sites(self) -> list:
         """获取自定义站点列表"""
         custom_sites = []
@@ -631,9 +731,9 @@ class MedalWallPro(_PluginBase):
                 logger.error("未选择站点")
                 return
 
-            # 加载历史记录
-            history_medals = self.get_data('history_medals') or []
-            is_first_run = not bool(history_medals)
+            # 旧版历史记录 (站点名_勋章名)，仅用于迁移到按站点的勋章索引
+            legacy_history = set(self.get_data('history_medals') or [])
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # 统计变量
             total_sites_count = len(self._chat_sites)
@@ -645,25 +745,30 @@ class MedalWallPro(_PluginBase):
             
             # 新上架勋章列表
             new_arrivals = []
-            # 本次运行的所有勋章ID集合 (用于更新历史)
-            current_medals_ids = set(history_medals) if history_medals else set()
+            # 价格/库存变动列表
+            changed_medals = []
+            # 已建立勋章索引的站点数
+            indexed_sites_count = 0
 
+            sites = {}
             for site_id in self._chat_sites:
+                site = self.siteoper.get(site_id)
+                if site:
+                    sites[site_id] = site
+
+            # 并发刷新，每个站点完成后即写入缓存
+            site_results = self.__refresh_sites(sites)
+
+            for site_id, site in sites.items():
                 try:
-                    site = self.siteoper.get(site_id)
-                    if not site:
-                        continue
-                        
                     site_name = site.name
                     valid_sites_count += 1
-                    
-                    if force_refresh:
-                        medals = self.get_medal_data(site_id)
-                        self._cache.set(str(site_id), medals, region="medalwallpro")
-                    else:
-                        medals = self.get_medal_data(site_id)
-                        self._cache.set(str(site_id), medals, region="medalwallpro")
 
+                    if site_id not in site_results:
+                        failed_sites.append(site_name)
+                        continue
+
+                    medals = site_results.get(site_id)
                     if not medals:
                         continue
                      
@@ -674,40 +779,39 @@ class MedalWallPro(_PluginBase):
                         # 统计已拥有
                         if (medal.get('purchase_status') or '').strip() == '已拥有':
                             owned_count += 1
-                        
                         # 统计可购买 (仅限当前有效时间段)
-                        is_purchasable = False
-                        if (medal.get('purchase_status') or '').strip() in ['购买', '赠送']:
-                            if self.is_current_time_in_range(medal.get('saleBeginTime', ''), medal.get('saleEndTime', '')):
-                                purchasable_count += 1
-                                is_purchasable = True
-                        
-                        # 生成唯一ID: 站点名_勋章名
-                        medal_id = f"{site_name}_{medal.get('name', '')}"
-                        
-                        # 如果是新出现的勋章，且当前可购买
-                        if medal_id not in current_medals_ids and is_purchasable:
-                            # 只有非首次运行才记录为“上新”
-                            if not is_first_run:
-                                new_arrivals.append(medal)
-                        
-                        # 更新当前ID集合
-                        if is_purchasable:
-                             current_medals_ids.add(medal_id)
+                        if self.__is_purchasable(medal):
+                            purchasable_count += 1
+
+                    # 与站点勋章索引对比，仅在有变化时保存该站点索引
+                    index_key = f"medal_index_{site_id}"
+                    rows = self.get_data(index_key)
+                    known_names = None
+                    if rows is None:
+                        legacy_prefix = f"{site_name}_"
+                        known_names = {medal_id[len(legacy_prefix):] for medal_id in legacy_history
+                                       if medal_id.startswith(legacy_prefix)}
+                    new_rows, diff = diff_medals(rows or {}, medals, self.__is_purchasable, now, known_names)
+                    indexed_sites_count += 1
+
+                    # 首次建立索引且没有旧版历史时不记录上新，避免通知刷屏
+                    if rows is not None or known_names:
+                        new_arrivals.extend(diff["new"])
+                        changed_medals.extend(diff["changed"])
+                    if rows is None or diff["new"] or diff["removed"] or diff["changed"]:
+                        self.save_data(index_key, new_rows)
+                    if diff["removed"]:
+                        logger.info(f"站点 {site_name} 下架 {len(diff['removed'])} 个勋章: "
+                                    f"{', '.join(row.get('name', '') for row in diff['removed'])}")
 
                 except Exception as e:
                     logger.error(f"处理站点 {site_id} 时发生错误: {str(e)}")
-                    # 尝试获取站点名称失败的情况
-                    site_name_err = site_id
-                    try:
-                        s = self.siteoper.get(site_id)
-                        if s: site_name_err = s.name
-                    except: pass
-                    failed_sites.append(site_name_err)
+                    failed_sites.append(getattr(site, 'name', None) or site_id)
                     continue
             
-            # 保存最新的勋章历史
-            self.save_data('history_medals', list(current_medals_ids))
+            # 所有站点均已迁移到勋章索引后删除旧版历史记录
+            if legacy_history and indexed_sites_count == len(sites):
+                self.del_data('history_medals')
             
             # 准备统计数据
             stats = {
@@ -720,20 +824,71 @@ class MedalWallPro(_PluginBase):
 
             # 发送通知 (如果开启了通知)
             if self._notify:
-                self.__send_notification(stats, new_arrivals)
+                self.__send_notification(stats, new_arrivals, changed_medals)
                     
-            logger.info(f"处理完成，缓存 {total_medals_count} 个勋章，新发现 {len(new_arrivals)} 个")
+            logger.info(f"处理完成，缓存 {total_medals_count} 个勋章，新发现 {len(new_arrivals)} 个，"
+                        f"变动 {len(changed_medals)} 个")
             
         except Exception as e:
             logger.error(f"处理所有站点时发生错误: {str(e)}")
 
 
-    def get_medal_data(self, site_id: str) -> List[Dict]:
+    def __site_host_key(self, site) -> str:
+        """站点限流使用的主机标识"""
+        hostname = urlparse(getattr(site, 'url', '') or '').hostname or ''
+        return self._get_root_domain(hostname) or str(getattr(site, 'name', '') or getattr(site, 'id', ''))
+
+    def __refresh_sites(self, sites: Dict[Any, Any]) -> Dict[Any, List[Dict]]:
+        """
+        并发刷新多个站点的勋章数据
+        :param sites: 站点ID -> 站点对象
+        :return: 站点ID -> 勋章列表，超过总时限仍未完成或异常的站点不包含在结果中
+        """
+        if not sites:
+            return {}
+
+        # 同一主域名共享一个并发上限，避免对同一站点瞬时并发过高
+        host_limits: Dict[str, threading.Semaphore] = {}
+        for site in sites.values():
+            host_limits.setdefault(self.__site_host_key(site), threading.Semaphore(self.REFRESH_PER_HOST_LIMIT))
+
+        def _refresh(site_id, site) -> List[Dict]:
+            with host_limits[self.__site_host_key(site)]:
+                medals = self.get_medal_data(site_id, site=site)
+            # 完成即写入缓存，超时后才完成的站点也能更新缓存
+            self._cache.set(str(site_id), medals, region="medalwallpro")
+            return medals
+
+        results = {}
+        start_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=min(self.REFRESH_MAX_WORKERS, len(sites)),
+                                      thread_name_prefix="medalwallpro")
+        futures = {executor.submit(_refresh, site_id, site): site_id for site_id, site in sites.items()}
+        try:
+            for future in as_completed(futures, timeout=self.REFRESH_DEADLINE):
+                site_id = futures[future]
+                try:
+                    results[site_id] = future.result()
+                except Exception as e:
+                    logger.error(f"刷新站点 {getattr(sites[site_id], 'name', site_id)} 勋章失败: {str(e)}")
+        except FuturesTimeoutError:
+            pending = [getattr(sites[site_id], 'name', site_id) for future, site_id in futures.items()
+                       if not future.done()]
+            logger.warning(f"勋章刷新超过总时限 {self.REFRESH_DEADLINE} 秒，未完成站点: {', '.join(pending)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"并发刷新 {len(sites)} 个站点完成 {len(results)} 个，耗时 {time.time() - start_time:.1f} 秒")
+        return results
+
+    def get_medal_data(self, site_id: str, site=None) -> List[Dict]:
         """
         获取站点勋章数据 (无缓存，直接抓取)
+        :param site: 已查询的站点对象，为空时按ID查询
         """
         try:
-            site = self.siteoper.get(site_id)
+            if site is None:
+                site = self.siteoper.get(site_id)
             if not site:
                 return []
                 
@@ -820,12 +975,24 @@ class MedalWallPro(_PluginBase):
             for medal in medals:
                 medal['site_id'] = site_id
                 medal['use_image_proxy'] = handler.should_use_image_proxy()
+
+            if self._image_prefetch and handler.should_use_image_proxy():
+                try:
+                    self.__prefetch_images(site, medals)
+                except Exception as e:
+                    logger.warning(f"预取勋章图片失败: {str(e)}")
             
             return medals
         except Exception as e:
             logger.error(f"获取勋章数据失败: {str(e)}")
             return []
 
+    def __is_purchasable(self, medal: Dict) -> bool:
+        """勋章当前是否可购买 (仅限当前有效时间段)"""
+        if (medal.get('purchase_status') or '').strip() not in ['购买', '赠送']:
+            return False
+        return self.is_current_time_in_range(medal.get('saleBeginTime', ''), medal.get('saleEndTime', ''))
+
     @staticmethod
     def __normalize_medal_name(name: str) -> str:
         """规范化勋章名称，减少接口字段格式差异导致的匹配失败"""
@@ -887,7 +1054,8 @@ class MedalWallPro(_PluginBase):
             return ""
         return time_str.split(" ")[0]
 
-    def __send_notification(self, stats: Dict, new_arrivals: List[Dict]):
+    def __send_notification(self, stats: Dict, new_arrivals: List[Dict],
+                            changed_medals: Optional[List[Tuple[Dict, Dict]]] = None):
         """发送通知"""
         # 1. 统计部分
         text_message = "──────────\n"
@@ -922,8 +1090,27 @@ class MedalWallPro(_PluginBase):
                     text_message += f"📦 库存：{medal.get('stock', '未知')}\n"
                     text_message += "\n"
                 text_message += "──────────\n"
+
+        # 3. 价格/库存变动部分 (按站点分组)
+        site_changes = {}
+        for medal, changes in changed_medals or []:
+            lines = []
+            if 'price' in changes:
+                old_price, new_price = changes['price']
+                lines.append(f"💰 价格：{old_price} → {new_price}")
+            if 'stock' in changes and self.__is_purchasable(medal):
+                old_stock, new_stock = changes['stock']
+                lines.append(f"📦 库存：{old_stock or '未知'} → {new_stock or '未知'}")
+            if lines:
+                site_changes.setdefault(medal.get('site', ''), []).append((medal, lines))
+        for site, items in site_changes.items():
+            text_message += f"【{site}】站点勋章变动：\n"
+            for medal, lines in items:
+                text_message += f"🏅 勋章名称：{medal.get('name', '')}\n"
+                text_message += "\n".join(lines) + "\n\n"
+            text_message += "──────────\n"
         
-        # 3. 失败站点部分
+        # 4. 失败站点部分
         failed_sites = stats.get('failed_sites', [])
         if failed_sites:
             text_message += f"❌ 失败站点：{', '.join(failed_sites)}\n"
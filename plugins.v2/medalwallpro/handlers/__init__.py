@@ -1,4 +1,7 @@
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
 from .base import BaseMedalSiteHandler
 from .zm_handler import ZmMedalHandler
 from .php_handler import PhpMedalHandler
@@ -45,32 +48,103 @@ class MedalHandlerManager:
             ZmMedalHandler(),  # 优先处理织梦站点
             PhpMedalHandler(),  # 最后使用PHP通用处理器
         ]
-        # 记录已匹配的站点
+        # 按域名注册的处理器，优先于 match() 遍历
+        self._domain_handlers: Dict[str, BaseMedalSiteHandler] = {}
+        # 已解析的处理器：(站点ID, URL, 名称) -> 处理器
+        self._resolved: Dict[Tuple, BaseMedalSiteHandler] = {}
+        # 已被专用处理器匹配的站点名称
         self._matched_sites = set()
-    
-    def get_handler(self, site) -> Optional[BaseMedalSiteHandler]:
-        """获取适配的处理器"""
-        # 清空已匹配站点记录
-        self._matched_sites.clear()
-        
-        # 遍历所有处理器
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _site_key(site) -> Tuple:
+        """站点解析缓存键，URL 或名称变化时自动失效"""
+        return (getattr(site, 'id', None),
+                (getattr(site, 'url', None) or '').lower(),
+                (getattr(site, 'name', None) or '').lower())
+
+    @staticmethod
+    def _normalize_domain(domain: str) -> str:
+        domain = (domain or '').strip().lower()
+        if '://' in domain:
+            domain = urlparse(domain).hostname or ''
+        return domain.strip('.')
+
+    def _match_domain(self, site) -> Optional[BaseMedalSiteHandler]:
+        """按站点主机名及其上级域名查找注册的处理器"""
+        if not self._domain_handlers:
+            return None
+        host = self._normalize_domain(getattr(site, 'url', None) or '')
+        while host:
+            handler = self._domain_handlers.get(host)
+            if handler:
+                return handler
+            if '.' not in host:
+                break
+            host = host.split('.', 1)[1]
+        return None
+
+    def _resolve(self, site) -> Optional[BaseMedalSiteHandler]:
+        """按注册顺序解析站点处理器"""
+        handler = self._match_domain(site)
+        if handler:
+            return handler
         for handler in self._handlers:
             if handler.match(site):
-                # 记录已匹配的站点
-                if hasattr(site, 'name'):
-                    self._matched_sites.add(site.name.lower())
                 return handler
         return None
+
+    def get_handler(self, site) -> Optional[BaseMedalSiteHandler]:
+        """获取适配的处理器，解析结果按站点缓存"""
+        key = self._site_key(site)
+        handler = self._resolved.get(key)
+        if handler:
+            return handler
+
+        handler = self._resolve(site)
+        if handler:
+            with self._lock:
+                self._resolved[key] = handler
+                if hasattr(site, 'name') and not isinstance(handler, PhpMedalHandler):
+                    self._matched_sites.add(site.name.lower())
+        return handler
+
+    def invalidate(self, site_id=None):
+        """清除站点处理器解析缓存，site_id 为空时全部清除"""
+        with self._lock:
+            if site_id is None:
+                self._resolved.clear()
+                self._matched_sites.clear()
+                return
+            for key in [key for key in self._resolved if str(key[0]) == str(site_id)]:
+                self._resolved.pop(key, None)
+                self._matched_sites.discard(key[2])
     
     def register_handler(self, handler: BaseMedalSiteHandler):
         """注册新的处理器"""
         if handler not in self._handlers:
-            self._handlers.append(handler)
+            # 通用PHP处理器始终保持在最后
+            index = len(self._handlers)
+            if self._handlers and isinstance(self._handlers[-1], PhpMedalHandler):
+                index -= 1
+            self._handlers.insert(index, handler)
+            self.invalidate()
     
     def unregister_handler(self, handler: BaseMedalSiteHandler):
         """注销处理器"""
         if handler in self._handlers:
             self._handlers.remove(handler)
+        for domain in [d for d, h in self._domain_handlers.items() if h is handler]:
+            self._domain_handlers.pop(domain, None)
+        self.invalidate()
+
+    def register_domain_handler(self, domain: str, handler: BaseMedalSiteHandler):
+        """按域名注册处理器，匹配该域名及其子域名的站点"""
+        domain = self._normalize_domain(domain)
+        if not domain:
+            return
+        self._domain_handlers[domain] = handler
+        self.invalidate()
 
     def is_site_matched(self, site_name: str) -> bool:
         """检查站点是否已被其他处理器匹配"""
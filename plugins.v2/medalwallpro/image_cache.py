@@ -0,0 +1,220 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from app.log import logger
+
+
+class MedalImageCache:
+    """
+    勋章图片磁盘缓存
+
+    图片内容按 sha256 存储（相同图片只保存一份），索引按图片URL记录 ETag/Last-Modified，
+    过期后使用条件请求重新验证；总大小超过上限时按最近访问时间淘汰。
+    """
+
+    # 索引中记录访问时间变化后，累计多少次命中再落盘
+    _FLUSH_EVERY_HITS = 50
+
+    def __init__(self, root: Path, max_bytes: int = 200 * 1024 * 1024, revalidate_after: int = 7 * 86400):
+        """
+        :param root: 缓存目录
+        :param max_bytes: 缓存总大小上限
+        :param revalidate_after: 缓存多久后需要向源站重新验证(秒)
+        """
+        self._root = root
+        self._blob_dir = root / "blobs"
+        self._index_file = root / "index.json"
+        self._max_bytes = max_bytes
+        self._revalidate_after = revalidate_after
+        self._lock = threading.RLock()
+        self._pending_hits = 0
+        self._prefetching = False
+        # 等待预取的图片，预取进行中提交的图片合并到队列由同一任务继续处理
+        self._prefetch_queue: Dict[str, Callable[[Dict[str, str]], Optional[object]]] = {}
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, Dict] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """加载索引，并丢弃文件已不存在的条目"""
+        try:
+            if self._index_file.exists():
+                index = json.loads(self._index_file.read_text(encoding="utf-8"))
+                return {url: entry for url, entry in index.items()
+                        if (self._blob_dir / entry.get("blob", "")).is_file()}
+        except Exception as e:
+            logger.warning(f"加载勋章图片缓存索引失败，将重建: {e}")
+        return {}
+
+    def _flush(self):
+        """索引落盘"""
+        try:
+            tmp_file = self._index_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(self._index, ensure_ascii=False), encoding="utf-8")
+            tmp_file.replace(self._index_file)
+            self._pending_hits = 0
+        except Exception as e:
+            logger.warning(f"保存勋章图片缓存索引失败: {e}")
+
+    def _read(self, entry: Dict) -> Optional[bytes]:
+        try:
+            return (self._blob_dir / entry["blob"]).read_bytes()
+        except Exception:
+            return None
+
+    def _touch(self, entry: Dict):
+        entry["accessed_at"] = time.time()
+        self._pending_hits += 1
+        if self._pending_hits >= self._FLUSH_EVERY_HITS:
+            self._flush()
+
+    def _store(self, url: str, content: bytes, content_type: str, etag: str, last_modified: str):
+        """写入图片内容与索引"""
+        digest = hashlib.sha256(content).hexdigest()
+        blob_file = self._blob_dir / digest
+        if not blob_file.exists():
+            tmp_file = blob_file.with_suffix(".tmp")
+            tmp_file.write_bytes(content)
+            tmp_file.replace(blob_file)
+        now = time.time()
+        self._index[url] = {
+            "blob": digest,
+            "size": len(content),
+            "content_type": content_type,
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "validated_at": now,
+            "accessed_at": now,
+        }
+        self._evict()
+        self._flush()
+
+    def _evict(self):
+        """按最近访问时间淘汰，直至总大小低于上限"""
+        blob_sizes: Dict[str, int] = {}
+        for entry in self._index.values():
+            blob_sizes[entry["blob"]] = entry.get("size", 0)
+        total = sum(blob_sizes.values())
+        if total <= self._max_bytes:
+            return
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1].get("accessed_at", 0)):
+            if total <= self._max_bytes:
+                break
+            self._index.pop(url, None)
+            blob = entry["blob"]
+            # 内容相同的其他URL仍在引用时保留文件
+            if any(e["blob"] == blob for e in self._index.values()):
+                continue
+            total -= blob_sizes.get(blob, 0)
+            try:
+                (self._blob_dir / blob).unlink(missing_ok=True)
+            except Exception as e:
+                logger.debug(f"删除勋章图片缓存文件失败: {e}")
+
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            return url in self._index
+
+    def get(self, url: str, fetch: Callable[[Dict[str, str]], Optional[object]]) -> Optional[Tuple[bytes, str]]:
+        """
+        获取图片，优先从磁盘返回
+        :param url: 图片地址
+        :param fetch: 回源函数，参数为附加请求头，返回 requests 响应对象
+        :return: (图片内容, Content-Type)，失败返回None
+        """
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and time.time() - entry.get("validated_at", 0) < self._revalidate_after:
+                content = self._read(entry)
+                if content is not None:
+                    self._touch(entry)
+                    return content, entry.get("content_type") or "image/jpeg"
+                self._index.pop(url, None)
+                entry = None
+            entry = dict(entry) if entry else None
+
+        # 未命中或需要重新验证
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            res = fetch(headers)
+        except Exception as e:
+            logger.debug(f"勋章图片回源失败 {url}: {e}")
+            res = None
+
+        with self._lock:
+            if res is not None and res.status_code == 304 and url in self._index:
+                current = self._index[url]
+                current["validated_at"] = time.time()
+                content = self._read(current)
+                if content is not None:
+                    self._touch(current)
+                    return content, current.get("content_type") or "image/jpeg"
+            if res is not None and res.status_code == 200 and res.content:
+                content_type = res.headers.get("Content-Type") or "image/jpeg"
+                self._store(url, res.content, content_type,
+                            res.headers.get("ETag"), res.headers.get("Last-Modified"))
+                return res.content, content_type
+            # 回源失败时返回过期缓存
+            if entry:
+                content = self._read(entry)
+                if content is not None:
+                    return content, entry.get("content_type") or "image/jpeg"
+        return None
+
+    def prefetch(self, items: Iterable[Tuple[str, Callable[[Dict[str, str]], Optional[object]]]],
+                 max_workers: int = 4):
+        """
+        后台预取未缓存的图片，已有预取任务时合并到其队列
+        :param items: (图片地址, 回源函数) 列表
+        """
+        with self._lock:
+            for url, fetch in items:
+                if url and url not in self._index:
+                    self._prefetch_queue.setdefault(url, fetch)
+            if not self._prefetch_queue or self._prefetching:
+                return
+            self._prefetching = True
+
+        def _run():
+            total = 0
+            try:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="medalwallpro-img") as executor:
+                    while True:
+                        # 取出队列中的全部图片，队列为空时在同一把锁内结束预取，避免新提交的图片无人处理
+                        with self._lock:
+                            pending = [(url, fetch) for url, fetch in self._prefetch_queue.items()
+                                       if url not in self._index]
+                            self._prefetch_queue.clear()
+                            if not pending:
+                                self._prefetching = False
+                                break
+                        list(executor.map(lambda item: self.get(*item), pending))
+                        total += len(pending)
+                logger.info(f"勋章图片预取完成: {total} 张")
+            except Exception as e:
+                logger.warning(f"勋章图片预取失败: {e}")
+                with self._lock:
+                    self._prefetching = False
+
+        threading.Thread(target=_run, name="medalwallpro-prefetch", daemon=True).start()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for blob_file in self._blob_dir.iterdir():
+                try:
+                    blob_file.unlink()
+                except Exception as e:
+                    logger.debug(f"删除勋章图片缓存文件失败: {e}")
+            self._index = {}
+            self._prefetch_queue.clear()
+            self._flush()
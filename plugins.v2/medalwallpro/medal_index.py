@@ -0,0 +1,64 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def medal_key(medal: Dict) -> str:
+    """勋章在站点内的稳定标识：优先使用勋章ID，否则使用规范化名称"""
+    medal_id = medal.get('medal_id')
+    if medal_id not in (None, ''):
+        return f"id:{medal_id}"
+    name = "".join(str(medal.get('name') or '').split()).lower()
+    return f"name:{name}" if name else ""
+
+
+def diff_medals(rows: Dict[str, Dict], medals: List[Dict], is_purchasable: Callable[[Dict], bool],
+                now: str, known_names: Optional[set] = None) -> Tuple[Dict[str, Dict], Dict[str, List[Any]]]:
+    """
+    对比站点勋章索引与本次抓取结果
+
+    :param rows: 站点已有索引 key -> 记录
+    :param medals: 本次抓取的勋章列表
+    :param is_purchasable: 判断勋章当前是否可购买
+    :param now: 当前时间字符串
+    :param known_names: 旧版历史记录中已出现过的勋章名称，用于迁移时避免误报上新
+    :return: (更新后的索引, 差异)，差异包含 new/removed/changed，changed 为 (勋章, {字段: (旧值, 新值)})
+    """
+    new_rows: Dict[str, Dict] = {}
+    diff: Dict[str, List[Any]] = {"new": [], "removed": [], "changed": []}
+
+    for medal in medals:
+        key = medal_key(medal)
+        if not key or key in new_rows:
+            continue
+        purchasable = is_purchasable(medal)
+        row = {
+            'name': medal.get('name', ''),
+            'medal_id': medal.get('medal_id', ''),
+            'price': medal.get('price', 0),
+            'stock': str(medal.get('stock', '') or ''),
+            'purchasable': purchasable,
+        }
+        old = rows.get(key)
+        if not old:
+            row['first_seen'] = now
+            row['last_seen'] = now
+            new_rows[key] = row
+            if purchasable and (known_names is None or medal.get('name', '') not in known_names):
+                diff["new"].append(medal)
+            continue
+
+        row['first_seen'] = old.get('first_seen', now)
+        changes = {field: (old.get(field), row[field]) for field in ('price', 'stock', 'purchasable')
+                   if old.get(field) != row[field]}
+        if changes:
+            row['last_seen'] = now
+            if purchasable and not old.get('purchasable'):
+                # 重新上架视为上新
+                diff["new"].append(medal)
+            else:
+                diff["changed"].append((medal, changes))
+        else:
+            row['last_seen'] = old.get('last_seen', now)
+        new_rows[key] = row
+
+    diff["removed"] = [row for key, row in rows.items() if key not in new_rows]
+    return new_rows, diff
@@ -1,22 +1,25 @@
 import re
-import time
-import base64
 import requests
 import pytz
 import traceback
 from pathlib import Path
-from lxml import etree
 from datetime import datetime, timedelta
 from typing import Any, List, Dict, Tuple, Optional
 from apscheduler.triggers.cron import CronTrigger
+from fastapi import Response
 
 from app.log import logger
 from app.core.config import settings
+from app.core.event import eventmanager
 from app.plugins import _PluginBase
 from app.scheduler import Scheduler
 from app.schemas import NotificationType
+from app.schemas.types import EventType
 from app.db.site_oper import SiteOper
 
+from .trend_store import TrendStore
+from .farm_engine import BatchExecutor, BatchTask, FarmEngine, FarmProfile, FarmRun, FarmRunner, RipeScheduler
+
 class PlayletFram(_PluginBase):
     # 插件名称
     plugin_name = "Vue-开心农场"
@@ -25,7 +28,7 @@ class PlayletFram(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/playletfram.png"
     # 插件版本
-    plugin_version = "1.1.0"
+    plugin_version = "1.1.12"
     # 插件作者
     plugin_author = "KoWming"
     # 作者主页
@@ -37,14 +40,9 @@ class PlayletFram(_PluginBase):
     # 可使用的用户级别
     auth_level = 2
     
-    # 排序使用的最大秒数
-    MAX_SORT_SECONDS = 99999999
-    
     # 默认配置常量
     DEFAULT_SITE_URL = "https://playlet.cc"
-    DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
     DEFAULT_CRON = "0 8 * * *"  # 默认每天早上8点执行
-    SCHEDULE_BUFFER_SECONDS = 120  # 智能调度缓冲时间(秒)，确保作物已成熟
 
     # 配置与状态
     _enabled: bool = False
@@ -59,17 +57,42 @@ class PlayletFram(_PluginBase):
     _use_proxy: bool = False   # 使用代理
     _retry_count: int = 3      # 重试次数
     _retry_interval: int = 5   # 重试间隔(秒)
-    
-    # 动态调度时间
-    _next_run_time: Optional[datetime] = None
+    _trend_retention_days: int = 90  # 价格历史保留天数
+    _trend_store: Optional[TrendStore] = None
     
     # 站点信息缓存
     _siteoper: Optional[SiteOper] = None
+    # 农场站点配置与通用引擎
+    _farm_profile = FarmProfile(
+        domain="playlet.cc",
+        site_name="Playlet",
+        default_url="https://playlet.cc",
+        images={
+            "小麦": "crop_wheat.png", "玉米": "crop_corn.png", "土豆": "crop_potato.png", "花生": "crop_peanut.png",
+            "鸡": "animal_chicken1.png", "猪": "animal_pig2.png", "牛": "animal_cow1.png", "羊": "animal_sheep.png"
+        },
+        warehouse_layout="column",
+        market_layout="column",
+        parse_subtitles=True
+    )
+    _engine: Optional[FarmEngine] = None
+    # 智能调度
+    _scheduler: Optional[RipeScheduler] = None
+    # 任务编排
+    _runner: Optional[FarmRunner] = None
     _site_url: str = ""
-    _user_agent: str = ""
 
     def __init__(self):
         super().__init__()
+        self._engine = FarmEngine(self._farm_profile, self.plugin_name, Path(__file__).parent)
+        self._scheduler = RipeScheduler(self.plugin_name)
+        self._runner = FarmRunner(self.plugin_name, self._engine, self._scheduler,
+                                  get_data=self.get_data, save_data=self.save_data,
+                                  update_job=lambda: Scheduler().update_plugin_job(self.__class__.__name__),
+                                  sell_all=self._sell_all, plant_all=self._plant_all,
+                                  fetch_data=lambda run: self.get_farm_data(force_record_trend=run.notify_always),
+                                  run_auto_plant=self._run_auto_plant, run_auto_sell=self._run_auto_sell,
+                                  run_expiry_sale=self._run_expiry_sale, send_message=self._send_message)
 
     @staticmethod
     def _to_bool(val: Any) -> bool:
@@ -133,6 +156,8 @@ class PlayletFram(_PluginBase):
                 self._use_proxy = self._to_bool(config.get("use_proxy", False))
                 self._retry_count = self._to_int(config.get("retry_count"), 3)
                 self._retry_interval = self._to_int(config.get("retry_interval"), 5)
+                self._trend_retention_days = max(1, self._to_int(config.get("trend_retention_days"), 90))
+                self._trend_store = None
                 
                 # 验证必需配置
                 if self._enabled and not self._cookie:
@@ -140,16 +165,19 @@ class PlayletFram(_PluginBase):
                     self._enabled = False
                 
             # 重置下次运行时间，确保重新调度
-            self._next_run_time = None
+            self._scheduler.reset()
+            self._runner.configure(enabled=self._enabled, notify=self._notify, auto_plant=self._auto_plant,
+                                   auto_sell=self._auto_sell, expiry_sale=self._expiry_sale_enabled)
+
+            self._engine.configure(self._cookie, use_proxy=self._use_proxy, retry_count=self._retry_count,
+                                   retry_interval=self._retry_interval, siteoper=self._siteoper)
 
             # 获取并缓存站点信息
             site_info = self._get_site_info()
             if site_info and site_info[0]:
                 self._site_url = site_info[0]
-                self._user_agent = site_info[1] if site_info[1] else self.DEFAULT_USER_AGENT
             else:
                 self._site_url = self.DEFAULT_SITE_URL
-                self._user_agent = self.DEFAULT_USER_AGENT
                 logger.warning(f"{self.plugin_name}: 未找到站点配置，使用默认值")
                 
             if not self._enabled:
@@ -272,6 +300,13 @@ class PlayletFram(_PluginBase):
                 "methods": ["POST"],
                 "auth": "bear",
                 "summary": "强制刷新农场数据"
+            },
+            {
+                "path": "/asset",
+                "endpoint": self._get_asset,
+                "methods": ["GET"],
+                "allow_anonymous": True,
+                "summary": "获取作物/动物图片"
             }
         ]
 
@@ -301,7 +336,8 @@ class PlayletFram(_PluginBase):
             "expiry_sale_enabled": self._expiry_sale_enabled,
             "use_proxy": self._use_proxy,
             "retry_count": self._retry_count,
-            "retry_interval": self._retry_interval
+            "retry_interval": self._retry_interval,
+            "trend_retention_days": self._trend_retention_days
         }
         return config
 
@@ -365,7 +401,7 @@ class PlayletFram(_PluginBase):
                      last_run = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                      self.save_data("farm_status", farm_status)
                      self.save_data("last_run", last_run)
-                     self._schedule_next_auto_run()
+                     self._runner.plan_next(new_data)
              except Exception as e:
                  logger.error(f"{self.plugin_name}: 自动刷新数据失败 - {e}")
 
@@ -376,10 +412,26 @@ class PlayletFram(_PluginBase):
             "next_run_time": next_run_time,
             "time_until_next": time_until_next,
             "task_status": task_status,
+            "assets": self._engine.asset_versions(),
             "farm_status": farm_status,
             "last_run": last_run
         }
 
+    def _get_asset(self, name: str, v: str = "") -> Response:
+        """API接口: 返回作物/动物图片，带版本号的请求可长期缓存"""
+        asset = self._engine.asset(name)
+        if not asset:
+            return Response(status_code=404, content="asset not found")
+        if v == asset.version:
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "public, max-age=86400"
+        return Response(
+            content=asset.content,
+            media_type=asset.media_type,
+            headers={"Cache-Control": cache_control, "ETag": f'"{asset.version}"'}
+        )
+
     def get_service(self) -> List[Dict[str, Any]]:
         """注册插件公共服务"""
         services = []
@@ -393,42 +445,31 @@ class PlayletFram(_PluginBase):
                 "kwargs": {}
             })
             
-        # 智能调度任务 (如果启用了自动化)
-        if self._enabled and (self._auto_plant or self._auto_sell or self._expiry_sale_enabled):
-            next_run = self._next_run_time
-            tz = pytz.timezone(settings.TZ)
-            
-            # 尝试从数据库恢复
-            if not next_run:
-                try:
-                    saved_next_run = self.get_data("next_run_time")
-                    if saved_next_run:
-                        next_run = datetime.strptime(saved_next_run, '%Y-%m-%d %H:%M:%S')
-                        if next_run.tzinfo is None:
-                            next_run = tz.localize(next_run)
-                            
-                        # 如果时间已过，稍后执行
-                        if next_run < datetime.now(tz=tz):
-                             next_run = datetime.now(tz=tz) + timedelta(seconds=10)
-                except Exception as e:
-                    logger.error(f"{self.plugin_name}: 恢复下次运行时间失败: {e}")
-
-            if not next_run:
-                next_run = datetime.now(tz=tz) + timedelta(seconds=5)
-                logger.info(f"{self.plugin_name}: 初始启动，将在5秒后执行智能调度")
-            else:
-                logger.info(f"{self.plugin_name}: 注册智能调度任务执行时间: {next_run}")
-
+        # 智能调度：在最近可操作的时间点唤醒
+        auto_run_date = self._runner.next_auto_run() if self._enabled and self._runner.auto_enabled else None
+        if auto_run_date:
             services.append({
                 "id": "playletfram_auto",
                 "name": "开心农场 - 智能调度",
                 "trigger": "date",
                 "func": self._auto_worker,
                 "kwargs": {
-                    "run_date": next_run
+                    "run_date": auto_run_date
                 }
             })
-            
+
+        # 补充任务：继续上次超时未完成的批量操作
+        if self.get_data("pending_actions"):
+            services.append({
+                "id": "playletfram_followup",
+                "name": "开心农场 - 补充任务",
+                "trigger": "date",
+                "func": self._runner.followup,
+                "kwargs": {
+                    "run_date": datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=60)
+                }
+            })
+
         return services
 
     def stop_service(self):
@@ -442,73 +483,39 @@ class PlayletFram(_PluginBase):
                 logger.warning(f"{self.plugin_name}: 移除调度任务失败 - {str(e)}")
             
             # 清理所有内部状态
-            self._next_run_time = None
+            self._scheduler.reset()
             self._site_url = ""
-            self._user_agent = ""
+            self._engine.close()
             
             logger.info(f"{self.plugin_name}: 插件服务已停止")
         except Exception as e:
             logger.error(f"{self.plugin_name} 停止服务失败: {str(e)}")
 
+    @eventmanager.register(EventType.SiteUpdated)
+    def site_updated(self, event):
+        """站点信息变更时刷新缓存的站点地址与UA"""
+        domain = (event.event_data or {}).get("domain") if event else None
+        self._engine.invalidate_site(domain)
+        self._site_url = self._engine.site_url
+
+    @eventmanager.register(EventType.SiteDeleted)
+    def site_deleted(self, event):
+        """站点删除时清除缓存的站点地址与UA"""
+        self._engine.invalidate_site()
+        self._site_url = self._engine.site_url
+
     def _get_site_info(self) -> Tuple[Optional[str], Optional[str]]:
-        try:
-            if not self._siteoper:
-                logger.warning("SiteOper 未初始化")
-                return None, None
-            
-            site = self._siteoper.get_by_domain('playlet.cc')
-            if not site:
-                logger.warning("未找到 Playlet 站点配置（playlet.cc），请在站点管理中添加")
-                return None, None
-            
-            site_url = site.url if hasattr(site, 'url') else None
-            user_agent = site.ua if hasattr(site, 'ua') else None
-            return site_url, user_agent
-        except Exception as e:
-            logger.error(f"获取站点信息失败: {str(e)}")
-            return None, None
+        return self._engine.site_info()
 
     def _farm_task(self):
         """定时任务"""
-        logger.info(f"{self.plugin_name} 定时任务开始执行")
-        self.save_data("last_run", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        logs = {'harvest': [], 'plant': [], 'sell': None, 'expiry_sell': []}
-        
-        try:
-            # 1. 自动种植/养殖 (包含收获)
-            if self._auto_plant:
-                plant_logs = self._run_auto_plant()
-                if plant_logs.get('harvest'):
-                    logs['harvest'].extend(plant_logs['harvest'])
-                if plant_logs.get('plant'):
-                    logs['plant'].extend(plant_logs['plant'])
-            
-            # 2. 自动出售
-            if self._auto_sell:
-                sell_logs = self._run_auto_sell()
-                if sell_logs:
-                    logs['sell'] = sell_logs
-
-            # 3. 临期自动出售
-            if self._expiry_sale_enabled:
-                expiry_logs = self._run_expiry_sale()
-                if expiry_logs:
-                    logs['expiry_sell'].extend(expiry_logs)
-
-            # 4. 更新状态数据
-            data = self.get_farm_data(force_record_trend=True)
-            if data:
-                self.save_data("farm_status", data)
-                
-            # 发送通知: 只要通知开启，就发送
-            if self._notify:
-                self._send_message(logs, data)
-                
-        except Exception as e:
-            logger.error(f"{self.plugin_name} 定时任务执行失败: {str(e)}")
+        self._runner.run("定时任务", notify_always=True)
 
-    def _run_auto_plant(self) -> Dict[str, List[str]]:
+    def _auto_worker(self):
+        """智能调度：在最近可操作的时间点执行自动化操作"""
+        self._runner.run("智能调度", notify_always=False)
+
+    def _run_auto_plant(self, run: FarmRun) -> Dict[str, List[str]]:
         """执行自动种植流程"""
         logs = {'harvest': [], 'plant': []}
         try:
@@ -561,7 +568,7 @@ class PlayletFram(_PluginBase):
             
         return logs
 
-    def _run_auto_sell(self) -> Dict[str, Any]:
+    def _run_auto_sell(self, run: FarmRun) -> Dict[str, Any]:
         """执行自动出售"""
         try:
             result = self._sell_all({"use_threshold": True})
@@ -573,7 +580,7 @@ class PlayletFram(_PluginBase):
              logger.error(f"{self.plugin_name}: 自动出售执行异常: {e}")
         return {}
 
-    def _run_expiry_sale(self) -> List[str]:
+    def _run_expiry_sale(self, run: FarmRun) -> List[str]:
         """执行临期出售"""
         msgs = []
         try:
@@ -610,399 +617,81 @@ class PlayletFram(_PluginBase):
             logger.error(f"{self.plugin_name}: 临期出售执行异常: {e}")
         return msgs
 
-    def _get_proxies(self):
-        """获取代理配置"""
-        return settings.PROXY if self._use_proxy else None
-
     def _request(self, url: str, method: str = "GET", data: dict = None, params: dict = None) -> Optional[requests.Response]:
         """发送请求"""
-        if not self._cookie:
-            logger.error(f"{self.plugin_name}: 未配置Cookie")
-            return None
-        
-        # 使用缓存的站点信息
-        headers = {
-            "cookie": self._cookie,
-            "referer": self._site_url or self.DEFAULT_SITE_URL,
-            "user-agent": self._user_agent or self.DEFAULT_USER_AGENT
-        }
-        
-        proxies = self._get_proxies()
-        
-        # 使用 for 循环优化重试逻辑
-        for attempt in range(self._retry_count + 1):
-            try:
-                # 统一请求处理
-                response = requests.request(
-                    method=method.upper(),
-                    url=url,
-                    headers=headers,
-                    data=data if method.upper() == "POST" else None,
-                    params=params if method.upper() == "GET" else None,
-                    proxies=proxies,
-                    timeout=30
-                )
-                
-                # 增强状态码处理
-                if response.status_code == 200:
-                    return response
-                elif response.status_code in [401, 403]:
-                    # 认证失败，不重试
-                    logger.error(f"{self.plugin_name}: 认证失败 (HTTP {response.status_code})，请检查Cookie是否有效")
-                    return None
-                else:
-                    logger.warning(f"{self.plugin_name}: HTTP {response.status_code} - {url}，重试 {attempt + 1}/{self._retry_count}")
-            
-            # 细化异常类型
-            except requests.exceptions.Timeout:
-                logger.warning(f"{self.plugin_name}: 请求超时 - {url}，重试 {attempt + 1}/{self._retry_count}")
-            except requests.exceptions.ConnectionError:
-                logger.warning(f"{self.plugin_name}: 连接失败 - {url}，重试 {attempt + 1}/{self._retry_count}")
-            except Exception as e:
-                logger.warning(f"{self.plugin_name}: 请求异常 - {url} - {str(e)}，重试 {attempt + 1}/{self._retry_count}")
-            
-            # 重试前等待
-            if attempt < self._retry_count:
-                time.sleep(self._retry_interval)
-        
-        logger.error(f"{self.plugin_name}: 请求失败 - {url}，已达到最大重试次数 {self._retry_count}")
-        return None
-    
-    def _get_image_base64(self, name: str) -> str:
-        """将本地图片转换为 base64 编码的 data URI"""
-        
-        name_to_file = {
-            "小麦": "crop_wheat.png",
-            "玉米": "crop_corn.png",
-            "土豆": "crop_potato.png",
-            "花生": "crop_peanut.png",
-            "鸡": "animal_chicken1.png",
-            "猪": "animal_pig2.png",
-            "牛": "animal_cow1.png",
-            "羊": "animal_sheep.png"
-        }
-        
-        filename = name_to_file.get(name)
-        if not filename:
-            return ""
-        
-        try:
-            # 获取图片文件路径
-            plugin_dir = Path(__file__).parent
-            image_path = plugin_dir / "dist" / "public" / filename
-            
-            if not image_path.exists():
-                logger.warning(f"图片文件不存在: {image_path}")
-                return ""
-            
-            # 读取图片并转换为 base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-                return f"data:image/png;base64,{base64_data}"
-        except Exception as e:
-            logger.error(f"转换图片为 base64 失败: {str(e)}")
-            return ""
-
-    def _parse_warehouse_table(self, table) -> List[Dict[str, Any]]:
-        """解析仓库表格数据"""
-        items = []
-        rows = table.xpath('.//tr[position()>1]')
-        for row in rows:
-            tds = row.xpath('.//td')
-            # 确保至少有4列 (图片, 名称, 数量, 时间, 操作)
-            if len(tds) < 4:
-                continue
-
-            name = tds[1].xpath('string(.)').strip()
-            quantity = tds[2].xpath('string(.)').strip()
-            remaining_time = tds[3].xpath('string(.)').strip()
-
-            item = {
-                "name": name,
-                "quantity": quantity,
-                "remaining_time": remaining_time,
-                "key": ""
-            }
-
-            link = row.xpath('.//a/@href')
-            if link:
-                match = re.search(r'key=([^&]+)', link[0])
-                if match:
-                    item["key"] = match.group(1)
-            
-            items.append(item)
-        return items
-
-    def _parse_farm_item(self, item_element, item_type="crop"):
-        """解析农场物品通用逻辑"""
-        data = {}
-        name_el = item_element.xpath('.//h3/text()')
-        data["name"] = name_el[0].strip() if name_el else "未知"
-        data["image"] = self._get_image_base64(data["name"])
-        
-        data["price"] = ""
-        data["grow_time"] = ""
-        data["double_chance"] = ""
-        data["valid_days"] = ""
-        
-        info_el = item_element.xpath('.//div[@class="item-info"]//p/text()')
-        for info in info_el:
-            info = info.strip()
-            if "价格:" in info:
-                data["price"] = info.replace("价格:", "").strip()
-            elif "成长时间:" in info:
-                data["grow_time"] = info.replace("成长时间:", "").strip()
-            elif "双倍收获:" in info or "概率" in info:
-                data["double_chance"] = info.replace("双倍收获:", "").strip()
-            elif "有效期:" in info:
-                data["valid_days"] = info.replace("有效期:", "").strip()
-        
-        status_el = item_element.xpath('.//p[contains(@class, "growing-status")]/text()')
-        if status_el:
-            data["status"] = status_el[0].strip()
-            if "剩余时间" in data["status"]:
-                data["remaining_time"] = data["status"].replace("剩余时间:", "").strip()
-                td = self._parse_timedelta(data["remaining_time"])
-                data["sort_seconds"] = td.total_seconds() if td else self.MAX_SORT_SECONDS
-            else:
-                data["sort_seconds"] = self.MAX_SORT_SECONDS
-            data["state"] = "growing"
-        else:
-            btn_el = item_element.xpath('.//a[contains(@class, "btn")]')
-            if btn_el:
-                btn_href = btn_el[0].get("href", "")
-                target_action = "plant" if item_type == "crop" else "breed"
-                
-                if f"action={target_action}" in btn_href:
-                    data["state"] = "empty"
-                    data["sort_seconds"] = self.MAX_SORT_SECONDS 
-                    match = re.search(r'id=(\d+)', btn_href)
-                    if match:
-                        data["id"] = match.group(1)
-                elif "action=harvest" in btn_href:
-                    data["state"] = "ripe"
-                    data["sort_seconds"] = -1
-                    match = re.search(r'id=(\d+)', btn_href)
-                    if match:
-                        data["id"] = match.group(1)
-                else:
-                    data["state"] = "unknown"
-                    data["sort_seconds"] = self.MAX_SORT_SECONDS
-            else:
-                data["state"] = "unknown"
-                data["sort_seconds"] = self.MAX_SORT_SECONDS
-                
-        return data
+        return self._engine.request(url, method=method, data=data, params=params)
+
+    def _get_trend_store(self) -> TrendStore:
+        """获取价格历史存储，首次使用时迁移旧版趋势数据"""
+        if not self._trend_store:
+            store = TrendStore(self.get_data_path() / "market_trends.db", retention_days=self._trend_retention_days)
+            legacy = self.get_data("market_trends")
+            if legacy:
+                if store.is_empty():
+                    count = store.import_legacy(legacy)
+                    logger.info(f"{self.plugin_name}: 已迁移 {count} 条旧版价格趋势记录")
+                self.del_data("market_trends")
+            self._trend_store = store
+        return self._trend_store
 
     def get_farm_data(self, force_record_trend: bool = False):
         """获取农场数据 (用于前端展示)
         :param force_record_trend: 是否强制记录价格趋势(定时任务调用时为True)
         """
-        site_url, _ = self._get_site_info()
-        if not site_url:
-            site_url = "https://playlet.cc"
-        url = f"{site_url}/magic_fram.php"
-        response = self._request(url)
-        if not response:
-            return None
-            
-        html = etree.HTML(response.text)
-        data = {
-           "bonus": "0",
-           "crops": [],
-           "animals": [],
-           "warehouse": [],
-           "market": [],
-           "crop_subtitle": "",
-           "animal_subtitle": ""
-        }
-        
+        data = self._engine.fetch_farm_data()
+        if data and data.get("market"):
+            self._analyze_market(data, force_record_trend)
+        return data
+
+    def _analyze_market(self, data: Dict[str, Any], force_record_trend: bool = False):
+        """记录价格趋势并计算市场价格波动"""
+        market_items = data["market"]
+
+        # --- 记录基础价格 (用于计算波动) ---
         try:
-            # 1. 获取火花
-            bonus_el = html.xpath('//div[contains(@class, "points-display")]/text()')
-            if bonus_el:
-                 data["bonus"] = bonus_el[0].replace("当前魔力值:", "").strip()
-
-            # 2. 遍历各个区域
-            sections = html.xpath('//div[contains(@class, "farm-section")]')
-            for section in sections:
-                title_el = section.xpath('.//h2/text()')
-                if not title_el:
-                    continue
-                title = title_el[0].strip()
-                
-                # 农作物种植区
-                if "农作物种植区" in title:
-                    subtitle_el = section.xpath('.//h2/small/text()')
-                    if subtitle_el:
-                        data["crop_subtitle"] = subtitle_el[0].strip()
-                    items = section.xpath('.//div[contains(@class, "farm-item")]')
-                    for item in items:
-                        data["crops"].append(self._parse_farm_item(item, "crop"))
-
-                # 动物养殖区
-                elif "动物养殖区" in title:
-                    subtitle_el = section.xpath('.//h2/small/text()')
-                    if subtitle_el:
-                        data["animal_subtitle"] = subtitle_el[0].strip()
-                    items = section.xpath('.//div[contains(@class, "farm-item")]')
-                    for item in items:
-                        data["animals"].append(self._parse_farm_item(item, "animal"))
-                        
-                # 仓库
-                elif "仓库" in title:
-                    warehouse_items = []
-                    table = section.xpath('.//table[@class="warehouse-table"]')
-                    if table:
-                        warehouse_items.extend(self._parse_warehouse_table(table[0]))
-                    
-                    # 检查分页并获取剩余数据
-                    try:
-                        pagination_info = section.xpath('.//div[@class="pagination-info"]/text()')
-                        if pagination_info:
-                            match = re.search(r'共\s*(\d+)', pagination_info[0])
-                            if match:
-                                total_pages = int(match.group(1))
-                                if total_pages > 1:
-                                    logger.info(f"{self.plugin_name}: 仓库共有 {total_pages} 页，开始获取剩余分页数据")
-                                    for page in range(2, total_pages + 1):
-                                        try:
-                                            page_url = f"{url}?sort=expire_asc&page={page}"
-                                            page_resp = self._request(page_url)
-                                            if page_resp:
-                                                page_html = etree.HTML(page_resp.text)
-                                                page_tables = page_html.xpath('//table[@class="warehouse-table"]')
-                                                if page_tables:
-                                                    items = self._parse_warehouse_table(page_tables[0])
-                                                    if items:
-                                                        warehouse_items.extend(items)
-                                                        logger.debug(f"{self.plugin_name}: 第 {page} 页获取到 {len(items)} 个物品")
-                                            
-                                            time.sleep(1)
-                                        except Exception as page_error:
-                                            logger.error(f"{self.plugin_name}: 获取第 {page} 页失败: {page_error}")
-                    except Exception as e:
-                        logger.error(f"{self.plugin_name}: 处理仓库分页异常: {e}")
-                    
-                    data["warehouse"] = warehouse_items
-                
-                # 菜市场
-                elif "菜市场" in title or "市场" in title:
-                    market_items = []
-                    categories = section.xpath('.//div[@class="market-category"]')
-                    for category in categories:
-                        category_title = category.xpath('.//h3/text()')
-                        item_type = "crop" if "农作物" in str(category_title) else "animal"
-                        rows = category.xpath('.//table[@class="market-table"]//tr[position()>1]')
-                        for row in rows:
-                            tds = row.xpath('.//td')
-                            if len(tds) >= 3:
-                                market_item = {
-                                    "name": tds[1].xpath('string(.)').strip(),
-                                    "price": tds[2].xpath('string(.)').strip(),
-                                    "type": item_type
-                                }
-                                market_items.append(market_item)
-                    
-                    data["market"] = market_items
-                    
-                    # --- 记录基础价格 (用于计算波动) ---
-                    try:
-                        # 1. 尝试读取持久化存储的成本价
-                        item_costs = self.get_data("item_costs") or {}
-                        
-                        # 2. 更新当前页面看到的成本价
-                        for c in data["crops"]:
-                            if c.get("name") and c.get("price"):
-                                item_costs[c["name"]] = c["price"]
-                        for a in data["animals"]:
-                            if a.get("name") and a.get("price"):
-                                item_costs[a["name"]] = a["price"]
-                                
-                        # 3. 保存回持久化存储
-                        self.save_data("item_costs", item_costs)
-                        
-                        cost_map = item_costs
-                    except Exception as e:
-                        logger.warning(f"{self.plugin_name}: 处理成本价缓存失败: {e}")
-                        cost_map = {}
-                    
-                    # --- 记录价格趋势 (滚动存储最近5个点) ---
-                    try:
-                         now_obj = datetime.now()
-                         current_time = now_obj.strftime('%m-%d %H:%M')
-                         
-                         market_trends = self.get_data("market_trends")
-                         if not market_trends:
-                             market_trends = {"data": {}}
-                         
-                         trend_data = market_trends.get("data", {})
-                         
-                         for m_item in market_items:
-                             name = m_item["name"]
-                             price = m_item["price"]
-                             
-                             if name not in trend_data:
-                                 trend_data[name] = []
-                             
-                             item_list = trend_data[name]
-                             should_append = False
-                             
-                             if not item_list:
-                                 should_append = True
-                             elif force_record_trend:
-                                  # 定时任务执行时强制记录
-                                  should_append = True
-
-                             else:
-                                  # 非定时任务: 仅价格变化时记录
-                                 last_item = item_list[-1]
-                                 last_price = last_item.get("price")
-                                 
-                                 if str(last_price) != str(price):
-                                     should_append = True
-                             if should_append:
-                                 item_list.append({
-                                     "time": current_time,
-                                     "price": price
-                                 })
-                                 
-                                 # 保持最多 5 个点
-                                 if len(item_list) > 5:
-                                     trend_data[name] = item_list[-5:]
-                             
-                             m_item["change_pct"] = 0
-                             history_len = len(item_list)
-                             if history_len >= 2:
-                                 current_price_float = float(price)
-                                 
-                                 if should_append:
-                                     prev_price = float(item_list[-2]["price"])
-                                     if prev_price > 0:
-                                         m_item["change_pct"] = round(((current_price_float - prev_price) / prev_price) * 100, 2)
-                                 else:
-                                     m_item["change_pct"] = 0
-
-                             if name in cost_map:
-                                 m_item["last_price"] = cost_map[name]
-                             else:
-                                 m_item["last_price"] = 0
-                                 
-                         market_trends["data"] = trend_data
-                         market_trends["update_time"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                         self.save_data("market_trends", market_trends)
-                         data["market_trends"] = market_trends
-                         
-                    except Exception as e:
-                        logger.error(f"{self.plugin_name}: 处理市场趋势失败: {str(e)}")
+            # 1. 尝试读取持久化存储的成本价
+            item_costs = self.get_data("item_costs") or {}
+
+            # 2. 更新当前页面看到的成本价
+            for c in data["crops"]:
+                if c.get("name") and c.get("price"):
+                    item_costs[c["name"]] = c["price_value"]
+            for a in data["animals"]:
+                if a.get("name") and a.get("price"):
+                    item_costs[a["name"]] = a["price_value"]
+
+            # 3. 保存回持久化存储
+            self.save_data("item_costs", item_costs)
 
+            cost_map = item_costs
         except Exception as e:
-            logger.error(f"{self.plugin_name} 解析数据失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.warning(f"{self.plugin_name}: 处理成本价缓存失败: {e}")
+            cost_map = {}
 
-        return data
+        # --- 记录价格趋势 ---
+        try:
+            prices = {}
+            for m_item in market_items:
+                prices[m_item["name"]] = m_item["price_value"]
+            trend_store = self._get_trend_store()
+            # 定时任务强制记录，页面访问仅在价格变化或超过记录间隔时写入
+            previous = trend_store.record(prices, force=force_record_trend)
+            price_stats = trend_store.stats(prices.keys(), days=7)
+            for m_item in market_items:
+                name = m_item["name"]
+                prev_price = previous.get(name)
+                m_item["change_pct"] = 0
+                if prev_price and prev_price > 0:
+                    m_item["change_pct"] = round(((prices[name] - prev_price) / prev_price) * 100, 2)
+                # 兼容旧版保存的带单位成本价
+                m_item["last_price"] = FarmEngine.parse_price(cost_map.get(name, 0))
+                m_item["price_stats"] = price_stats.get(name, {})
+            data["market_trends"] = {
+                "data": trend_store.series(prices.keys(), bucket="4h", points=5),
+                "update_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        except Exception as e:
+            logger.error(f"{self.plugin_name}: 处理市场趋势失败: {str(e)}")
 
     def harvest_all(self) -> Optional[str]:
         """一键收获
@@ -1087,149 +776,124 @@ class PlayletFram(_PluginBase):
                 "message": str(e)
             }
 
-    def _sell_all(self, payload: dict = None) -> dict:
-        """API: 一键出售"""
+    def _sell_all(self, payload: dict = None):
+        """一键出售：临期与高盈利物品优先，超时未出售的物品由补充任务继续"""
         if payload is None:
             payload = {}
 
         use_threshold = bool(payload.get("use_threshold", False))
-        
+        # 补充任务只处理上次剩余的物品
+        only_keys = set(payload.get("keys") or [])
+
         # 1. 获取最新仓库数据
         data = self.get_farm_data()
         if not data or "warehouse" not in data:
             return {"success": False, "msg": "获取仓库数据失败"}
-            
-        warehouse = data["warehouse"]
+
+        warehouse = list(data["warehouse"])
         if not warehouse:
-             return {"success": True, "msg": "仓库为空，无需出售"}
-        
-        success_count = 0
-        fail_count = 0
+            self._runner.defer("sell", payload, [])
+            return {"success": True, "msg": "仓库为空，无需出售"}
+
         skip_count = 0
-        success_items = []
-        fail_items = []
         skip_items = []
-        start_time = time.time()
-        timeout_limit = 30
-        
-        market_map = {}
+
+        # 构建市场价格映射 (用于盈利计算与出售排序)
+        market_map = {m["name"]: m for m in data.get("market", [])}
         min_profit = min(self._auto_sell_threshold, self._auto_sell_threshold_max)
         max_profit = max(self._auto_sell_threshold, self._auto_sell_threshold_max)
-        if use_threshold:
-            for m in data.get("market", []):
-                market_map[m["name"]] = m
 
-        # 2. 遍历出售
+        # 2. 筛选待出售物品
+        tasks = []
         for item in warehouse:
-            if time.time() - start_time > timeout_limit:
-                logger.warning(f"{self.plugin_name}: 一键出售执行超时，已中断。")
-                break
-                
             key = item.get("key")
             name = item.get("name")
-            
-            if not key:
+            if not key or (only_keys and key not in only_keys):
                 continue
-                
+
+            # 盈利百分比 (成本价在 get_farm_data 中已处理并存入 last_price)
+            profit_pct = FarmEngine.profit_pct(market_map.get(name))
+            # 自动出售盈利区间检查
             if use_threshold and name in market_map:
-                m_item = market_map[name]
-                try:
-                    price_str = re.sub(r'[^\d.]', '', str(m_item.get("price", "0")))
-                    current_price = float(price_str) if price_str else 0
-                    cost_str = str(m_item.get("last_price", "0"))
-                    if cost_str == "未知":
-                        cost_price = 0
-                    else:
-                        cost_price = float(cost_str)
-                    
-                    if cost_price > 0:
-                        profit_pct = (current_price - cost_price) / cost_price * 100
-                        if profit_pct < min_profit or profit_pct > max_profit:
-                            logger.info(f"{self.plugin_name}: {name} 盈利 {profit_pct:.2f}% 不在区间 {min_profit:.2f}%~{max_profit:.2f}%，跳过出售")
-                            skip_count += 1
-                            skip_items.append(name)
-                            continue
-                    else:
-                         logger.info(f"{self.plugin_name}: {name} 成本价未知，无法计算盈利，跳过出售")
-                         skip_count += 1
-                         skip_items.append(name)
-                         continue
-                except Exception as e:
-                    logger.warning(f"{self.plugin_name}: 计算 {name} 盈利出错: {e}，跳过出售")
+                if profit_pct is None:
+                    logger.info(f"{self.plugin_name}: {name} 成本价未知，无法计算盈利，跳过出售")
+                    skip_count += 1
+                    skip_items.append(name)
+                    continue
+                if profit_pct < min_profit or profit_pct > max_profit:
+                    logger.info(f"{self.plugin_name}: {name} 盈利 {profit_pct:.2f}% 不在区间 {min_profit:.2f}%~{max_profit:.2f}%，跳过出售")
                     skip_count += 1
                     skip_items.append(name)
                     continue
+            tasks.append(BatchTask(key=key, name=name, priority=FarmEngine.sell_priority(item, profit_pct)))
 
-            res = self._sell_item({"key": key})
-            if res and res.get("success"):
-                success_count += 1
-                success_items.append(name)
-                time.sleep(0.2)
-            else:
-                fail_count += 1
-                fail_items.append(name)
-                
-        msg = f"一键出售完成: 成功 {success_count} 个, 失败 {fail_count} 个"
+        # 3. 按优先级并发出售
+        report = BatchExecutor(self.plugin_name, deadline=30).run(
+            tasks, lambda task: bool((self._sell_item({"key": task.key}) or {}).get("success"))
+        )
+        self._runner.defer("sell", payload, [task.key for task in report.pending])
+
+        msg = f"一键出售完成: 成功 {len(report.succeeded)} 个, 失败 {len(report.failed)} 个"
         if skip_count > 0:
             msg += f", 跳过 {skip_count} 个(未达盈利阈值)"
-        if time.time() - start_time > timeout_limit:
-            msg += " (超时中断)"
-            
+        if report.pending:
+            msg += f", 剩余 {len(report.pending)} 个稍后继续出售"
+        logger.info(f"{self.plugin_name}: {msg} ({report.summary()})")
+
         return {
-            "success": True, 
+            "success": True,
             "msg": msg,
-            "success_count": success_count,
-            "fail_count": fail_count,
+            "success_count": len(report.succeeded),
+            "fail_count": len(report.failed),
             "skip_count": skip_count,
-            "success_items": success_items,
-            "fail_items": fail_items,
-            "skip_items": skip_items
+            "pending_count": len(report.pending),
+            "success_items": [task.name for task in report.succeeded],
+            "fail_items": [task.name for task in report.failed],
+            "skip_items": skip_items,
+            "throughput": report.throughput,
+            "completion": report.completion
         }
 
     def _plant_all(self, payload: dict = None):
-        """API: 一键种植/养殖"""
+        """API: 一键种植/养殖，超时未处理的位置由补充任务继续"""
         if payload is None:
             payload = {}
-        
+
         item_type = payload.get('type', '')
         if item_type not in ['crop', 'animal']:
-             return {"success": False, "msg": "参数 type 错误 (crop/animal)"}
-        
+            return {"success": False, "msg": "参数 type 错误 (crop/animal)"}
+
         type_cn = "种植" if item_type == "crop" else "养殖"
+        only_keys = set(payload.get("keys") or [])
 
         # 1. 获取最新农场数据
         data = self.get_farm_data()
         if not data:
             return {"success": False, "msg": "获取农场数据失败"}
-        
+
         items = data.get("crops", []) if item_type == "crop" else data.get("animals", [])
         if not items:
             return {"success": True, "msg": f"{type_cn}区数据为空"}
-            
-        success_count = 0
-        fail_count = 0
-        start_time = time.time()
-        timeout_limit = 25
-        
-        # 2. 遍历种植
-        for item in items:
-            if time.time() - start_time > timeout_limit:
-                logger.warning(f"{self.plugin_name}: 一键{type_cn}执行超时，已中断。")
-                break
-
-            if item.get("state") == "empty":
-                item_id = item.get("id")
-                if item_id:
-                     if self.plant(item_type, item_id):
-                         success_count += 1
-                         logger.info(f"{self.plugin_name}: 自动{type_cn} {item.get('name')} 成功")
-                         time.sleep(0.5)
-                     else:
-                         fail_count += 1
-                         logger.warning(f"{self.plugin_name}: 自动{type_cn} {item.get('name')} 失败")
-        
+
+        # 2. 按位置顺序并发种植
+        tasks = [
+            BatchTask(key=str(item["id"]), name=item.get("name", ""), priority=(index,))
+            for index, item in enumerate(items)
+            if item.get("state") == "empty" and item.get("id") and (not only_keys or str(item["id"]) in only_keys)
+        ]
+
+        def _plant(task: BatchTask) -> bool:
+            if self.plant(item_type, task.key):
+                logger.info(f"{self.plugin_name}: 自动{type_cn} {task.name} 成功")
+                return True
+            logger.warning(f"{self.plugin_name}: 自动{type_cn} {task.name} 失败")
+            return False
+
+        report = BatchExecutor(self.plugin_name).run(tasks, _plant)
+        self._runner.defer(f"plant_{item_type}", payload, [task.key for task in report.pending])
+
         # 刷新数据
-        if success_count > 0:
+        if report.succeeded:
             try:
                 new_data = self.get_farm_data()
                 if new_data:
@@ -1238,17 +902,22 @@ class PlayletFram(_PluginBase):
             except Exception as e:
                 logger.error(f"{self.plugin_name}: 刷新数据失败 - {e}")
 
-        msg = f"一键{type_cn}完成: 成功 {success_count} 个, 失败 {fail_count} 个"
-        if time.time() - start_time > timeout_limit:
-            msg += " (超时中断)"
-            
+        msg = f"一键{type_cn}完成: 成功 {len(report.succeeded)} 个, 失败 {len(report.failed)} 个"
+        if report.pending:
+            msg += f", 剩余 {len(report.pending)} 个稍后继续"
+        if tasks:
+            logger.info(f"{self.plugin_name}: {msg} ({report.summary()})")
+
         return {
-            "success": True, 
+            "success": True,
             "msg": msg,
-            "success_count": success_count,
-            "fail_count": fail_count
+            "success_count": len(report.succeeded),
+            "fail_count": len(report.failed),
+            "pending_count": len(report.pending),
+            "throughput": report.throughput,
+            "completion": report.completion
         }
-    
+
     def _save_config(self, config_payload: dict):
         """API: 保存配置"""
         logger.info(f"{self.plugin_name}: _save_config 接收到 payload: {config_payload}")
@@ -1267,6 +936,7 @@ class PlayletFram(_PluginBase):
             self._use_proxy = self._to_bool(config_payload.get("use_proxy", self._use_proxy))
             self._retry_count = self._to_int(config_payload.get("retry_count"), self._retry_count)
             self._retry_interval = self._to_int(config_payload.get("retry_interval"), self._retry_interval)
+            self._trend_retention_days = max(1, self._to_int(config_payload.get("trend_retention_days"), self._trend_retention_days))
 
             config_to_save = {
                 "enabled": self._enabled,
@@ -1280,7 +950,8 @@ class PlayletFram(_PluginBase):
                 "expiry_sale_enabled": self._expiry_sale_enabled,
                 "use_proxy": self._use_proxy,
                 "retry_count": self._retry_count,
-                "retry_interval": self._retry_interval
+                "retry_interval": self._retry_interval,
+                "trend_retention_days": self._trend_retention_days
             }
             
             self.update_config(config_to_save)
@@ -1691,163 +1362,3 @@ class PlayletFram(_PluginBase):
             logger.info(f"{self.plugin_name}: 发送通知成功")
         except Exception as e:
             logger.error(f"{self.plugin_name}: 发送通知失败: {str(e)}")
-
-    def _parse_timedelta(self, time_str: str) -> Optional[timedelta]:
-        """解析剩余时间字符串为 timedelta"""
-        if not time_str:
-            return None
-        
-        try:
-            if ":" in time_str:
-                parts = time_str.split(":")
-                if len(parts) == 3:
-                    h, m, s = map(int, parts)
-                    return timedelta(hours=h, minutes=m, seconds=s)
-                elif len(parts) == 2:
-                    m, s = map(int, parts)
-                    return timedelta(minutes=m, seconds=s)
-
-            days = 0
-            hours = 0
-            minutes = 0
-            seconds = 0
-            
-            if "天" in time_str:
-                match = re.search(r'(\d+)天', time_str)
-                if match: days = int(match.group(1))
-            if "小时" in time_str:
-                match = re.search(r'(\d+)小时', time_str)
-                if match: hours = int(match.group(1))
-            if "分" in time_str:
-                match = re.search(r'(\d+)分', time_str)
-                if match: minutes = int(match.group(1))
-            if "秒" in time_str:
-                match = re.search(r'(\d+)秒', time_str)
-                if match: seconds = int(match.group(1))
-                
-            if days > 0 or hours > 0 or minutes > 0 or seconds > 0:
-                return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
-                
-            return None
-        except Exception as e:
-            logger.error(f"{self.plugin_name}: 解析时间字符串失败 '{time_str}': {e}")
-            return None
-
-    def _auto_worker(self, *args, **kwargs):
-        """智能自动化任务（动态调度）"""
-        logger.info(f"{self.plugin_name}: 开始执行智能自动化任务")
-        
-        # 1. 执行自动化操作
-        logs = {'harvest': [], 'plant': [], 'sell': None, 'expiry_sell': []}
-        try:
-            # 自动种植/养殖 (包含收获)
-            if self._auto_plant:
-                plant_logs = self._run_auto_plant()
-                if plant_logs.get('harvest'):
-                    logs['harvest'].extend(plant_logs['harvest'])
-                if plant_logs.get('plant'):
-                    logs['plant'].extend(plant_logs['plant'])
-            
-            # 自动出售
-            if self._auto_sell:
-                sell_logs = self._run_auto_sell()
-                if sell_logs:
-                    logs['sell'] = sell_logs
-            
-            # 临期自动出售
-            if self._expiry_sale_enabled:
-                 expiry_logs = self._run_expiry_sale()
-                 if expiry_logs:
-                     logs['expiry_sell'].extend(expiry_logs)
-                     
-        except Exception as e:
-            logger.error(f"{self.plugin_name}: 智能自动化任务执行异常: {e}")
-
-        # 发送通知
-        if self._notify and any(logs.values()):
-             data = self.get_farm_data()
-             self._send_message(logs, data)
-
-        # 2. 调度下一次执行
-        self._schedule_next_auto_run()
-
-    def reregister_plugin(self):
-        """重新注册插件任务"""
-        logger.info(f"{self.plugin_name}: 重新注册插件任务")
-        Scheduler().update_plugin_job(self.__class__.__name__)
-
-    def _schedule_next_auto_run(self):
-        """计算并注册下一次智能执行时间"""
-        # 检查自动化功能是否启用
-        if not (self._auto_plant or self._auto_sell or self._expiry_sale_enabled):
-            logger.debug(f"{self.plugin_name}: 自动化功能未启用，跳过智能调度")
-            self._next_run_time = None
-            return
-
-        try:
-            # 获取最新数据
-            data = self.get_farm_data()
-            if not data:
-                # 增加重试机制：数据获取失败时,5分钟后重试
-                logger.warning(f"{self.plugin_name}: 获取数据失败，5分钟后重试")
-                fallback_time = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(minutes=5)
-                self._next_run_time = fallback_time
-                self.save_data("next_run_time", fallback_time.strftime('%Y-%m-%d %H:%M:%S'))
-                self.reregister_plugin()
-                return
-            else:
-                # 刷新缓存，确保前端显示最新状态
-                self.save_data("farm_status", data)
-                self.save_data("last_run", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                
-                min_seconds = None
-                
-                # 遍历作物和动物，找最小剩余时间
-                items = (data.get("crops", []) or []) + (data.get("animals", []) or [])
-
-                valid_seconds = []
-                has_ripe_or_empty = False
-                
-                for item in items:
-                    state = item.get("state")
-                    sort_sec = item.get("sort_seconds", self.MAX_SORT_SECONDS)
-                    
-                    if state == "ripe":
-                        has_ripe_or_empty = True
-                        valid_seconds.append(0)
-                    elif state == "empty":
-                         has_ripe_or_empty = True
-                         valid_seconds.append(10)
-                    elif state == "growing":
-                        if sort_sec < self.MAX_SORT_SECONDS:
-                            valid_seconds.append(sort_sec)
-                
-                if valid_seconds:
-                    min_seconds = min(valid_seconds)
-                elif has_ripe_or_empty:
-                    min_seconds = 10 
-                
-                if min_seconds is not None:
-                    # 使用缓冲时间确保作物已成熟
-                    wait_seconds = max(10, min_seconds + self.SCHEDULE_BUFFER_SECONDS)
-                    next_run = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=wait_seconds)
-                    logger.info(
-                        f"{self.plugin_name}: 检测到最近成熟时间为 {int(min_seconds)} 秒后 "
-                        f"(+{self.SCHEDULE_BUFFER_SECONDS}秒缓冲)，下一次智能调度时间: {next_run.strftime('%Y-%m-%d %H:%M:%S')}"
-                    )
-                else:
-                    # 无紧急任务，5分钟后再检测
-                    wait_seconds = 300
-                    next_run = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=wait_seconds)
-                    logger.info(f"{self.plugin_name}: 当前无紧急任务，将在 {wait_seconds} 秒后再次检测")
-
-            # 更新下一次运行时间
-            if next_run:
-                self._next_run_time = next_run
-                # 持久化保存
-                self.save_data("next_run_time", next_run.strftime('%Y-%m-%d %H:%M:%S'))
-                # 重新注册插件以更新任务
-                self.reregister_plugin()
-            
-        except Exception as e:
-            logger.error(f"{self.plugin_name}: 调度下一次任务失败: {e}")
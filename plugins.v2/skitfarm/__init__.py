@@ -1,20 +1,24 @@
 import re
-import time
-import base64
 import requests
+import pytz
 from pathlib import Path
-from lxml import etree
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, List, Dict, Tuple, Optional
 from apscheduler.triggers.cron import CronTrigger
+from fastapi import Response
 
 from app.log import logger
 from app.core.config import settings
+from app.core.event import eventmanager
 from app.plugins import _PluginBase
 from app.scheduler import Scheduler
 from app.schemas import NotificationType
+from app.schemas.types import EventType
 from app.db.site_oper import SiteOper
 
+from .trend_store import TrendStore
+from .farm_engine import BatchExecutor, BatchTask, FarmEngine, FarmProfile, FarmRun, FarmRunner, RipeScheduler
+
 class SkitFarm(_PluginBase):
     # 插件名称
     plugin_name = "Vue-拾刻农场"
@@ -23,7 +27,7 @@ class SkitFarm(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/skitfarm.png"
     # 插件版本
-    plugin_version = "1.1.0"
+    plugin_version = "1.1.12"
     # 插件作者
     plugin_author = "KoWming"
     # 作者主页
@@ -48,11 +52,40 @@ class SkitFarm(_PluginBase):
     _use_proxy: bool = False   # 使用代理
     _retry_count: int = 3      # 重试次数
     _retry_interval: int = 5   # 重试间隔(秒)
+    _trend_retention_days: int = 90  # 价格历史保留天数
+    _trend_store: Optional[TrendStore] = None
     
     _siteoper = None
+    # 农场站点配置与通用引擎
+    _farm_profile = FarmProfile(
+        domain="ptskit.org",
+        site_name="拾刻",
+        default_url="https://www.ptskit.org",
+        page="magic_farm.php",
+        images={
+            "小麦": "小麦.webp", "玉米": "玉米.webp", "土豆": "土豆.webp", "花生": "花生.webp",
+            "鸡": "鸡.webp", "猪": "猪.webp", "牛": "牛.webp", "羊": "羊.webp"
+        },
+        warehouse_layout="batch",
+        parse_market_refresh=True
+    )
+    _engine: Optional[FarmEngine] = None
+    # 智能调度
+    _scheduler: Optional[RipeScheduler] = None
+    # 任务编排
+    _runner: Optional[FarmRunner] = None
 
     def __init__(self):
         super().__init__()
+        self._engine = FarmEngine(self._farm_profile, self.plugin_name, Path(__file__).parent)
+        self._scheduler = RipeScheduler(self.plugin_name)
+        self._runner = FarmRunner(self.plugin_name, self._engine, self._scheduler,
+                                  get_data=self.get_data, save_data=self.save_data,
+                                  update_job=lambda: Scheduler().update_plugin_job(self.__class__.__name__),
+                                  sell_all=self._sell_all, plant_all=self._plant_all,
+                                  fetch_data=lambda run: self.get_farm_data(),
+                                  run_auto_plant=self._run_auto_plant, run_auto_sell=self._run_auto_sell,
+                                  run_expiry_sale=self._run_expiry_sale, send_message=self._send_message)
 
     @staticmethod
     def _to_bool(val: Any) -> bool:
@@ -98,13 +131,23 @@ class SkitFarm(_PluginBase):
                 self._use_proxy = self._to_bool(config.get("use_proxy", False))
                 self._retry_count = self._to_int(config.get("retry_count"), 3)
                 self._retry_interval = self._to_int(config.get("retry_interval"), 5)
+                self._trend_retention_days = max(1, self._to_int(config.get("trend_retention_days"), 90))
+                self._trend_store = None
                 
+            # 重置下次运行时间，确保重新调度
+            self._scheduler.reset()
+            self._runner.configure(enabled=self._enabled, notify=self._notify, auto_plant=self._auto_plant,
+                                   auto_sell=self._auto_sell, expiry_sale=self._expiry_sale_enabled)
+
+            self._engine.configure(self._cookie, use_proxy=self._use_proxy, retry_count=self._retry_count,
+                                   retry_interval=self._retry_interval, siteoper=self._siteoper)
+
             # 初始化站点URL
             site_info = self._get_site_info()
             if site_info and site_info[0]:
                 self._site_url = site_info[0]
             else:
-                self._site_url = "https://www.ptskit.org"
+                self._site_url = self._farm_profile.default_url
                 logger.warning(f"{self.plugin_name}: 未找到站点配置，使用默认URL: {self._site_url}")
                 
             if not self._enabled:
@@ -225,6 +268,13 @@ class SkitFarm(_PluginBase):
                 "methods": ["POST"],
                 "auth": "bear",
                 "summary": "强制刷新农场数据"
+            },
+            {
+                "path": "/asset",
+                "endpoint": self._get_asset,
+                "methods": ["GET"],
+                "allow_anonymous": True,
+                "summary": "获取作物/动物图片"
             }
         ]
 
@@ -254,7 +304,8 @@ class SkitFarm(_PluginBase):
             "expiry_sale_enabled": self._expiry_sale_enabled,
             "use_proxy": self._use_proxy,
             "retry_count": self._retry_count,
-            "retry_interval": self._retry_interval
+            "retry_interval": self._retry_interval,
+            "trend_retention_days": self._trend_retention_days
         }
         return config
 
@@ -309,10 +360,26 @@ class SkitFarm(_PluginBase):
             "next_run_time": next_run_time,
             "time_until_next": time_until_next,
             "task_status": task_status,
+            "assets": self._engine.asset_versions(),
             "farm_status": self.get_data("farm_status"),
             "last_run": self.get_data("last_run")
         }
 
+    def _get_asset(self, name: str, v: str = "") -> Response:
+        """API接口: 返回作物/动物图片，带版本号的请求可长期缓存"""
+        asset = self._engine.asset(name)
+        if not asset:
+            return Response(status_code=404, content="asset not found")
+        if v == asset.version:
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "public, max-age=86400"
+        return Response(
+            content=asset.content,
+            media_type=asset.media_type,
+            headers={"Cache-Control": cache_control, "ETag": f'"{asset.version}"'}
+        )
+
     def get_service(self) -> List[Dict[str, Any]]:
         """注册插件公共服务"""
         services = []
@@ -326,78 +393,68 @@ class SkitFarm(_PluginBase):
                 "kwargs": {}
             })
             
+        # 智能调度：在最近可操作的时间点唤醒
+        auto_run_date = self._runner.next_auto_run() if self._enabled and self._runner.auto_enabled else None
+        if auto_run_date:
+            services.append({
+                "id": "skitfarm_auto",
+                "name": "拾刻农场 - 智能调度",
+                "trigger": "date",
+                "func": self._auto_worker,
+                "kwargs": {
+                    "run_date": auto_run_date
+                }
+            })
+
+        # 补充任务：继续上次超时未完成的批量操作
+        if self.get_data("pending_actions"):
+            services.append({
+                "id": "skitfarm_followup",
+                "name": "拾刻农场 - 补充任务",
+                "trigger": "date",
+                "func": self._runner.followup,
+                "kwargs": {
+                    "run_date": datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=60)
+                }
+            })
+
         return services
 
     def stop_service(self):
         """停止服务"""
         try:
             Scheduler().remove_plugin_job(self.__class__.__name__.lower())
+            self._scheduler.reset()
+            self._engine.close()
             logger.info(f"{self.plugin_name}: 插件服务已停止")
         except Exception as e:
             logger.debug(f"{self.plugin_name} 停止服务失败: {str(e)}")
 
+    @eventmanager.register(EventType.SiteUpdated)
+    def site_updated(self, event):
+        """站点信息变更时刷新缓存的站点地址与UA"""
+        domain = (event.event_data or {}).get("domain") if event else None
+        self._engine.invalidate_site(domain)
+        self._site_url = self._engine.site_url
+
+    @eventmanager.register(EventType.SiteDeleted)
+    def site_deleted(self, event):
+        """站点删除时清除缓存的站点地址与UA"""
+        self._engine.invalidate_site()
+        self._site_url = self._engine.site_url
+
     def _get_site_info(self) -> Tuple[Optional[str], Optional[str]]:
-        try:
-            if not self._siteoper:
-                logger.warning("SiteOper 未初始化")
-                return None, None
-            
-            site = self._siteoper.get_by_domain('ptskit.org')
-            
-            if not site:
-                logger.warning("未找到拾刻站点配置（ptskit.org），请在站点管理中添加")
-                return None, None
-            
-            site_url = site.url if hasattr(site, 'url') else None
-            user_agent = site.ua if hasattr(site, 'ua') else None
-            
-            return site_url, user_agent
-            
-        except Exception as e:
-            logger.error(f"获取站点信息失败: {str(e)}")
-            return None, None
+        return self._engine.site_info()
 
     def _farm_task(self):
         """定时任务"""
-        logger.info(f"{self.plugin_name} 定时任务开始执行")
-        self.save_data("last_run", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        logs = {'harvest': [], 'plant': [], 'sell': None, 'expiry_sell': []}
-        
-        try:
-            # 1. 自动种植/养殖 (包含收获)
-            if self._auto_plant:
-                plant_logs = self._run_auto_plant()
-                if plant_logs.get('harvest'):
-                    logs['harvest'].extend(plant_logs['harvest'])
-                if plant_logs.get('plant'):
-                    logs['plant'].extend(plant_logs['plant'])
-            
-            # 2. 自动出售
-            if self._auto_sell:
-                sell_logs = self._run_auto_sell()
-                if sell_logs:
-                    logs['sell'] = sell_logs
-
-            # 3. 临期自动出售
-            if self._expiry_sale_enabled:
-                expiry_logs = self._run_expiry_sale()
-                if expiry_logs:
-                    logs['expiry_sell'].extend(expiry_logs)
-
-            # 4. 更新状态数据
-            data = self.get_farm_data()
-            if data:
-                self.save_data("farm_status", data)
-                
-            # 发送通知: 只要通知开启，就发送 (包含由 logs 决定的任务日志 和 farm_data 决定的状态报告)
-            if self._notify:
-                self._send_message(logs, data)
-                
-        except Exception as e:
-            logger.error(f"{self.plugin_name} 定时任务执行失败: {str(e)}")
+        self._runner.run("定时任务", notify_always=True)
 
-    def _run_auto_plant(self) -> Dict[str, List[str]]:
+    def _auto_worker(self):
+        """智能调度：在最近可操作的时间点执行自动化操作"""
+        self._runner.run("智能调度", notify_always=False)
+
+    def _run_auto_plant(self, run: FarmRun) -> Dict[str, List[str]]:
         """执行自动种植流程"""
         logs = {'harvest': [], 'plant': []}
         try:
@@ -451,7 +508,7 @@ class SkitFarm(_PluginBase):
             
         return logs
 
-    def _run_auto_sell(self) -> Dict[str, Any]:
+    def _run_auto_sell(self, run: FarmRun) -> Dict[str, Any]:
         """执行自动出售"""
         try:
             result = self._sell_all({"use_threshold": True})
@@ -463,7 +520,7 @@ class SkitFarm(_PluginBase):
              logger.error(f"{self.plugin_name}: 自动出售执行异常: {e}")
         return {}
 
-    def _run_expiry_sale(self) -> List[str]:
+    def _run_expiry_sale(self, run: FarmRun) -> List[str]:
         """执行临期出售"""
         msgs = []
         try:
@@ -502,413 +559,77 @@ class SkitFarm(_PluginBase):
             logger.error(f"{self.plugin_name}: 临期出售执行异常: {e}")
         return msgs
 
-    def _get_proxies(self):
-        """获取代理配置"""
-        return settings.PROXY if self._use_proxy else None
-
     def _request(self, url: str, method: str = "GET", data: dict = None, params: dict = None) -> Optional[requests.Response]:
         """发送请求"""
-        try:
-            if not self._cookie:
-                logger.error(f"{self.plugin_name}: 未配置Cookie")
-                return None
-            
-            site_url, user_agent = self._get_site_info()
-            
-            if not site_url:
-                site_url = "https://www.ptskit.org"
-                logger.warning(f"未找到站点配置，使用默认URL: {site_url}")
-            
-            if not user_agent:
-                user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
-                logger.warning("未找到站点UA配置，使用默认UA")
-                
-            headers = {
-                "cookie": self._cookie,
-                "referer": site_url,
-                "user-agent": user_agent
-            }
-            
-            proxies = self._get_proxies()
-            
-            retry_count = 0
-            max_retries = self._retry_count
-            
-            while retry_count <= max_retries:
-                try:
-                    if method.upper() == "POST":
-                        response = requests.post(url, headers=headers, params=params, data=data, proxies=proxies, timeout=30)
-                    else:
-                        response = requests.get(url, headers=headers, params=params, proxies=proxies, timeout=30)
-                        
-                    if response.status_code == 200:
-                        return response
-                    else:
-                        logger.warning(f"{self.plugin_name}: 请求失败 {url} - {response.status_code}，重试 {retry_count + 1}/{max_retries}")
-                except Exception as e:
-                    logger.warning(f"{self.plugin_name}: 请求异常 {url} - {str(e)}，重试 {retry_count + 1}/{max_retries}")
-                
-                retry_count += 1
-                if retry_count <= max_retries:
-                    time.sleep(self._retry_interval)
-            
-            logger.error(f"{self.plugin_name}: 请求失败，已达到最大重试次数")
-            return None
-        except Exception as e:
-            logger.error(f"{self.plugin_name}: 请求异常 {url} - {str(e)}")
-            return None
-    
-    def _get_image_base64(self, name: str) -> str:
-        """将本地图片转换为 base64 编码的 data URI"""
-        
-        name_to_file = {
-            "小麦": "小麦.webp",
-            "玉米": "玉米.webp",
-            "土豆": "土豆.webp",
-            "花生": "花生.webp",
-            "鸡": "鸡.webp",
-            "猪": "猪.webp",
-            "牛": "牛.webp",
-            "羊": "羊.webp"
-        }
-        
-        filename = name_to_file.get(name)
-        if not filename:
-            return ""
-        
-        try:
-            # 获取图片文件路径
-            plugin_dir = Path(__file__).parent
-            image_path = plugin_dir / "dist" / "public" / filename
-            
-            if not image_path.exists():
-                logger.warning(f"图片文件不存在: {image_path}")
-                return ""
-            
-            # 读取图片并转换为 base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-                return f"data:image/webp;base64,{base64_data}"
-        except Exception as e:
-            logger.error(f"转换图片为 base64 失败: {str(e)}")
-            return ""
-
-    def _parse_warehouse_table(self, table) -> List[Dict[str, Any]]:
-        """解析仓库表格数据"""
-        items = []
-        rows = table.xpath('.//tr[position()>1]')
-        for row in rows:
-            tds = row.xpath('./td')
-            cells = [" ".join(td.xpath('.//text()')).strip() for td in tds]
-            link = row.xpath('.//a[contains(@class, "sell-btn")]/@href') or row.xpath('.//a/@href')
-            
-            if len(cells) >= 8:
-                item = {
-                    "name": cells[1].strip(),
-                    "quantity": cells[2].strip(),
-                    "harvest_time": cells[3].strip(),
-                    "expire_time": cells[4].strip(),
-                    "remaining_time": cells[4].strip(),
-                    "unit_price": cells[5].strip(),
-                    "total_value": cells[6].strip(),
-                    "key": ""
-                }
-            elif len(cells) >= 4:
-                item = {
-                    "name": cells[0].strip(),
-                    "quantity": cells[1].strip(),
-                    "harvest_time": cells[2].strip(),
-                    "expire_time": cells[3].strip(),
-                    "remaining_time": cells[3].strip(),
-                    "unit_price": "",
-                    "total_value": "",
-                    "key": ""
-                }
-            else:
-                continue
-                
-            # 优先从批量出售复选框提取 key，兼容单个出售链接
-            checkbox_value = row.xpath('.//input[@name="batch_keys[]"]/@value')
-            if checkbox_value:
-                item["key"] = checkbox_value[0]
-            elif link:
-                match = re.search(r'key=([^&]+)', link[0])
-                if match:
-                    item["key"] = match.group(1)
-            
-            items.append(item)
-        return items
-
-    def _parse_farm_item(self, item_element, item_type="crop"):
-        """解析农场物品通用逻辑"""
-        data = {}
-        # 名称
-        name_el = item_element.xpath('.//h3/text()')
-        data["name"] = name_el[0].strip() if name_el else "未知"
-        # 图片
-        data["image"] = self._get_image_base64(data["name"])
-        
-        # 详细信息
-        data["price"] = ""
-        data["grow_time"] = ""
-        data["double_chance"] = ""
-        data["valid_days"] = ""
-        
-        info_el = item_element.xpath('.//div[@class="item-info"]//p/text()')
-        for info in info_el:
-            info = info.strip()
-            if "价格:" in info:
-                data["price"] = info.replace("价格:", "").strip()
-            elif "成长时间:" in info:
-                data["grow_time"] = info.replace("成长时间:", "").strip()
-            elif "双倍收获:" in info or "概率" in info:
-                data["double_chance"] = info.replace("双倍收获:", "").strip()
-            elif "有效期:" in info:
-                data["valid_days"] = info.replace("有效期:", "").strip()
-        
-        # 状态
-        status_el = item_element.xpath('.//p[contains(@class, "growing-status")]/text()')
-        if status_el:
-            data["status"] = status_el[0].strip()
-            # 提取纯剩余时间
-            if "剩余时间" in data["status"]:
-                data["remaining_time"] = data["status"].replace("剩余时间:", "").strip()
-            data["state"] = "growing"
-        else:
-            btn_el = item_element.xpath('.//a[contains(@class, "btn")]')
-            if btn_el:
-                btn_href = btn_el[0].get("href", "")
-                target_action = "plant" if item_type == "crop" else "breed"
-                
-                if f"action={target_action}" in btn_href:
-                    data["state"] = "empty"
-                    match = re.search(r'id=(\d+)', btn_href)
-                    if match:
-                        data["id"] = match.group(1)
-                elif "action=harvest" in btn_href:
-                    data["state"] = "ripe"
-                    match = re.search(r'id=(\d+)', btn_href)
-                    if match:
-                        data["id"] = match.group(1)
-                else:
-                    data["state"] = "unknown"
-            else:
-                data["state"] = "unknown"
-                
-        return data
+        return self._engine.request(url, method=method, data=data, params=params)
+
+    def _get_trend_store(self) -> TrendStore:
+        """获取价格历史存储，首次使用时迁移旧版趋势数据"""
+        if not self._trend_store:
+            store = TrendStore(self.get_data_path() / "market_trends.db", retention_days=self._trend_retention_days)
+            legacy = self.get_data("market_trends")
+            if legacy:
+                if store.is_empty():
+                    count = store.import_legacy(legacy)
+                    logger.info(f"{self.plugin_name}: 已迁移 {count} 条旧版价格趋势记录")
+                self.del_data("market_trends")
+            self._trend_store = store
+        return self._trend_store
 
     def get_farm_data(self):
         """获取农场数据 (用于前端展示)"""
-        site_url, _ = self._get_site_info()
-        if not site_url:
-            site_url = "https://www.ptskit.org"
-        url = f"{site_url}/magic_farm.php"
-        response = self._request(url)
-        if not response:
-            return None
-            
-        html = etree.HTML(response.text)
-        data = {
-            "bonus": "0",
-            "crops": [],
-            "animals": [],
-            "warehouse": [],
-            "market": [],
-            "market_next_refresh": ""
-        }
-        
+        data = self._engine.fetch_farm_data()
+        if data and data.get("market"):
+            self._analyze_market(data)
+        return data
+
+    def _analyze_market(self, data: Dict[str, Any]):
+        """记录价格趋势并计算市场价格相对成本价的波动"""
+        market_items = data["market"]
+
+        # --- 记录基础价格 (用于计算波动) ---
+        cost_map = {}
+        for c in data["crops"]:
+            if c.get("name") and c.get("price"):
+                cost_map[c["name"]] = c["price_value"]
+        for a in data["animals"]:
+            if a.get("name") and a.get("price"):
+                cost_map[a["name"]] = a["price_value"]
+
+        # --- 记录价格趋势 ---
         try:
-            # 1. 获取魔力值
-            bonus_el = html.xpath('//div[contains(@class, "points-display")]/text()')
-            if bonus_el:
-                bonus_text = bonus_el[0].strip()
-                bonus_text = bonus_text.replace("当前魔力值:", "").strip()
-                data["bonus"] = bonus_text
-
-            market_next_refresh_el = html.xpath('//p[contains(@class, "market-next-refresh")]/text()')
-            if market_next_refresh_el:
-                market_next_refresh = " ".join([text.strip() for text in market_next_refresh_el if text.strip()])
-                data["market_next_refresh"] = market_next_refresh
-
-            # 2. 遍历各个区域
-            sections = html.xpath('//div[contains(@class, "farm-section")]')
-            for section in sections:
-                title_el = section.xpath('.//h2/text()')
-                if not title_el:
-                    continue
-                title = title_el[0].strip()
-                
-                # 农作物种植区
-                if "农作物种植区" in title:
-                    items = section.xpath('.//div[contains(@class, "farm-item")]')
-                    for item in items:
-                        data["crops"].append(self._parse_farm_item(item, "crop"))
-
-                # 动物养殖区
-                elif "动物养殖区" in title:
-                    items = section.xpath('.//div[contains(@class, "farm-item")]')
-                    for item in items:
-                        data["animals"].append(self._parse_farm_item(item, "animal"))
-                        
-                # 仓库
-                elif "仓库" in title:
-                    warehouse_items = []
-                    # 1. 解析当前页（第一页）表格
-                    table = section.xpath('.//table[@class="warehouse-table"]')
-                    if table:
-                        warehouse_items.extend(self._parse_warehouse_table(table[0]))
-                    
-                    # 2. 检查分页并获取剩余数据
-                    try:
-                        pagination_info = section.xpath('.//div[@class="pagination-info"]/text()')
-                        if pagination_info:
-                            # 提取 "页 1 共 2" 中的总页数
-                            match = re.search(r'共\s*(\d+)', pagination_info[0])
-                            if match:
-                                total_pages = int(match.group(1))
-                                if total_pages > 1:
-                                    logger.info(f"{self.plugin_name}: 仓库共有 {total_pages} 页，开始获取剩余分页数据")
-                                    # 遍历剩余页面
-                                    for page in range(2, total_pages + 1):
-                                        try:
-                                            # 注意：URL 可能会根据排序不同而变化，这里假设默认排序或沿用 expire_asc
-                                            page_url = f"{url}?sort=expire_asc&page={page}"
-                                            page_resp = self._request(page_url)
-                                            if page_resp:
-                                                page_html = etree.HTML(page_resp.text)
-                                                page_tables = page_html.xpath('//table[@class="warehouse-table"]')
-                                                if page_tables:
-                                                    items = self._parse_warehouse_table(page_tables[0])
-                                                    if items:
-                                                        warehouse_items.extend(items)
-                                                        logger.debug(f"{self.plugin_name}: 第 {page} 页获取到 {len(items)} 个物品")
-                                            
-                                            # 避免请求过快
-                                            time.sleep(1)
-                                        except Exception as page_error:
-                                            logger.error(f"{self.plugin_name}: 获取第 {page} 页失败: {page_error}")
-                    except Exception as e:
-                        logger.error(f"{self.plugin_name}: 处理仓库分页异常: {e}")
-                    
-                    data["warehouse"] = warehouse_items
-                
-                # 菜市场
-                elif "菜市场" in title or "市场" in title:
-                    market_items = []
-                    # 查找市场表格（有两个：农作物和动物）
-                    categories = section.xpath('.//div[@class="market-category"]')
-                    
-                    for category in categories:
-                        category_title = category.xpath('.//h3/text()')
-                        item_type = "crop" if "农作物" in str(category_title) else "animal"
-                        
-                        rows = category.xpath('.//table[@class="market-table"]//tr[position()>1]')
-                        for row in rows:
-                            cells = row.xpath('.//td/text()')
-                            if len(cells) >= 2:
-                                market_item = {
-                                    "name": cells[0].strip(),
-                                    "price": cells[1].strip(),
-                                    "type": item_type
-                                }
-                                market_items.append(market_item)
-                    
-                    data["market"] = market_items
-                    
-                    # --- 记录基础价格 (用于计算波动) ---
-                    cost_map = {}
-                    for c in data["crops"]:
-                        if c.get("name") and c.get("price"):
-                            cost_map[c["name"]] = c["price"]
-                    for a in data["animals"]:
-                        if a.get("name") and a.get("price"):
-                            cost_map[a["name"]] = a["price"]
-                    
-                    # --- 记录价格趋势 (滚动存储最近6个点) ---
-                    try:
-                        today_str = datetime.now().strftime('%Y-%m-%d')
-                        current_hour = datetime.now().hour
-                        slot = (current_hour // 4) * 4
-                        key = f"{today_str}-{slot}"
-                        
-                        market_trends = self.get_data("market_trends") or {}
-                        
-                        # 兼容旧数据重置
-                        if "date" in market_trends:
-                            market_trends = {"version": 2, "data": {}}
-                        
-                        if "data" not in market_trends:
-                            market_trends["data"] = {}
-                            
-                        trends_data = market_trends["data"]
-                        
-                        for item in market_items:
-                            name = item["name"]
-                            price_str = re.sub(r'[^\d.]', '', str(item["price"]))
-                            price = float(price_str) if price_str else 0
-                            
-                            if name not in trends_data:
-                                trends_data[name] = []
-                            
-                            history = trends_data[name]
-                            
-                            record = {
-                                "slot": slot,
-                                "price": price,
-                                "key": key,
-                                "label": f"{slot}:00"
-                            }
-                            
-                            # 更新或追加
-                            if history and history[-1].get("key") == key:
-                                history[-1] = record
-                            else:
-                                history.append(record)
-                            
-                            # 保持最近 6 条
-                            if len(history) > 6:
-                                history.pop(0)
-                        
-                        self.save_data("market_trends", market_trends)
-                        data["market_trends"] = market_trends
-                    except Exception as e:
-                        logger.error(f"{self.plugin_name}: 记录价格趋势失败: {e}")
-
-                    # 计算价格波动 (基于成本价)
-                    for item in data["market"]:
-                        try:
-                            # 解析当前价格 (移除可能的非数字字符)
-                            price_str = re.sub(r'[^\d.]', '', str(item["price"]))
-                            current_price = float(price_str) if price_str else 0
-                            
-                            item_name = item["name"]
-                            
-                            # 获取成本价
-                            cost_price_str = cost_map.get(item_name, "0")
-                            cost_price_clean = re.sub(r'[^\d.]', '', str(cost_price_str))
-                            cost_price = float(cost_price_clean) if cost_price_clean else 0
-                            
-                            # "last_price" 字段现在用于显示成本价
-                            item["last_price"] = cost_price if cost_price > 0 else "未知"
-                            item["change_pct"] = 0
-                            item["change"] = 0
-                            
-                            if cost_price > 0:
-                                change = current_price - cost_price
-                                change_pct = (change / cost_price) * 100
-                                item["change"] = change
-                                item["change_pct"] = round(change_pct, 2)
-                                
-                        except Exception as e:
-                            logger.error(f"计算价格波动出错: {e}")
-                            item["last_price"] = "未知"
-                            item["change_pct"] = 0      
-            return data
-            
+            prices = {}
+            for item in market_items:
+                prices[item["name"]] = item["price_value"]
+            trend_store = self._get_trend_store()
+            trend_store.record(prices)
+            data["market_trends"] = {"data": trend_store.series(prices.keys(), bucket="4h", points=6)}
+            price_stats = trend_store.stats(prices.keys(), days=7)
+            for item in market_items:
+                item["price_stats"] = price_stats.get(item["name"], {})
         except Exception as e:
-            logger.error(f"{self.plugin_name} 解析数据失败: {str(e)}")
-            return None
+            logger.error(f"{self.plugin_name}: 记录价格趋势失败: {e}")
+
+        # 计算价格波动 (基于成本价)
+        for item in market_items:
+            try:
+                # 当前价格与成本价均在解析页面时转换为数值
+                current_price = item["price_value"]
+                cost_price = cost_map.get(item["name"], 0)
+
+                # "last_price" 字段现在用于显示成本价
+                item["last_price"] = cost_price if cost_price > 0 else "未知"
+                item["change_pct"] = 0
+                item["change"] = 0
+
+                if cost_price > 0:
+                    change = current_price - cost_price
+                    item["change"] = change
+                    item["change_pct"] = round((change / cost_price) * 100, 2)
+            except Exception as e:
+                logger.error(f"计算价格波动出错: {e}")
+                item["last_price"] = "未知"
+                item["change_pct"] = 0
 
     def harvest_all(self) -> Optional[str]:
         """一键收获
@@ -983,67 +704,52 @@ class SkitFarm(_PluginBase):
             payload = {}
 
         use_threshold = bool(payload.get("use_threshold", False))
+        only_keys = set(payload.get("keys") or [])
 
         # 1. 获取最新仓库数据
         data = self.get_farm_data()
         if not data or "warehouse" not in data:
             return {"success": False, "msg": "获取仓库数据失败"}
-        
+
         warehouse = data["warehouse"]
         if not warehouse:
             return {"success": True, "msg": "仓库为空，无需出售"}
-            
+
         success_count = 0
         fail_count = 0
         skip_count = 0
         success_items = []
         fail_items = []
         skip_items = []
-        sell_keys = []
-        sell_items = []
-        
-        # 构建市场价格映射 (用于区间利润检测)
-        market_map = {}
+        tasks = []
+
+        # 构建市场价格映射 (用于区间利润检测与出售排序)
+        market_map = {m["name"]: m for m in data.get("market", [])}
         min_profit = min(self._auto_sell_threshold, self._auto_sell_threshold_max)
         max_profit = max(self._auto_sell_threshold, self._auto_sell_threshold_max)
-        if use_threshold:
-            for m in data.get("market", []):
-                market_map[m["name"]] = m
 
         # 2. 筛选需要出售的仓库 key
         for item in warehouse:
             key = item.get("key")
             name = item.get("name")
-            if not key:
+            if not key or (only_keys and key not in only_keys):
                 continue
-            
-            # 自动出售盈利区间检查
-            if use_threshold and name in market_map:
-                m_item = market_map[name]
-                try:
-                    # 获取当前价格
-                    price_str = re.sub(r'[^\d.]', '', str(m_item.get("price", "0")))
-                    current_price = float(price_str) if price_str else 0
-                    
-                    # 获取成本价 (在 get_farm_data 中已处理并存入 last_price)
-                    cost_str = str(m_item.get("last_price", "0"))
-                    if cost_str == "未知":
-                        cost_price = 0
-                    else:
-                        cost_price = float(cost_str)
-                    
-                    if cost_price > 0:
-                        profit_pct = (current_price - cost_price) / cost_price * 100
-                        if profit_pct < min_profit or profit_pct > max_profit:
-                            logger.info(f"{self.plugin_name}: {name} 盈利 {profit_pct:.2f}% 不在区间 {min_profit:.2f}%~{max_profit:.2f}%，跳过出售")
-                            skip_count += 1
-                            skip_items.append(name)
-                            continue
-                except Exception as e:
-                    logger.warning(f"{self.plugin_name}: 计算 {name} 盈利出错: {e}，默认出售")
-
-            sell_keys.append(key)
-            sell_items.append(name)
+
+            # 自动出售盈利区间检查 (成本价未知时默认出售)
+            profit_pct = FarmEngine.profit_pct(market_map.get(name))
+            if use_threshold and profit_pct is not None:
+                if profit_pct < min_profit or profit_pct > max_profit:
+                    logger.info(f"{self.plugin_name}: {name} 盈利 {profit_pct:.2f}% 不在区间 {min_profit:.2f}%~{max_profit:.2f}%，跳过出售")
+                    skip_count += 1
+                    skip_items.append(name)
+                    continue
+
+            tasks.append(BatchTask(key=key, name=name, priority=FarmEngine.sell_priority(item, profit_pct)))
+
+        # 临期与高盈利物品排在批量请求前面
+        tasks.sort(key=lambda task: task.priority)
+        sell_keys = [task.key for task in tasks]
+        sell_items = [task.name for task in tasks]
 
         if not sell_keys:
             msg = "没有符合出售条件的物品"
@@ -1095,51 +801,45 @@ class SkitFarm(_PluginBase):
         }
 
     def _plant_all(self, payload: dict = None):
-        """API: 一键种植/养殖"""
+        """API: 一键种植/养殖，超时未处理的位置由补充任务继续"""
         if payload is None:
             payload = {}
-        
+
         item_type = payload.get('type', '')
         if item_type not in ['crop', 'animal']:
-             return {"success": False, "msg": "参数 type 错误 (crop/animal)"}
-        
+            return {"success": False, "msg": "参数 type 错误 (crop/animal)"}
+
         type_cn = "种植" if item_type == "crop" else "养殖"
+        only_keys = set(payload.get("keys") or [])
 
         # 1. 获取最新农场数据
         data = self.get_farm_data()
         if not data:
             return {"success": False, "msg": "获取农场数据失败"}
-        
+
         items = data.get("crops", []) if item_type == "crop" else data.get("animals", [])
         if not items:
             return {"success": True, "msg": f"{type_cn}区数据为空"}
-            
-        success_count = 0
-        fail_count = 0
-        start_time = time.time()
-        timeout_limit = 25 # 25秒超时保护
-        
-        # 2. 遍历种植
-        for item in items:
-            # 超时检查
-            if time.time() - start_time > timeout_limit:
-                logger.warning(f"{self.plugin_name}: 一键{type_cn}执行超时，已中断。")
-                break
-
-            if item.get("state") == "empty":
-                item_id = item.get("id")
-                if item_id:
-                     # 复用 plant 方法
-                     if self.plant(item_type, item_id):
-                         success_count += 1
-                         logger.info(f"{self.plugin_name}: 自动{type_cn} {item.get('name')} 成功")
-                         time.sleep(0.5) # 避免请求过快
-                     else:
-                         fail_count += 1
-                         logger.warning(f"{self.plugin_name}: 自动{type_cn} {item.get('name')} 失败")
-        
+
+        # 2. 按位置顺序并发种植
+        tasks = [
+            BatchTask(key=str(item["id"]), name=item.get("name", ""), priority=(index,))
+            for index, item in enumerate(items)
+            if item.get("state") == "empty" and item.get("id") and (not only_keys or str(item["id"]) in only_keys)
+        ]
+
+        def _plant(task: BatchTask) -> bool:
+            if self.plant(item_type, task.key):
+                logger.info(f"{self.plugin_name}: 自动{type_cn} {task.name} 成功")
+                return True
+            logger.warning(f"{self.plugin_name}: 自动{type_cn} {task.name} 失败")
+            return False
+
+        report = BatchExecutor(self.plugin_name).run(tasks, _plant)
+        self._runner.defer(f"plant_{item_type}", payload, [task.key for task in report.pending])
+
         # 刷新数据
-        if success_count > 0:
+        if report.succeeded:
             try:
                 new_data = self.get_farm_data()
                 if new_data:
@@ -1148,17 +848,22 @@ class SkitFarm(_PluginBase):
             except Exception as e:
                 logger.error(f"{self.plugin_name}: 刷新数据失败 - {e}")
 
-        msg = f"一键{type_cn}完成: 成功 {success_count} 个, 失败 {fail_count} 个"
-        if time.time() - start_time > timeout_limit:
-            msg += " (超时中断)"
-            
+        msg = f"一键{type_cn}完成: 成功 {len(report.succeeded)} 个, 失败 {len(report.failed)} 个"
+        if report.pending:
+            msg += f", 剩余 {len(report.pending)} 个稍后继续"
+        if tasks:
+            logger.info(f"{self.plugin_name}: {msg} ({report.summary()})")
+
         return {
-            "success": True, 
+            "success": True,
             "msg": msg,
-            "success_count": success_count,
-            "fail_count": fail_count
+            "success_count": len(report.succeeded),
+            "fail_count": len(report.failed),
+            "pending_count": len(report.pending),
+            "throughput": report.throughput,
+            "completion": report.completion
         }
-    
+
     def _save_config(self, config_payload: dict):
         """API: 保存配置"""
         logger.info(f"{self.plugin_name}: _save_config 接收到 payload: {config_payload}")
@@ -1177,6 +882,7 @@ class SkitFarm(_PluginBase):
             self._use_proxy = self._to_bool(config_payload.get("use_proxy", self._use_proxy))
             self._retry_count = self._to_int(config_payload.get("retry_count"), self._retry_count)
             self._retry_interval = self._to_int(config_payload.get("retry_interval"), self._retry_interval)
+            self._trend_retention_days = max(1, self._to_int(config_payload.get("trend_retention_days"), self._trend_retention_days))
 
             config_to_save = {
                 "enabled": self._enabled,
@@ -1190,7 +896,8 @@ class SkitFarm(_PluginBase):
                 "expiry_sale_enabled": self._expiry_sale_enabled,
                 "use_proxy": self._use_proxy,
                 "retry_count": self._retry_count,
-                "retry_interval": self._retry_interval
+                "retry_interval": self._retry_interval,
+                "trend_retention_days": self._trend_retention_days
             }
             
             self.update_config(config_to_save)
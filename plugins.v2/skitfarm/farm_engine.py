@@ -0,0 +1,1407 @@
+import re
+import time
+import hashlib
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, TypedDict
+
+import pytz
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+
+from app.log import logger
+from app.core.config import settings
+from app.db.site_oper import SiteOper
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+# 无法解析剩余时间时的排序值
+MAX_SORT_SECONDS = 99999999
+# 单次任务默认的请求预算
+RUN_REQUEST_BUDGET = 300
+# 退避等待上限(秒)
+MAX_BACKOFF = 60
+# Retry-After 等待上限(秒)
+MAX_RETRY_AFTER = 120
+# 未找到站点配置时的缓存时间(秒)
+SITE_MISS_TTL = 300
+# 仓库分页并发数
+WAREHOUSE_WORKERS = 3
+# 批量操作并发数
+BATCH_WORKERS = 2
+# 批量操作时限(秒)，超出后剩余项留给补充任务
+BATCH_DEADLINE = 25
+# 智能调度：成熟后的缓冲时间(秒)，确保作物已成熟
+SCHEDULE_BUFFER = 120
+# 智能调度：唤醒时间的随机抖动上限(秒)
+SCHEDULE_JITTER = 30
+# 智能调度：获取农场数据失败后的重试间隔(秒)，也是空闲位置操作无进展时的首次退避间隔
+SCHEDULE_RETRY = 300
+# 智能调度：空闲位置操作无进展时的最长退避间隔(秒)
+SCHEDULE_STALL_MAX = 6 * 3600
+# 临期出售窗口(秒)，剩余时间低于该值的仓库物品会被临期出售
+EXPIRY_WINDOW = 3600
+
+# 预编译的 XPath 与正则，每次解析页面时复用
+_X_BONUS = etree.XPath('//div[contains(@class, "points-display")]/text()')
+_X_SECTIONS = etree.XPath('//div[contains(@class, "farm-section")]')
+_X_SECTION_TITLE = etree.XPath('.//h2/text()')
+_X_SECTION_SUBTITLE = etree.XPath('.//h2/small/text()')
+_X_FARM_ITEMS = etree.XPath('.//div[contains(@class, "farm-item")]')
+_X_H3_TEXT = etree.XPath('.//h3/text()')
+_X_ITEM_INFO = etree.XPath('.//div[@class="item-info"]//p/text()')
+_X_ITEM_STATUS = etree.XPath('.//p[contains(@class, "growing-status")]/text()')
+_X_ITEM_BUTTON_HREF = etree.XPath('(.//a[contains(@class, "btn")])[1]/@href')
+_X_WAREHOUSE_TABLE = etree.XPath('.//table[@class="warehouse-table"]')
+_X_TABLE_ROWS = etree.XPath('.//tr[position()>1]')
+_X_CHILD_TDS = etree.XPath('./td')
+_X_TDS = etree.XPath('.//td')
+_X_TD_TEXTS = etree.XPath('.//td/text()')
+_X_TEXTS = etree.XPath('.//text()')
+_X_STRING = etree.XPath('string(.)')
+_X_LINKS = etree.XPath('.//a/@href')
+_X_SELL_LINKS = etree.XPath('.//a[contains(@class, "sell-btn")]/@href')
+_X_BATCH_KEYS = etree.XPath('.//input[@name="batch_keys[]"]/@value')
+_X_MARKET_CATEGORIES = etree.XPath('.//div[@class="market-category"]')
+_X_MARKET_ROWS = etree.XPath('.//table[@class="market-table"]//tr[position()>1]')
+_X_PAGINATION = etree.XPath('.//div[@class="pagination-info"]/text()')
+_X_MARKET_REFRESH = etree.XPath('//p[contains(@class, "market-next-refresh")]/text()')
+
+_RE_NON_NUMERIC = re.compile(r'[^\d.]')
+_RE_PLOT_ID = re.compile(r'id=(\d+)')
+_RE_SELL_KEY = re.compile(r'key=([^&]+)')
+_RE_TOTAL_PAGES = re.compile(r'共\s*(\d+)')
+_RE_TIME_UNITS = (
+    ("days", re.compile(r'(\d+)天')),
+    ("hours", re.compile(r'(\d+)小时')),
+    ("minutes", re.compile(r'(\d+)分')),
+    ("seconds", re.compile(r'(\d+)秒')),
+)
+
+
+class FarmItem(TypedDict, total=False):
+    """种植/养殖位，price 为页面原文，price_value 为解析后的数值"""
+
+    name: str
+    image: str
+    price: str
+    price_value: float
+    grow_time: str
+    double_chance: str
+    valid_days: str
+    status: str
+    remaining_time: str
+    # growing / empty / ripe / unknown
+    state: str
+    sort_seconds: float
+    id: str
+
+
+class MarketItem(TypedDict, total=False):
+    """市场价格，price 为页面原文，price_value 为解析后的数值"""
+
+    name: str
+    price: str
+    price_value: float
+    # crop / animal
+    type: str
+    # 以下字段由插件分析市场时补充
+    last_price: Any
+    change: float
+    change_pct: float
+    price_stats: Dict[str, float]
+
+
+@dataclass(frozen=True)
+class FarmProfile:
+    """农场站点配置
+
+    各站点农场页面结构基本一致，差异仅在域名、页面地址、魔力值文案、图片资源和表格列布局，
+    这些差异以声明式配置描述，解析与请求逻辑由 FarmEngine 统一实现。
+    """
+
+    # 站点域名（用于在站点管理中查找站点）
+    domain: str
+    # 站点名称（用于日志提示）
+    site_name: str
+    # 未配置站点时使用的默认地址
+    default_url: str
+    # 农场页面
+    page: str = "magic_fram.php"
+    # 魔力值文本前缀
+    bonus_prefixes: Tuple[str, ...] = ("当前魔力值:",)
+    # 魔力值是否由多段文本拼接
+    bonus_join: bool = False
+    # 物品名称 -> dist/public 下的图片文件
+    images: Dict[str, str] = field(default_factory=dict)
+    # 仓库表格布局: text(纯文本单元格) / mixed(含图片列时按列取值) / batch(批量出售复选框) / column(固定列)
+    warehouse_layout: str = "text"
+    # 市场表格布局: text(纯文本单元格) / column(首列为图片)
+    market_layout: str = "text"
+    # 是否解析种植/养殖区副标题
+    parse_subtitles: bool = False
+    # 是否解析市场刷新时间
+    parse_market_refresh: bool = False
+
+
+class AdaptivePacer:
+    """自适应请求节奏
+
+    多个线程共享同一个请求间隔：请求成功时按响应耗时平滑调整间隔，
+    遇到 429/5xx 时间隔翻倍（或按 Retry-After）并推迟后续请求。
+    """
+
+    def __init__(self, min_interval: float = 0.2, max_interval: float = 10.0):
+        """
+        :param min_interval: 最小请求间隔(秒)
+        :param max_interval: 最大请求间隔(秒)
+        """
+        self._min = min_interval
+        self._max = max_interval
+        self._interval = min_interval
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def wait(self):
+        """等待到下一个可发起请求的时间点"""
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self._interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def success(self, latency: float):
+        """请求成功，响应越慢间隔越大，否则逐步回落到最小间隔"""
+        with self._lock:
+            target = min(self._max, max(self._min, latency / 2))
+            self._interval = self._interval * 0.7 + target * 0.3
+
+    def throttled(self, delay: Optional[float] = None):
+        """被限流或服务端错误，放慢节奏"""
+        with self._lock:
+            self._interval = min(self._max, max(self._interval * 2, delay or 0, 1.0))
+            self._next_at = max(self._next_at, time.monotonic() + self._interval)
+
+
+@dataclass(frozen=True)
+class FarmAsset:
+    """插件图片资源，启动时读取一次，之后只读"""
+
+    key: str
+    content: bytes
+    media_type: str
+    # 内容摘要，用于前端缓存失效
+    version: str
+
+
+@dataclass
+class BatchTask:
+    """批量操作中的单项（出售的仓库物品或种植位）"""
+
+    # 仓库 key 或种植位 ID
+    key: str
+    name: str
+    # 排序键，越小越先执行
+    priority: Tuple = ()
+
+
+@dataclass
+class BatchReport:
+    """批量操作结果"""
+
+    total: int = 0
+    succeeded: List[BatchTask] = field(default_factory=list)
+    failed: List[BatchTask] = field(default_factory=list)
+    # 超出时限未执行的项
+    pending: List[BatchTask] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理项数"""
+        done = len(self.succeeded) + len(self.failed)
+        return round(done / self.elapsed, 2) if self.elapsed > 0 else float(done)
+
+    @property
+    def completion(self) -> float:
+        """完成率(%)"""
+        return round(len(self.succeeded) * 100 / self.total, 1) if self.total else 100.0
+
+    def summary(self) -> str:
+        return f"耗时 {self.elapsed:.1f} 秒, {self.throughput} 个/秒, 完成率 {self.completion}%"
+
+
+class BatchExecutor:
+    """批量操作执行器
+
+    按优先级顺序以有限并发执行单项操作，请求节奏由 AdaptivePacer 控制；
+    超过时限后不再开始新的项，未执行的项在结果中返回，由调用方安排补充任务继续。
+    """
+
+    def __init__(self, name: str, workers: int = BATCH_WORKERS, deadline: float = BATCH_DEADLINE):
+        """
+        :param name: 插件名称，用于日志前缀
+        :param workers: 并发数
+        :param deadline: 时限(秒)
+        """
+        self._name = name
+        self._workers = max(1, workers)
+        self._deadline = deadline
+
+    def run(self, tasks: List[BatchTask], action: Callable[[BatchTask], bool]) -> BatchReport:
+        """
+        执行批量操作
+        :param tasks: 待执行项
+        :param action: 单项操作，成功返回 True
+        """
+        queue = sorted(tasks, key=lambda task: task.priority)
+        report = BatchReport(total=len(queue))
+        if not queue:
+            return report
+
+        pacer = AdaptivePacer()
+        started = time.monotonic()
+
+        def _run(task: BatchTask) -> bool:
+            pacer.wait()
+            begin = time.monotonic()
+            ok = bool(action(task))
+            pacer.success(time.monotonic() - begin)
+            return ok
+
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="farm-batch") as executor:
+            running = {}
+            index = 0
+            while index < len(queue) or running:
+                while index < len(queue) and len(running) < self._workers:
+                    if time.monotonic() - started > self._deadline:
+                        report.pending = queue[index:]
+                        index = len(queue)
+                        logger.warning(f"{self._name}: 批量操作超过 {self._deadline} 秒，剩余 {len(report.pending)} 项稍后继续")
+                        break
+                    running[executor.submit(_run, queue[index])] = queue[index]
+                    index += 1
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        logger.error(f"{self._name}: 执行 {task.name} 异常: {e}")
+                        ok = False
+                    (report.succeeded if ok else report.failed).append(task)
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+
+class RipeScheduler:
+    """智能调度
+
+    根据种植/养殖位的剩余时间与仓库临期物品计算最近一次可执行操作的时间，
+    只维护一个唤醒时间点（带随机抖动）：已有更早的唤醒时新的调度请求被合并，
+    执行期间的重复触发也合并到正在执行的任务，任务结束后按最新数据重新调度。
+    没有可预期的操作时不安排唤醒，由定时任务或配置变更重新调度；
+    空闲/成熟位置在上次任务中未能收获或种植时（缺少种子、魔力不足等），按指数退避再尝试。
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: 插件名称，用于日志前缀
+        """
+        self._name = name
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._next_run: Optional[datetime] = None
+        # 最近一次调度没有可预期的操作，暂停唤醒
+        self._idle = False
+        # 连续未能处理空闲/成熟位置的任务次数
+        self._stalled = 0
+
+    @property
+    def next_run(self) -> Optional[datetime]:
+        return self._next_run
+
+    @property
+    def idle(self) -> bool:
+        return self._idle
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(tz=pytz.timezone(settings.TZ))
+
+    def reset(self):
+        with self._lock:
+            self._next_run = None
+            self._idle = False
+            self._stalled = 0
+
+    def record_plots(self, data: Optional[Dict[str, Any]], changed: bool):
+        """
+        记录一次任务对空闲/成熟位置的处理结果
+        :param data: 任务结束后的农场数据
+        :param changed: 本次任务是否收获或种植/养殖成功
+        """
+        if not data:
+            return
+        idle_left = any(item.get("state") in ("ripe", "empty")
+                        for item in (data.get("crops") or []) + (data.get("animals") or []))
+        with self._lock:
+            if changed or not idle_left:
+                self._stalled = 0
+            else:
+                self._stalled += 1
+                logger.info(f"{self._name}: 空闲位置连续 {self._stalled} 次未能收获或种植，推迟再次尝试")
+
+    def _stall_wait(self) -> float:
+        """空闲/成熟位置的等待时间：未出现无进展时立即操作，否则指数退避"""
+        if not self._stalled:
+            return 0
+        return min(SCHEDULE_RETRY * 2 ** (self._stalled - 1), SCHEDULE_STALL_MAX)
+
+    def try_begin(self) -> bool:
+        """开始执行任务，已有任务在执行时返回 False"""
+        return self._run_lock.acquire(blocking=False)
+
+    def finish(self):
+        self._run_lock.release()
+
+    @staticmethod
+    def next_action_seconds(data: Dict[str, Any], plots: bool = True, expiry: bool = False,
+                            idle_wait: float = 0) -> Optional[float]:
+        """
+        距离最近一次可执行操作的秒数，没有可预期的操作时返回 None
+        :param plots: 是否关注种植/养殖位（收获与种植）
+        :param expiry: 是否关注仓库临期物品
+        :param idle_wait: 空闲/成熟位置的等待秒数
+        """
+        candidates = []
+        if plots:
+            for item in (data.get("crops") or []) + (data.get("animals") or []):
+                state = item.get("state")
+                if state in ("ripe", "empty"):
+                    candidates.append(idle_wait)
+                elif state == "growing":
+                    seconds = item.get("sort_seconds", MAX_SORT_SECONDS)
+                    if seconds < MAX_SORT_SECONDS:
+                        candidates.append(max(0, seconds))
+        if expiry:
+            for item in data.get("warehouse") or []:
+                td = FarmEngine.parse_timedelta(item.get("remaining_time", ""))
+                if td:
+                    candidates.append(max(0, td.total_seconds() - EXPIRY_WINDOW))
+        return min(candidates) if candidates else None
+
+    def plan(self, data: Optional[Dict[str, Any]], plots: bool = True, expiry: bool = False) -> Optional[datetime]:
+        """
+        按农场数据安排下一次唤醒
+        :param data: 最新农场数据，获取失败时为 None
+        :return: 新的唤醒时间，与已有唤醒合并或无可预期的操作时返回 None
+        """
+        if not data:
+            wait = SCHEDULE_RETRY
+            reason = "获取农场数据失败"
+        else:
+            seconds = self.next_action_seconds(data, plots=plots, expiry=expiry, idle_wait=self._stall_wait())
+            if seconds is None:
+                with self._lock:
+                    self._next_run = None
+                    self._idle = True
+                logger.info(f"{self._name}: 当前无可预期的操作，暂停智能调度，由定时任务重新调度")
+                return None
+            wait = seconds + SCHEDULE_BUFFER
+            reason = f"最近可操作时间为 {int(seconds)} 秒后"
+        next_run = self.schedule(wait)
+        if next_run:
+            logger.info(f"{self._name}: {reason}，下一次智能调度时间: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
+        return next_run
+
+    def schedule(self, wait: float) -> Optional[datetime]:
+        """在 wait 秒后（加随机抖动）唤醒，已有不晚于该时间的唤醒时合并"""
+        now = self._now()
+        run_at = now + timedelta(seconds=wait + random.uniform(0, SCHEDULE_JITTER))
+        with self._lock:
+            self._idle = False
+            if self._next_run and now < self._next_run <= run_at + timedelta(seconds=SCHEDULE_JITTER):
+                logger.debug(f"{self._name}: 已安排 {self._next_run.strftime('%Y-%m-%d %H:%M:%S')} 唤醒，合并本次调度")
+                return None
+            self._next_run = run_at
+        return run_at
+
+    def restore(self, saved: Optional[str] = None) -> Optional[datetime]:
+        """注册任务时的唤醒时间：优先使用内存或持久化的时间，已过期或不存在时尽快执行，暂停唤醒时返回 None"""
+        now = self._now()
+        with self._lock:
+            if self._idle:
+                return None
+            if not self._next_run and saved:
+                try:
+                    self._next_run = pytz.timezone(settings.TZ).localize(datetime.strptime(saved, '%Y-%m-%d %H:%M:%S'))
+                except Exception as e:
+                    logger.error(f"{self._name}: 恢复下次运行时间失败: {e}")
+            if not self._next_run:
+                self._next_run = now + timedelta(seconds=5)
+            elif self._next_run < now:
+                self._next_run = now + timedelta(seconds=10)
+            return self._next_run
+
+
+class FarmEngine:
+    """农场通用引擎
+
+    持有复用连接的请求会话，负责站点信息获取、带重试的请求以及农场页面解析，
+    插件只需提供 FarmProfile 并在解析结果上处理各自的业务逻辑（价格趋势、成本价等）。
+
+    失败请求按指数退避加随机抖动重试，429/503 优先遵循 Retry-After；
+    定时任务期间可设置请求预算，超出后不再发起请求；站点地址与UA缓存到站点配置变更为止。
+    """
+
+    def __init__(self, profile: FarmProfile, name: str, plugin_dir: Path):
+        """
+        :param profile: 站点配置
+        :param name: 插件名称，用于日志前缀
+        :param plugin_dir: 插件目录，用于读取图片资源
+        """
+        self.profile = profile
+        self._name = name
+        self._plugin_dir = plugin_dir
+        self._siteoper: Optional[SiteOper] = None
+        self._cookie: Optional[str] = None
+        self._use_proxy = False
+        self._retry_count = 3
+        self._retry_interval = 5
+        self._session = self._new_session()
+        self._lock = threading.Lock()
+        # 站点信息缓存: (站点地址, UA, 过期时间)，过期时间为 None 表示直到站点配置变更
+        self._site_cache: Optional[Tuple[Optional[str], Optional[str], Optional[float]]] = None
+        # 本次任务剩余请求数，None 表示不限制
+        self._budget_left: Optional[int] = None
+        self._budget_used = 0
+        # 图片资源表: 物品名称 -> 资源
+        self._assets: Mapping[str, FarmAsset] = MappingProxyType(self._load_assets())
+
+    @staticmethod
+    def _new_session() -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def configure(self, cookie: Optional[str], use_proxy: bool = False, retry_count: int = 3,
+                  retry_interval: int = 5, siteoper: Optional[SiteOper] = None):
+        """更新请求配置"""
+        self._cookie = cookie
+        self._use_proxy = use_proxy
+        self._retry_count = max(0, retry_count)
+        self._retry_interval = max(0, retry_interval)
+        if siteoper:
+            self._siteoper = siteoper
+        self.invalidate_site()
+
+    def close(self):
+        """关闭请求会话"""
+        try:
+            self._session.close()
+        except Exception:
+            pass
+        self._session = self._new_session()
+
+    # ------------------------------------------------------------------ #
+    # 站点与请求
+    # ------------------------------------------------------------------ #
+
+    def invalidate_site(self, domain: Optional[str] = None):
+        """站点配置变更后清除站点信息缓存，指定域名时仅在匹配本站点时清除"""
+        if domain and self.profile.domain not in str(domain):
+            return
+        with self._lock:
+            self._site_cache = None
+
+    def site_info(self) -> Tuple[Optional[str], Optional[str]]:
+        """获取站点地址与UA，结果缓存到站点配置变更为止"""
+        with self._lock:
+            cache = self._site_cache
+        if cache and (cache[2] is None or cache[2] > time.time()):
+            return cache[0], cache[1]
+        site_url, user_agent = self._resolve_site()
+        expires = None if site_url else time.time() + SITE_MISS_TTL
+        with self._lock:
+            self._site_cache = (site_url, user_agent, expires)
+        return site_url, user_agent
+
+    def _resolve_site(self) -> Tuple[Optional[str], Optional[str]]:
+        """从站点管理中读取站点地址与UA"""
+        try:
+            if not self._siteoper:
+                self._siteoper = SiteOper()
+            site = self._siteoper.get_by_domain(self.profile.domain)
+            if not site:
+                logger.warning(f"未找到{self.profile.site_name}站点配置（{self.profile.domain}），请在站点管理中添加")
+                return None, None
+            site_url = site.url if hasattr(site, 'url') else None
+            user_agent = site.ua if hasattr(site, 'ua') else None
+            return site_url, user_agent
+        except Exception as e:
+            logger.error(f"获取站点信息失败: {str(e)}")
+            return None, None
+
+    @property
+    def site_url(self) -> str:
+        """站点地址，未配置时使用默认地址"""
+        site_url, _ = self.site_info()
+        return (site_url or self.profile.default_url).rstrip("/")
+
+    @property
+    def page_url(self) -> str:
+        """农场页面地址"""
+        return f"{self.site_url}/{self.profile.page}"
+
+    def begin_run(self, budget: int = RUN_REQUEST_BUDGET):
+        """开始一次定时任务，限制本次任务的请求总数（含重试）"""
+        with self._lock:
+            self._budget_left = budget
+            self._budget_used = 0
+
+    def end_run(self) -> int:
+        """结束定时任务并解除请求预算
+        :return: 本次任务发出的请求数
+        """
+        with self._lock:
+            used = self._budget_used
+            self._budget_left = None
+            self._budget_used = 0
+        return used
+
+    def _take_budget(self) -> bool:
+        """消耗一次请求预算，预算用尽时返回 False"""
+        with self._lock:
+            if self._budget_left is None:
+                return True
+            if self._budget_left <= 0:
+                return False
+            self._budget_left -= 1
+            self._budget_used += 1
+            return True
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """计算第 attempt 次失败后的等待时间：优先 Retry-After，否则指数退避加随机抖动"""
+        if response is not None and response.status_code in (429, 503):
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, MAX_RETRY_AFTER)
+        delay = min(self._retry_interval * (2 ** attempt), MAX_BACKOFF)
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After，支持秒数与 HTTP 日期两种格式"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+        except Exception:
+            return None
+
+    def request(self, url: str, method: str = "GET", data: dict = None,
+                params: dict = None, pacer: Optional[AdaptivePacer] = None) -> Optional[requests.Response]:
+        """发送请求，失败时退避重试，认证失败不重试
+        :param pacer: 请求节奏控制，批量请求时由调用方共享
+        """
+        if not self._cookie:
+            logger.error(f"{self._name}: 未配置Cookie")
+            return None
+
+        site_url, user_agent = self.site_info()
+        if not site_url:
+            site_url = self.profile.default_url
+            logger.warning(f"未找到站点配置，使用默认URL: {site_url}")
+        if not user_agent:
+            user_agent = DEFAULT_USER_AGENT
+            logger.warning("未找到站点UA配置，使用默认UA")
+
+        headers = {
+            "cookie": self._cookie,
+            "referer": site_url,
+            "user-agent": user_agent
+        }
+        proxies = settings.PROXY if self._use_proxy else None
+        method = method.upper()
+
+        for attempt in range(self._retry_count + 1):
+            if not self._take_budget():
+                logger.warning(f"{self._name}: 本次任务请求次数已达上限，跳过请求 {url}")
+                return None
+            response = None
+            if pacer:
+                pacer.wait()
+            try:
+                started = time.monotonic()
+                response = self._session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=data if method == "POST" else None,
+                    proxies=proxies,
+                    timeout=30
+                )
+                if pacer:
+                    if response.status_code == 200:
+                        pacer.success(time.monotonic() - started)
+                    elif response.status_code == 429 or response.status_code >= 500:
+                        pacer.throttled(self._parse_retry_after(response.headers.get("Retry-After")))
+                if response.status_code == 200:
+                    return response
+                if response.status_code in (401, 403):
+                    logger.error(f"{self._name}: 认证失败 (HTTP {response.status_code})，请检查Cookie是否有效")
+                    return None
+                logger.warning(f"{self._name}: 请求失败 {url} - {response.status_code}，重试 {attempt + 1}/{self._retry_count}")
+            except Exception as e:
+                logger.warning(f"{self._name}: 请求异常 {url} - {str(e)}，重试 {attempt + 1}/{self._retry_count}")
+            if attempt < self._retry_count:
+                time.sleep(self._backoff(attempt, response))
+
+        logger.error(f"{self._name}: 请求失败 {url}，已达到最大重试次数")
+        return None
+
+    # ------------------------------------------------------------------ #
+    # 页面解析
+    # ------------------------------------------------------------------ #
+
+    def _load_assets(self) -> Dict[str, FarmAsset]:
+        """读取并登记配置的图片资源"""
+        assets = {}
+        for name, filename in self.profile.images.items():
+            image_path = self._plugin_dir / "dist" / "public" / filename
+            try:
+                if not image_path.exists():
+                    logger.warning(f"图片文件不存在: {image_path}")
+                    continue
+                content = image_path.read_bytes()
+            except Exception as e:
+                logger.error(f"读取图片资源失败: {str(e)}")
+                continue
+            suffix = image_path.suffix.lower().lstrip('.') or 'png'
+            assets[name] = FarmAsset(
+                key=name,
+                content=content,
+                media_type=f"image/{'jpeg' if suffix in ['jpg', 'jpeg'] else suffix}",
+                version=hashlib.md5(content).hexdigest()[:8]
+            )
+        return assets
+
+    def image(self, name: str) -> str:
+        """物品图片的资源 key，前端通过资源接口获取图片，无对应图片时返回空字符串"""
+        return name if name in self._assets else ""
+
+    def asset(self, key: str) -> Optional[FarmAsset]:
+        return self._assets.get(key)
+
+    def asset_versions(self) -> Dict[str, str]:
+        """资源 key -> 版本，前端拼接到图片地址上以便长期缓存"""
+        return {key: asset.version for key, asset in self._assets.items()}
+
+    @staticmethod
+    def parse_timedelta(time_str: str) -> Optional[timedelta]:
+        """解析剩余时间字符串为 timedelta"""
+        if not time_str:
+            return None
+        try:
+            if ":" in time_str:
+                parts = time_str.split(":")
+                if len(parts) == 3:
+                    h, m, s = map(int, parts)
+                    return timedelta(hours=h, minutes=m, seconds=s)
+                elif len(parts) == 2:
+                    m, s = map(int, parts)
+                    return timedelta(minutes=m, seconds=s)
+
+            units = {}
+            for unit, pattern in _RE_TIME_UNITS:
+                match = pattern.search(time_str)
+                if match:
+                    units[unit] = int(match.group(1))
+            if any(units.values()):
+                return timedelta(**units)
+            return None
+        except Exception as e:
+            logger.error(f"解析时间字符串失败 '{time_str}': {e}")
+            return None
+
+    @staticmethod
+    def parse_price(value: Any) -> float:
+        """提取价格中的数值（去除单位等字符），无法解析时返回 0"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        text = _RE_NON_NUMERIC.sub('', str(value or ""))
+        try:
+            return float(text) if text else 0.0
+        except ValueError:
+            return 0.0
+
+    @classmethod
+    def profit_pct(cls, market_item: Optional[Dict[str, Any]]) -> Optional[float]:
+        """按市场价与成本价(last_price)计算盈利百分比，成本未知时返回 None"""
+        if not market_item:
+            return None
+        current_price = market_item.get("price_value")
+        if current_price is None:
+            current_price = cls.parse_price(market_item.get("price"))
+        cost_price = cls.parse_price(market_item.get("last_price"))
+        if cost_price <= 0:
+            return None
+        return (current_price - cost_price) / cost_price * 100
+
+    @classmethod
+    def sell_priority(cls, item: Dict[str, Any], profit_pct: Optional[float] = None) -> Tuple[float, float]:
+        """出售优先级：临期优先，其次盈利高者优先"""
+        td = cls.parse_timedelta(item.get("remaining_time", ""))
+        return (td.total_seconds() if td else MAX_SORT_SECONDS, -(profit_pct or 0))
+
+    def parse_bonus(self, html) -> Optional[str]:
+        """解析当前魔力值"""
+        bonus_el = _X_BONUS(html)
+        if not bonus_el:
+            return None
+        if self.profile.bonus_join:
+            bonus_text = ''.join([text.strip() for text in bonus_el if text and text.strip()])
+        else:
+            bonus_text = bonus_el[0]
+        for prefix in self.profile.bonus_prefixes:
+            bonus_text = bonus_text.replace(prefix, "")
+        return bonus_text.strip()
+
+    def parse_farm_item(self, item_element, item_type: str = "crop") -> FarmItem:
+        """解析种植/养殖位"""
+        data: FarmItem = {}
+        name_el = _X_H3_TEXT(item_element)
+        data["name"] = name_el[0].strip() if name_el else "未知"
+        data["image"] = self.image(data["name"])
+
+        data["price"] = ""
+        data["grow_time"] = ""
+        data["double_chance"] = ""
+        data["valid_days"] = ""
+
+        for info in _X_ITEM_INFO(item_element):
+            info = info.strip()
+            if "价格:" in info:
+                data["price"] = info.replace("价格:", "").strip()
+            elif "成长时间:" in info:
+                data["grow_time"] = info.replace("成长时间:", "").strip()
+            elif "双倍收获:" in info or "概率" in info:
+                data["double_chance"] = info.replace("双倍收获:", "").strip()
+            elif "有效期:" in info:
+                data["valid_days"] = info.replace("有效期:", "").strip()
+        data["price_value"] = self.parse_price(data["price"])
+
+        data["sort_seconds"] = MAX_SORT_SECONDS
+        status_el = _X_ITEM_STATUS(item_element)
+        if status_el:
+            data["status"] = status_el[0].strip()
+            # 提取纯剩余时间
+            if "剩余时间" in data["status"]:
+                data["remaining_time"] = data["status"].replace("剩余时间:", "").strip()
+                td = self.parse_timedelta(data["remaining_time"])
+                if td:
+                    data["sort_seconds"] = td.total_seconds()
+            data["state"] = "growing"
+            return data
+
+        data["state"] = "unknown"
+        btn_href = _X_ITEM_BUTTON_HREF(item_element)
+        if btn_href:
+            btn_href = btn_href[0]
+            target_action = "plant" if item_type == "crop" else "breed"
+            if f"action={target_action}" in btn_href:
+                data["state"] = "empty"
+            elif "action=harvest" in btn_href:
+                data["state"] = "ripe"
+                data["sort_seconds"] = -1
+            if data["state"] != "unknown":
+                match = _RE_PLOT_ID.search(btn_href)
+                if match:
+                    data["id"] = match.group(1)
+        return data
+
+    def parse_plots(self, html) -> Optional[Dict[str, Any]]:
+        """解析魔力值与种植/养殖区，页面不含农场区域时返回None"""
+        if html is None:
+            return None
+        return self._parse_plot_sections(html, self._sections(html))
+
+    def _sections(self, html) -> List[Tuple[str, Any]]:
+        """页面中的农场区域及其标题"""
+        return [(self._section_title(section), section) for section in _X_SECTIONS(html)]
+
+    def _parse_plot_sections(self, html, sections: List[Tuple[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not sections:
+            return None
+
+        plots = {"crops": [], "animals": []}
+        bonus = self.parse_bonus(html)
+        if bonus is not None:
+            plots["bonus"] = bonus
+
+        for title, section in sections:
+            if "农作物种植区" in title:
+                item_type, key = "crop", "crops"
+            elif "动物养殖区" in title:
+                item_type, key = "animal", "animals"
+            else:
+                continue
+            if self.profile.parse_subtitles:
+                subtitle_el = _X_SECTION_SUBTITLE(section)
+                plots[f"{item_type}_subtitle"] = subtitle_el[0].strip() if subtitle_el else ""
+            for item in _X_FARM_ITEMS(section):
+                plots[key].append(self.parse_farm_item(item, item_type))
+
+        if not plots["crops"] and not plots["animals"]:
+            return None
+        return plots
+
+    @staticmethod
+    def _section_title(section) -> str:
+        title_el = _X_SECTION_TITLE(section)
+        return title_el[0].strip() if title_el else ""
+
+    @staticmethod
+    def _sell_key(href: str) -> str:
+        match = _RE_SELL_KEY.search(href or "")
+        return match.group(1) if match else ""
+
+    @staticmethod
+    def _cell_text(td) -> str:
+        return _X_STRING(td).strip()
+
+    def parse_warehouse_table(self, table) -> List[Dict[str, Any]]:
+        """解析仓库表格数据"""
+        layout = self.profile.warehouse_layout
+        cell_text = self._cell_text
+        items = []
+        for row in _X_TABLE_ROWS(table):
+            tds = _X_CHILD_TDS(row) if layout == "batch" else _X_TDS(row)
+            link = _X_LINKS(row)
+
+            if layout == "column":
+                # 图片, 名称, 数量, 时间, 操作
+                if len(tds) < 4:
+                    continue
+                item = {
+                    "name": cell_text(tds[1]),
+                    "quantity": cell_text(tds[2]),
+                    "remaining_time": cell_text(tds[3]),
+                    "key": ""
+                }
+            elif layout == "batch":
+                cells = [" ".join(_X_TEXTS(td)).strip() for td in tds]
+                link = _X_SELL_LINKS(row) or link
+                if len(cells) >= 8:
+                    # 复选框, 名称, 数量, 收获时间, 过期时间, 单价, 总价, 操作
+                    name, quantity, harvest_time, expire_time = cells[1:5]
+                    unit_price, total_value = cells[5], cells[6]
+                elif len(cells) >= 4:
+                    name, quantity, harvest_time, expire_time = cells[0:4]
+                    unit_price, total_value = "", ""
+                else:
+                    continue
+                item = {
+                    "name": name,
+                    "quantity": quantity,
+                    "harvest_time": harvest_time,
+                    "expire_time": expire_time,
+                    "remaining_time": expire_time,
+                    "unit_price": unit_price,
+                    "total_value": total_value,
+                    "key": ""
+                }
+                # 优先从批量出售复选框提取 key，兼容单个出售链接
+                checkbox_value = _X_BATCH_KEYS(row)
+                if checkbox_value:
+                    item["key"] = checkbox_value[0]
+                    items.append(item)
+                    continue
+            else:
+                cells = [cell.strip() for cell in _X_TD_TEXTS(row)]
+                if len(cells) < 4:
+                    continue
+                if layout == "mixed" and len(tds) >= 5:
+                    item = {
+                        "name": cell_text(tds[1]),
+                        "quantity": cell_text(tds[2]),
+                        "harvest_time": "",
+                        "remaining_time": cell_text(tds[3]),
+                        "key": ""
+                    }
+                else:
+                    item = {
+                        "name": cells[0],
+                        "quantity": cells[1],
+                        "harvest_time": cells[2],
+                        "remaining_time": cells[3],
+                        "key": ""
+                    }
+
+            if link:
+                item["key"] = self._sell_key(link[0])
+            items.append(item)
+        return items
+
+    def parse_market(self, section) -> List[MarketItem]:
+        """解析市场价格表（农作物与动物两个分类）"""
+        market_items: List[MarketItem] = []
+        for category in _X_MARKET_CATEGORIES(section):
+            category_title = _X_H3_TEXT(category)
+            item_type = "crop" if "农作物" in str(category_title) else "animal"
+            for row in _X_MARKET_ROWS(category):
+                if self.profile.market_layout == "column":
+                    tds = _X_TDS(row)
+                    if len(tds) < 3:
+                        continue
+                    name = self._cell_text(tds[1])
+                    price = self._cell_text(tds[2])
+                else:
+                    cells = _X_TD_TEXTS(row)
+                    if len(cells) < 2:
+                        continue
+                    name = cells[0].strip()
+                    price = cells[1].strip()
+                market_items.append({
+                    "name": name,
+                    "price": price,
+                    "price_value": self.parse_price(price),
+                    "type": item_type
+                })
+        return market_items
+
+    @staticmethod
+    def parse_total_pages(section) -> int:
+        """解析仓库分页信息中的总页数"""
+        pagination_info = _X_PAGINATION(section)
+        if pagination_info:
+            # 提取 "页 1 共 2" 中的总页数
+            match = _RE_TOTAL_PAGES.search(pagination_info[0])
+            if match:
+                return int(match.group(1))
+        return 1
+
+    def _fetch_warehouse_page(self, url: str, page: int, pacer: AdaptivePacer) -> Optional[List[Dict[str, Any]]]:
+        """获取单个仓库分页，请求失败时返回 None"""
+        page_resp = self.request(f"{url}?sort=expire_asc&page={page}", pacer=pacer)
+        if not page_resp:
+            return None
+        page_tables = _X_WAREHOUSE_TABLE(etree.HTML(page_resp.text))
+        return self.parse_warehouse_table(page_tables[0]) if page_tables else []
+
+    def fetch_warehouse_pages(self, url: str, total_pages: int,
+                              workers: int = WAREHOUSE_WORKERS) -> List[Dict[str, Any]]:
+        """并发获取仓库第 2 页起的剩余分页
+
+        同时在途的分页数不超过 workers，请求节奏由 AdaptivePacer 按响应情况调整；
+        结果按页码顺序合并，某页没有物品时不再请求之后的分页。
+        """
+        logger.info(f"{self._name}: 仓库共有 {total_pages} 页，开始获取剩余分页数据")
+        workers = max(1, workers)
+        pacer = AdaptivePacer()
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        # 有效的最后一页，遇到空页后收缩
+        last_page = total_pages
+        pending = {}
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="farm-warehouse") as executor:
+            while pending or next_page <= last_page:
+                while next_page <= last_page and len(pending) < workers:
+                    pending[next_page] = executor.submit(self._fetch_warehouse_page, url, next_page, pacer)
+                    next_page += 1
+                # 按页码顺序等待，便于尽早发现空页
+                page = min(pending)
+                future = pending.pop(page)
+                try:
+                    page_items = future.result()
+                except Exception as page_error:
+                    logger.error(f"{self._name}: 获取第 {page} 页失败: {page_error}")
+                    continue
+                if page_items is None:
+                    logger.error(f"{self._name}: 获取第 {page} 页失败")
+                    continue
+                if not page_items:
+                    logger.debug(f"{self._name}: 第 {page} 页没有物品，停止获取后续分页")
+                    last_page = page - 1
+                    for later in [p for p in pending if p > last_page]:
+                        pending.pop(later).cancel()
+                    continue
+                results[page] = page_items
+                logger.debug(f"{self._name}: 第 {page} 页获取到 {len(page_items)} 个物品")
+
+        items = []
+        for page in sorted(results):
+            if page <= last_page:
+                items.extend(results[page])
+        return items
+
+    def fetch_farm_data(self) -> Optional[Dict[str, Any]]:
+        """抓取并解析农场页面（魔力值、种植/养殖区、仓库全部分页、市场价格）"""
+        url = self.page_url
+        response = self.request(url)
+        if not response:
+            return None
+
+        data = {
+            "bonus": "0",
+            "crops": [],
+            "animals": [],
+            "warehouse": [],
+            "market": []
+        }
+        if self.profile.parse_subtitles:
+            data.update({"crop_subtitle": "", "animal_subtitle": ""})
+        if self.profile.parse_market_refresh:
+            data["market_next_refresh"] = ""
+
+        try:
+            html = etree.HTML(response.text)
+            # 农场区域只查找一次，种植区、仓库与市场共用
+            sections = self._sections(html)
+            plots = self._parse_plot_sections(html, sections)
+            if plots:
+                data.update(plots)
+            else:
+                bonus = self.parse_bonus(html)
+                if bonus is not None:
+                    data["bonus"] = bonus
+
+            if self.profile.parse_market_refresh:
+                refresh_el = _X_MARKET_REFRESH(html)
+                data["market_next_refresh"] = " ".join([text.strip() for text in refresh_el if text.strip()])
+
+            for title, section in sections:
+                if "仓库" in title:
+                    table = _X_WAREHOUSE_TABLE(section)
+                    warehouse_items = self.parse_warehouse_table(table[0]) if table else []
+                    try:
+                        total_pages = self.parse_total_pages(section)
+                        if total_pages > 1:
+                            warehouse_items.extend(self.fetch_warehouse_pages(url, total_pages))
+                    except Exception as e:
+                        logger.error(f"{self._name}: 处理仓库分页异常: {e}")
+                    data["warehouse"] = warehouse_items
+                elif "市场" in title:
+                    data["market"] = self.parse_market(section)
+            return data
+        except Exception as e:
+            logger.error(f"{self._name} 解析数据失败: {str(e)}")
+            return None
+
+
+class FarmSnapshot:
+    """单次任务内共享的农场状态快照
+
+    首次访问时抓取一次农场页面，之后种植/收获/出售的结果以增量方式应用到快照上，
+    只有操作结果无法核对时才标记失效并重新抓取。
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self.data: Optional[Dict[str, Any]] = None
+        # 每次抓取或应用增量后递增
+        self.version: int = 0
+        # 抓取次数统计
+        self.fetch_count: int = 0
+        # 种植/养殖区是否失效
+        self._stale: bool = True
+        # 仓库是否失效（收获后新增物品的 key 无法推算）
+        self._warehouse_stale: bool = False
+
+    def get(self, need_warehouse: bool = True) -> Optional[Dict[str, Any]]:
+        """获取快照数据，失效时重新抓取"""
+        with self._lock:
+            if self.data is None or self._stale or (need_warehouse and self._warehouse_stale):
+                data = self._loader()
+                self.fetch_count += 1
+                if not data:
+                    return None
+                self.data = data
+                self._stale = False
+                self._warehouse_stale = False
+                self.version += 1
+            return self.data
+
+    def invalidate(self, warehouse_only: bool = False):
+        """标记快照失效"""
+        with self._lock:
+            if warehouse_only:
+                self._warehouse_stale = True
+            else:
+                self._stale = True
+
+    def _items(self, item_type: str) -> List[Dict[str, Any]]:
+        key = "crops" if item_type == "crop" else "animals"
+        return (self.data or {}).get(key, [])
+
+    def apply_plant(self, item_type: str, item_id) -> bool:
+        """种植/养殖成功后将对应空闲位置标记为生长中"""
+        with self._lock:
+            for item in self._items(item_type):
+                if item.get("state") == "empty" and str(item.get("id")) == str(item_id):
+                    grow_time = item.get("grow_time", "")
+                    item["state"] = "growing"
+                    item["status"] = f"剩余时间: {grow_time}" if grow_time else "生长中"
+                    item["remaining_time"] = grow_time
+                    self.version += 1
+                    return True
+            self._stale = True
+            return False
+
+    def apply_harvest_all(self) -> List[str]:
+        """一键收获成功后将成熟项标记为空闲，返回收获的名称列表"""
+        with self._lock:
+            harvested = []
+            for item_type in ("crop", "animal"):
+                for item in self._items(item_type):
+                    if item.get("state") == "ripe":
+                        item["state"] = "empty"
+                        item.pop("status", None)
+                        item.pop("remaining_time", None)
+                        harvested.append(item.get("name"))
+            if harvested:
+                self._warehouse_stale = True
+                self.version += 1
+            return harvested
+
+    def apply_sell(self, key: str) -> bool:
+        """出售成功后从仓库移除对应物品"""
+        with self._lock:
+            warehouse = (self.data or {}).get("warehouse", [])
+            for index, item in enumerate(warehouse):
+                if item.get("key") == key:
+                    warehouse.pop(index)
+                    self.version += 1
+                    return True
+            self._warehouse_stale = True
+            return False
+
+    def apply_plots(self, plots: Dict[str, Any]):
+        """以操作响应页面中解析出的火花与种植/养殖区覆盖快照"""
+        with self._lock:
+            if self.data is None:
+                return
+            for key in ("bonus", "crops", "animals"):
+                if key in plots:
+                    self.data[key] = plots[key]
+            self.version += 1
+
+
+@dataclass
+class FarmRun:
+    """单次任务的上下文，随任务显式传递给各步骤"""
+    task_name: str
+    # 是否总是发送通知，否则仅在有操作时通知
+    notify_always: bool = True
+    # 本次任务共享的农场快照，未启用快照时为 None
+    snapshot: Optional[FarmSnapshot] = None
+
+
+class FarmRunner:
+    """农场任务编排
+
+    同一插件的定时任务、智能调度与补充任务共用 RipeScheduler 的执行锁，同一时间只执行一个，
+    避免重复出售/种植同一物品，也避免任务中途重置请求计数与预算；
+    任务按配置依次执行自动种植、自动出售、临期出售，结束后按最新数据安排下一次智能调度；
+    批量操作未在时限内完成的部分登记到插件数据，由补充任务继续。
+    具体的抓取、出售、种植与通知由插件以回调提供。
+    """
+
+    def __init__(self, name: str, engine: FarmEngine, scheduler: RipeScheduler,
+                 get_data: Callable[[str], Any], save_data: Callable[[str, Any], None],
+                 update_job: Callable[[], None],
+                 sell_all: Callable[[dict], Any], plant_all: Callable[[dict], Any],
+                 fetch_data: Callable[[FarmRun], Optional[Dict[str, Any]]],
+                 run_auto_plant: Callable[[FarmRun], Dict[str, List[str]]],
+                 run_auto_sell: Callable[[FarmRun], Dict[str, Any]],
+                 run_expiry_sale: Callable[[FarmRun], List[str]],
+                 send_message: Callable[[Dict[str, Any], Optional[Dict[str, Any]]], None],
+                 use_snapshot: bool = False):
+        """
+        :param name: 插件名称，用于日志前缀
+        :param get_data: 读取插件数据
+        :param save_data: 保存插件数据
+        :param update_job: 重新注册插件公共服务
+        :param sell_all: 一键出售，补充任务以 {"keys": 剩余物品} 调用
+        :param plant_all: 一键种植/养殖，补充任务以 {"type": 类型, "keys": 剩余位置} 调用
+        :param fetch_data: 抓取农场数据
+        :param run_auto_plant: 自动收获与种植，返回 {"harvest": [...], "plant": [...]}
+        :param run_auto_sell: 自动出售，返回出售结果
+        :param run_expiry_sale: 临期出售，返回出售记录
+        :param send_message: 发送任务通知 (logs, data)
+        :param use_snapshot: 是否在任务内共享一份农场快照
+        """
+        self._name = name
+        self._engine = engine
+        self._scheduler = scheduler
+        self._get_data = get_data
+        self._save_data = save_data
+        self._update_job = update_job
+        self._sell_all = sell_all
+        self._plant_all = plant_all
+        self._fetch_data = fetch_data
+        self._run_auto_plant = run_auto_plant
+        self._run_auto_sell = run_auto_sell
+        self._run_expiry_sale = run_expiry_sale
+        self._send_message = send_message
+        self._use_snapshot = use_snapshot
+        # 配置
+        self._enabled = False
+        self._notify = False
+        self._auto_plant = False
+        self._auto_sell = False
+        self._expiry_sale = False
+
+    def configure(self, enabled: bool, notify: bool, auto_plant: bool, auto_sell: bool, expiry_sale: bool):
+        """更新任务配置"""
+        self._enabled = enabled
+        self._notify = notify
+        self._auto_plant = auto_plant
+        self._auto_sell = auto_sell
+        self._expiry_sale = expiry_sale
+
+    @property
+    def auto_enabled(self) -> bool:
+        """是否启用了任一自动化操作"""
+        return self._auto_plant or self._auto_sell or self._expiry_sale
+
+    def next_auto_run(self) -> Optional[datetime]:
+        """注册智能调度任务时的唤醒时间，无需唤醒时返回 None"""
+        return self._scheduler.restore(self._get_data("next_run_time"))
+
+    def run(self, task_name: str, notify_always: bool = True):
+        """
+        执行自动化操作并更新状态，结束后按最新数据安排下一次智能调度
+        :param task_name: 任务名称，用于日志
+        :param notify_always: 是否总是发送通知，否则仅在有操作时通知
+        """
+        # 同一时间只执行一个任务，重叠的触发合并到正在执行的任务
+        if not self._scheduler.try_begin():
+            logger.info(f"{self._name}: 已有任务正在执行，本次{task_name}合并到该任务")
+            return
+        logger.info(f"{self._name} {task_name}开始执行")
+        self._save_data("last_run", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+        logs = {'harvest': [], 'plant': [], 'sell': None, 'expiry_sell': []}
+        data = None
+        run = FarmRun(task_name=task_name, notify_always=notify_always)
+        if self._use_snapshot:
+            # 本次任务共享一份农场快照，避免每个步骤重复抓取页面
+            run.snapshot = FarmSnapshot(lambda: self._fetch_data(run))
+        self._engine.begin_run()
+
+        try:
+            # 1. 自动种植/养殖 (包含收获)
+            if self._auto_plant:
+                plant_logs = self._run_auto_plant(run)
+                if plant_logs.get('harvest'):
+                    logs['harvest'].extend(plant_logs['harvest'])
+                if plant_logs.get('plant'):
+                    logs['plant'].extend(plant_logs['plant'])
+
+            # 2. 自动出售
+            if self._auto_sell:
+                sell_logs = self._run_auto_sell(run)
+                if sell_logs:
+                    logs['sell'] = sell_logs
+
+            # 3. 临期自动出售
+            if self._expiry_sale:
+                expiry_logs = self._run_expiry_sale(run)
+                if expiry_logs:
+                    logs['expiry_sell'].extend(expiry_logs)
+
+            # 4. 更新状态数据
+            data = run.snapshot.get() if run.snapshot else self._fetch_data(run)
+            if data:
+                self._save_data("farm_status", data)
+            if self._auto_plant:
+                self._scheduler.record_plots(data, changed=bool(logs['harvest'] or logs['plant']))
+
+            # 发送通知: 定时任务只要通知开启就发送，智能调度仅在有操作时发送
+            if self._notify and (notify_always or any(logs.values())):
+                self._send_message(logs, data)
+
+        except Exception as e:
+            logger.error(f"{self._name} {task_name}执行失败: {str(e)}")
+        finally:
+            logger.info(f"{self._name}: 本次任务共发出 {self._engine.end_run()} 个请求")
+            self._scheduler.finish()
+            if run.snapshot:
+                logger.info(f"{self._name}: 本次任务抓取农场页面 {run.snapshot.fetch_count} 次，快照版本 v{run.snapshot.version}")
+
+        self.plan_next(data)
+
+    def plan_next(self, data: Optional[Dict[str, Any]]):
+        """按最新农场数据安排下一次智能调度"""
+        if not self._enabled or not self.auto_enabled:
+            self._scheduler.reset()
+            return
+        next_run = self._scheduler.plan(data, plots=self._auto_plant, expiry=self._expiry_sale)
+        if next_run:
+            self._save_data("next_run_time", next_run.strftime('%Y-%m-%d %H:%M:%S'))
+            self._update_job()
+        elif self._scheduler.idle:
+            # 暂停唤醒，移除已注册的智能调度任务
+            self._save_data("next_run_time", None)
+            self._update_job()
+
+    def defer(self, action: str, payload: dict, pending: List[str]):
+        """登记未在时限内完成的批量操作，由补充任务稍后继续"""
+        followups = self._get_data("pending_actions") or {}
+        if pending:
+            followups[action] = {**payload, "keys": pending}
+        elif action in followups:
+            followups.pop(action)
+        else:
+            return
+        self._save_data("pending_actions", followups)
+        if pending:
+            self._update_job()
+
+    def followup(self):
+        """补充任务：继续执行上次未完成的批量出售/种植，已有任务在执行时保留待办稍后再试"""
+        if not self._scheduler.try_begin():
+            logger.info(f"{self._name}: 已有任务正在执行，补充任务稍后再试")
+            # 待办仍在插件数据中，重新注册后补充任务会再次安排
+            self._update_job()
+            return
+        followups = self._get_data("pending_actions") or {}
+        self._save_data("pending_actions", {})
+        self._engine.begin_run()
+        try:
+            for action, payload in followups.items():
+                logger.info(f"{self._name}: 继续未完成的批量操作 {action}，剩余 {len(payload.get('keys') or [])} 项")
+                if action == "sell":
+                    self._sell_all(payload)
+                else:
+                    self._plant_all(payload)
+        except Exception as e:
+            logger.error(f"{self._name}: 补充任务执行失败: {e}")
+        finally:
+            logger.info(f"{self._name}: 本次任务共发出 {self._engine.end_run()} 个请求")
+            self._scheduler.finish()
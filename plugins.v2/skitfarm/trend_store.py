@@ -0,0 +1,228 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.log import logger
+
+
+class TrendStore:
+    """市场价格时间序列存储
+
+    每个物品的价格以 (物品, 时间戳, 价格) 追加写入 SQLite，价格不变时按最小间隔去重，
+    超过保留天数的数据定期清理；查询时按 4 小时 / 天 / 周聚合，并支持批量统计。
+    """
+
+    # 聚合粒度(秒) 与对齐偏移(秒，周粒度对齐到周一)
+    BUCKETS: Dict[str, Tuple[int, int]] = {
+        "4h": (4 * 3600, 0),
+        "1d": (86400, 0),
+        "1w": (7 * 86400, 3 * 86400),
+    }
+    # 两次清理之间的最小间隔(秒)
+    _PRUNE_INTERVAL = 6 * 3600
+
+    def __init__(self, db_file: Path, retention_days: int = 90, min_interval: int = 3600):
+        """
+        :param db_file: 数据库文件
+        :param retention_days: 数据保留天数
+        :param min_interval: 价格未变化时两次记录的最小间隔(秒)
+        """
+        self._db_file = db_file
+        self._retention_days = max(1, int(retention_days or 1))
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        # 物品 -> (最近记录时间, 最近记录价格)
+        self._last: Dict[str, Tuple[int, float]] = {}
+        self._last_prune = 0.0
+        self._db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "item TEXT NOT NULL, ts INTEGER NOT NULL, price REAL NOT NULL, "
+                "PRIMARY KEY (item, ts)) WITHOUT ROWID"
+            )
+            for item, ts, price in conn.execute(
+                "SELECT item, ts, price FROM prices p WHERE ts = (SELECT MAX(ts) FROM prices WHERE item = p.item)"
+            ):
+                self._last[item] = (ts, price)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在事务中执行，结束后提交或回滚并关闭连接"""
+        conn = sqlite3.connect(self._db_file, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _tz_offset() -> int:
+        return time.localtime().tm_gmtoff or 0
+
+    def is_empty(self) -> bool:
+        return not self._last
+
+    def record(self, prices: Dict[str, float], ts: Optional[int] = None, force: bool = False) -> Dict[str, Optional[float]]:
+        """
+        记录一批价格
+        :param prices: 物品 -> 当前价格
+        :param ts: 记录时间戳，默认当前时间
+        :param force: 价格未变化时也强制记录
+        :return: 物品 -> 本次记录前的最近价格，无历史时为 None
+        """
+        ts = int(ts or time.time())
+        previous: Dict[str, Optional[float]] = {}
+        rows = []
+        with self._lock:
+            for item, price in prices.items():
+                last = self._last.get(item)
+                previous[item] = last[1] if last else None
+                if last and not force and last[1] == price and ts - last[0] < self._min_interval:
+                    continue
+                rows.append((item, ts, float(price)))
+                if not last or ts >= last[0]:
+                    self._last[item] = (ts, float(price))
+            if rows:
+                with self._connect() as conn:
+                    conn.executemany("INSERT OR REPLACE INTO prices (item, ts, price) VALUES (?, ?, ?)", rows)
+            self._prune()
+        return previous
+
+    def _prune(self):
+        """清理超过保留天数的数据"""
+        now = time.time()
+        if now - self._last_prune < self._PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        cutoff = int(now) - self._retention_days * 86400
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM prices WHERE ts < ?", (cutoff,))
+            self._last = {item: last for item, last in self._last.items() if last[0] >= cutoff}
+        except Exception as e:
+            logger.warning(f"清理价格历史失败: {e}")
+
+    def series(self, items: Optional[Iterable[str]] = None, bucket: str = "4h",
+               points: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        按粒度聚合价格序列
+        :param items: 物品名称，默认全部
+        :param bucket: 聚合粒度 4h/1d/1w
+        :param points: 每个物品最多返回的最近聚合点数
+        :return: 物品 -> [{"ts", "label", "time", "price"(收盘价), "min", "max", "avg", "count"}]
+        """
+        size, shift = self.BUCKETS[bucket]
+        offset = self._tz_offset() + shift
+        since = int(time.time()) - (points * size if points else self._retention_days * 86400)
+        since = (since + offset) // size * size - offset
+        params: List[Any] = [offset, size, since]
+        where = "ts >= ?"
+        names = list(items) if items is not None else None
+        if names is not None:
+            if not names:
+                return {}
+            where += f" AND item IN ({','.join('?' * len(names))})"
+            params.extend(names)
+        # 区间内最后一条记录的价格作为收盘价
+        sql = (
+            "SELECT g.item, g.bk, g.low, g.high, g.avg, g.cnt, p.price FROM ("
+            "SELECT item, (ts + ?) / ? AS bk, MIN(price) AS low, MAX(price) AS high, AVG(price) AS avg, "
+            f"COUNT(*) AS cnt, MAX(ts) AS last_ts FROM prices WHERE {where} GROUP BY item, bk) g "
+            "JOIN prices p ON p.item = g.item AND p.ts = g.last_ts ORDER BY g.item, g.bk"
+        )
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._connect() as conn:
+            label_fmt = "%m-%d %H:%M" if bucket == "4h" else "%m-%d"
+            for item, bk, low, high, avg, count, close in conn.execute(sql, params):
+                start = bk * size - offset
+                label = datetime.fromtimestamp(start).strftime(label_fmt)
+                result.setdefault(item, []).append({
+                    "ts": start,
+                    "label": label,
+                    "time": label,
+                    "price": close,
+                    "min": low,
+                    "max": high,
+                    "avg": round(avg, 2),
+                    "count": count,
+                })
+        if points:
+            result = {item: rows[-points:] for item, rows in result.items()}
+        return result
+
+    def stats(self, items: Optional[Iterable[str]] = None, days: int = 7,
+              percentiles: Iterable[int] = (50, 90)) -> Dict[str, Dict[str, float]]:
+        """
+        批量统计最近一段时间的价格
+        :param items: 物品名称，默认全部
+        :param days: 统计天数
+        :param percentiles: 需要计算的百分位
+        :return: 物品 -> {"min", "max", "avg", "count", "p50", ...}
+        """
+        since = int(time.time()) - days * 86400
+        params: List[Any] = [since]
+        where = "ts >= ?"
+        names = list(items) if items is not None else None
+        if names is not None:
+            if not names:
+                return {}
+            where += f" AND item IN ({','.join('?' * len(names))})"
+            params.extend(names)
+        grouped: Dict[str, List[float]] = {}
+        with self._connect() as conn:
+            for item, price in conn.execute(f"SELECT item, price FROM prices WHERE {where} ORDER BY item, price", params):
+                grouped.setdefault(item, []).append(price)
+
+        result: Dict[str, Dict[str, float]] = {}
+        for item, values in grouped.items():
+            count = len(values)
+            row = {
+                "min": values[0],
+                "max": values[-1],
+                "avg": round(sum(values) / count, 2),
+                "count": count,
+            }
+            for pct in percentiles:
+                # 线性插值百分位，values 已按价格升序
+                pos = (count - 1) * pct / 100
+                low = int(pos)
+                high = min(low + 1, count - 1)
+                row[f"p{pct}"] = round(values[low] + (values[high] - values[low]) * (pos - low), 2)
+            result[item] = row
+        return result
+
+    def import_legacy(self, legacy: Dict[str, Any]) -> int:
+        """
+        导入旧版 market_trends 数据
+        :return: 导入的记录数
+        """
+        rows = []
+        year = datetime.now().year
+        for item, history in ((legacy or {}).get("data") or {}).items():
+            for record in history or []:
+                try:
+                    if record.get("key"):
+                        day, _, slot = str(record["key"]).rpartition("-")
+                        ts = datetime.strptime(day, "%Y-%m-%d").timestamp() + int(slot) * 3600
+                    elif record.get("time"):
+                        ts = datetime.strptime(f"{year}-{record['time']}", "%Y-%m-%d %H:%M").timestamp()
+                    else:
+                        continue
+                    rows.append((item, int(ts), float(record.get("price") or 0)))
+                except Exception:
+                    continue
+        if not rows:
+            return 0
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR IGNORE INTO prices (item, ts, price) VALUES (?, ?, ?)", rows)
+            for item, ts, price in rows:
+                if item not in self._last or ts > self._last[item][0]:
+                    self._last[item] = (ts, price)
+        return len(rows)
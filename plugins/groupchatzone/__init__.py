@@ -1,12 +1,14 @@
 # 标准库导入
-import inspect
+import hashlib
 import pytz
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 # 第三方库导入
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from ruamel.yaml import CommentedMap
@@ -20,7 +22,7 @@ from app.helper.sites import SitesHelper
 from app.scheduler import Scheduler
 from app.log import logger
 from app.plugins import _PluginBase
-from .sites import ISiteHandler
+from .sites import SiteHandlerRegistry
 from app.schemas.types import EventType, NotificationType
 from app.utils.timer import TimerUtils
 
@@ -32,7 +34,7 @@ class GroupChatZone(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/Octopus.png"
     # 插件版本
-    plugin_version = "2.3.3"
+    plugin_version = "2.3.10"
     # 插件作者
     plugin_author = "KoWming,madrays"
     # 作者主页
@@ -51,7 +53,9 @@ class GroupChatZone(_PluginBase):
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
     # 站点处理器
-    _site_handlers = []
+    _handler_registry: Optional[SiteHandlerRegistry] = None  # 站点处理器注册表
+    _site_render: Dict[Any, bool] = {}  # 站点ID -> 是否渲染
+    _site_render_time: float = 0    # 站点渲染状态刷新时间
     
     #织梦邮件时间
     _zm_mail_time: Optional[int] = None
@@ -87,11 +91,18 @@ class GroupChatZone(_PluginBase):
     _retry_notify: bool = False     # 是否发送重试通知
     
     # 重试相关属性
-    _failed_messages: List[Dict] = []  # 存储失败消息的详细信息
-    _current_retry_count: int = 0      # 当前重试次数
-    _next_retry_time: Optional[datetime] = None       # 下次重试的精确时间
+    _failed_messages: List[Dict] = []  # 本次任务发送失败的消息
     _retry_lock: Optional[threading.Lock] = None  # 重试任务锁
-    _failed_messages_max: int = 100  # 失败消息最大保留条数，防止内存增长
+    _retry_queue_lock: Optional[threading.RLock] = None  # 重试队列锁
+    _failed_messages_max: int = 100  # 失败消息/重试队列最大保留条数，防止数据增长
+    _retry_backoff_max: int = 6 * 60  # 重试退避最大间隔(分钟)
+    _retry_batch_window: int = 60  # 到期时间相近的重试消息合并为一批执行(秒)
+    _retry_results: Dict[str, Dict] = {}  # 本轮重试结果，重试队列清空后汇总通知
+
+    # 并发发送相关属性
+    _max_site_workers: int = 8      # 同时处理的站点数
+    _max_connections: int = 4       # 全局同时进行的对外请求数
+    _connection_slots: Optional[threading.BoundedSemaphore] = None  # 对外请求许可
 
     def _prune_failed_messages(self) -> None:
         """
@@ -111,15 +122,22 @@ class GroupChatZone(_PluginBase):
         self._lock = threading.Lock()
         self._zm_lock = threading.Lock()
         self._retry_lock = threading.Lock()
+        self._retry_queue_lock = threading.RLock()
+        self._retry_results = {}
+        self._connection_slots = threading.BoundedSemaphore(self._max_connections)
         self.sites = SitesHelper()
         self.siteoper = SiteOper()
         
-        # 加载站点处理器
-        self._site_handlers = ModuleHelper.load(f'{__package__}.sites', filter_func=lambda _, obj: hasattr(obj, 'match'))
-
         # 停止现有任务
         self.stop_service()
 
+        # 加载站点处理器
+        self._handler_registry = SiteHandlerRegistry(
+            ModuleHelper.load(f'{__package__}.sites', filter_func=lambda _, obj: hasattr(obj, 'match')))
+        self._site_render = {}
+        self._site_render_time = 0
+
+        legacy_failed_messages = []
         if config:
             self._enabled = config.get("enabled", False)
             self._cron = str(config.get("cron", ""))
@@ -151,22 +169,8 @@ class GroupChatZone(_PluginBase):
             self._zm_mail_retry_count = int(config.get("zm_mail_retry_count", 0))
             self._max_zm_mail_retries = int(config.get("max_zm_mail_retries", 3))
             
-            # 恢复重试相关状态
-            self._failed_messages = config.get("failed_messages", [])
-            # 清理超量的失败消息，避免历史数据过大
-            self._prune_failed_messages()
-            self._current_retry_count = int(config.get("current_retry_count", 0))
-            next_retry_time_str = config.get("next_retry_time")
-            if next_retry_time_str:
-                try:
-                    # 确保从字符串转换回带时区的datetime对象
-                    tz = pytz.timezone(settings.TZ)
-                    parsed = datetime.fromisoformat(next_retry_time_str)
-                    self._next_retry_time = parsed if parsed.tzinfo else tz.localize(parsed)
-                except (ValueError, TypeError):
-                    self._next_retry_time = None
-            else:
-                self._next_retry_time = None
+            # 旧版本保存在配置中的失败消息，迁移到重试队列
+            legacy_failed_messages = config.get("failed_messages") or []
 
             # 过滤掉已删除的站点
             all_sites = [site.id for site in self.siteoper.list_order_by_pri()] + [site.get("id") for site in self.__custom_sites()]
@@ -213,15 +217,20 @@ class GroupChatZone(_PluginBase):
                         self._scheduler.start()
                         
                     # 立即执行一次时，清除原有的重试状态
-                    if self._failed_messages:
+                    legacy_failed_messages = []
+                    if self._load_retry_queue():
                         logger.info("立即执行一次，清除原有的重试状态")
-                        self._failed_messages = []
-                        self._current_retry_count = 0
-                        # 保存配置以清理重试状态
-                        self.__update_config()
+                        self._save_retry_queue({})
                 except Exception as e:
                     logger.error(f"启动一次性任务失败: {str(e)}")
 
+        # 恢复持久化的重试队列，逐条重新安排重试任务
+        if self._enabled:
+            try:
+                self._restore_retry_queue(legacy_failed_messages)
+            except Exception as e:
+                logger.error(f"恢复重试队列失败: {str(e)}")
+
     def get_site_handler(self, site_info: dict):
         """
         获取站点对应的处理器
@@ -240,23 +249,30 @@ class GroupChatZone(_PluginBase):
         site_info["retry_interval"] = self._retry_interval
         
         # 补充render字段，确保从数据库获取最新状态
-        if site_info.get("id"):
-            try:
-                site = self.siteoper.get(site_info.get("id"))
-                if site:
-                    site_info["render"] = site.render
-            except Exception as e:
-                logger.error(f"获取站点渲染状态失败: {str(e)}")
+        site_id = site_info.get("id")
+        if site_id:
+            self._refresh_site_render()
+            if site_id in self._site_render:
+                site_info["render"] = self._site_render[site_id]
 
-        for handler_class in self._site_handlers:
+        if not self._handler_registry:
+            return None
+        handler = self._handler_registry.get(site_info)
+        if handler:
+            handler.request_slots = self._connection_slots
+        return handler
 
-            if (inspect.isclass(handler_class) and 
-                issubclass(handler_class, ISiteHandler) and 
-                handler_class != ISiteHandler):
-                handler = handler_class(site_info)
-                if handler.match():
-                    return handler
-        return None
+    def _refresh_site_render(self, max_age: int = 60):
+        """
+        批量刷新站点渲染状态，一次查询供本次任务内的所有站点使用
+        """
+        if self._site_render and time.time() - self._site_render_time < max_age:
+            return
+        try:
+            self._site_render = {site.id: site.render for site in self.siteoper.list_order_by_pri()}
+            self._site_render_time = time.time()
+        except Exception as e:
+            logger.error(f"获取站点渲染状态失败: {str(e)}")
 
     def get_state(self) -> bool:
         return self._enabled
@@ -304,10 +320,7 @@ class GroupChatZone(_PluginBase):
                 "thirteencity_auto_buy_blessing": self._thirteencity_auto_buy_blessing,
                 "retry_count": self._retry_count,
                 "retry_interval": self._retry_interval,
-                "retry_notify": self._retry_notify,
-                "failed_messages": self._failed_messages,
-                "current_retry_count": self._current_retry_count,
-                "next_retry_time": self._next_retry_time.isoformat() if self._next_retry_time else None
+                "retry_notify": self._retry_notify
             }
         )
 
@@ -466,19 +479,7 @@ class GroupChatZone(_PluginBase):
                 logger.info(f"已添加织梦定时任务（date）：将在 {next_time.strftime('%Y-%m-%d %H:%M:%S')} 运行")
             else:
                 logger.info("没有选中织梦站点，不添加织梦定时任务")
-        
-        # 如果有重试任务，添加到服务列表中
-        if self._next_retry_time and self._next_retry_time > datetime.now(tz=pytz.timezone(settings.TZ)):
-            services.append({
-                "id": "GroupChatZoneRetry",
-                "name": f"群聊区 - 重试任务 (第{self._current_retry_count + 1}次)",
-                "trigger": "date",
-                "func": self._execute_retry,
-                "kwargs": {
-                    "run_date": self._next_retry_time
-                }
-            })
-            logger.info(f"已注册重试任务，将在 {self._next_retry_time.strftime('%Y-%m-%d %H:%M:%S')} 执行")
+
 
         if services:
             return services
@@ -718,142 +719,38 @@ class GroupChatZone(_PluginBase):
                         logger.error(f"获取大青虫站点特权信息失败: {str(e)}")
                     break
             
-            # 执行站点发送消息
+            # 执行站点发送消息：每个站点按自身节奏独立发送，站点之间并行
             site_results = {}
             all_feedback = []
-            
+            timelines = []
             for site in do_sites:
-                site_name = site.get("name")
-                logger.info(f"开始处理站点: {site_name}")
-                messages = site_msgs.get(site_name, [])
-
+                messages = site_msgs.get(site.get("name"), [])
                 if not messages:
-                    logger.warning(f"站点 {site_name} 没有需要发送的消息！")
+                    logger.warning(f"站点 {site.get('name')} 没有需要发送的消息！")
                     continue
+                timelines.append((site, messages))
+
+            if timelines:
+                start_time = time.time()
+                with ThreadPoolExecutor(max_workers=min(self._max_site_workers, len(timelines)),
+                                        thread_name_prefix="groupchatzone") as executor:
+                    futures = [executor.submit(self._run_site_timeline, site, messages, dqc_privileges)
+                               for site, messages in timelines]
+                    # 按站点顺序汇总结果，保持通知内容顺序稳定
+                    for (site, _), future in zip(timelines, futures):
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error(f"处理站点 {site.get('name')} 时发生异常: {str(e)}")
+                            continue
+                        if not result:
+                            continue
+                        self._failed_messages.extend(result.pop("retry_messages"))
+                        all_feedback.extend(result["feedback"])
+                        site_results[site.get("name")] = result
+                logger.info(f"{len(timelines)} 个站点消息发送完成，耗时 {time.time() - start_time:.1f} 秒")
 
-                success_count = 0
-                failure_count = 0
-                failed_messages = []
-                skipped_messages = []
-                site_feedback = []
-                
-                # 获取站点处理器
-                try:
-                    handler = self.get_site_handler(site)
-                    if not handler:
-                        logger.error(f"站点 {site_name} 没有对应的处理器")
-                        continue
-                except Exception as e:
-                    logger.error(f"获取站点 {site_name} 的处理器失败: {str(e)}")
-                    continue
-
-                for i, message_info in enumerate(messages):
-                    # 检查是否需要过滤消息
-                    if site_name == "大青虫" and dqc_privileges:
-                        msg_type = message_info.get("type")
-                        if msg_type == "vip":
-                            # 获取等级名称
-                            level_name = dqc_privileges.get("level_name", "")
-                            # 定义高等级列表
-                            high_levels = ["养老族", "发布员", "总版主", "管理员", "维护开发员", "主管"]
-                            
-                            # 如果等级高于VIP,直接跳过
-                            if level_name in high_levels:
-                                skip_reason = f"你都已经是 [{level_name}] 了，还求什么VIP？"
-                                logger.info(f"跳过求VIP消息，{skip_reason}")
-                                skipped_messages.append({
-                                    "message": message_info.get("content"),
-                                    "reason": skip_reason
-                                })
-                                continue
-                                
-                            # 如果等级不是高等级,则判断VIP到期时间
-                            vip_end = dqc_privileges.get("vip_end_time", "")
-                            if vip_end == "":
-                                logger.info(f"可以发送求VIP消息，因为VIP已到期")
-                            else:
-                                skip_reason = f"VIP未到期，到期时间: {vip_end}"
-                                logger.info(f"跳过求VIP消息，{skip_reason}")
-                                skipped_messages.append({
-                                    "message": message_info.get("content"),
-                                    "reason": skip_reason
-                                })
-                                continue
-                        if msg_type == "rainbow":
-                            rainbow_end = dqc_privileges.get("rainbow_end_time", "")
-                            if rainbow_end == "":
-                                logger.info(f"可以发送求彩虹ID消息，因为彩虹ID已到期")
-                            else:
-                                skip_reason = f"彩虹ID未到期，到期时间: {rainbow_end}"
-                                logger.info(f"跳过求彩虹ID消息，{skip_reason}")
-                                skipped_messages.append({
-                                    "message": message_info.get("content"),
-                                    "reason": skip_reason
-                                })
-                                continue
-                    
-                    try:
-                        # 发送消息
-                        success, msg = handler.send_messagebox(message_info.get("content"))
-                        if success:
-                            success_count += 1
-                            # 获取反馈
-                            if self._get_feedback:
-                                try:
-                                    time.sleep(self._feedback_timeout)  # 等待反馈
-                                    feedback = handler.get_feedback(message_info.get("content"))
-                                    if feedback:
-                                        site_feedback.append(feedback)
-                                        all_feedback.append(feedback)
-                                except Exception as e:
-                                    logger.error(f"获取站点 {site_name} 的反馈失败: {str(e)}")
-                        else:
-                            failure_count += 1
-                            failed_messages.append(f"{message_info.get('content')}")
-                            # 记录失败消息到全局列表，用于重试
-                            self._failed_messages.append({
-                                "site_name": site_name,
-                                "site_id": site.get("id"),
-                                "message": message_info.get("content"),
-                                "interval": message_info.get("interval"),
-                                "error": msg
-                            })
-                            
-                    except Exception as e:
-                        logger.error(f"向站点 {site_name} 发送消息 '{message_info.get('content')}' 失败: {str(e)}")
-                        failure_count += 1
-                        failed_messages.append(message_info.get("content"))
-                        # 记录失败消息到全局列表，用于重试
-                        self._failed_messages.append({
-                            "site_name": site_name,
-                            "site_id": site.get("id"),
-                            "message": message_info.get("content"),
-                            "interval": message_info.get("interval"),
-                            "error": str(e)
-                        })
-
-                    if i < len(messages) - 1:
-                        # 优先使用配置的自定义间隔
-                        msg_interval = message_info.get("interval")
-                        if msg_interval is not None:
-                            interval = msg_interval
-                            logger.info(f"使用自定义间隔: 等待 {interval} 秒后继续发送下一条消息...")
-                        else:
-                            # 如果是Moment、天枢站点，使用默认30秒间隔
-                            interval = 30 if "Moment" in site_name or "天枢" in site_name else self._interval_cnt
-                            logger.info(f"等待 {interval} 秒后继续发送下一条消息...")
-                        time.sleep(interval)
-                logger.debug(f"站点 {site_name} 消息处理完成，成功消息数: {success_count}")
-
-                site_results[site_name] = {
-                    "success_count": success_count,
-                    "failure_count": failure_count,
-                    "failed_messages": failed_messages,
-                    "skipped_messages": skipped_messages,
-                    "feedback": site_feedback
-                }
-
-            # 保存配置以持久化失败消息（保存前先清理）
+            # 保存配置（保存前先清理失败消息）
             self._prune_failed_messages()
             self.__update_config()
             
@@ -864,17 +761,11 @@ class GroupChatZone(_PluginBase):
                 except Exception as e:
                     logger.error(f"发送通知失败: {str(e)}")
             
-            # 然后检查是否有失败消息，如果有则创建重试任务
-            if self._failed_messages and self._retry_count > 0:
-                logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，开始创建重试任务")
-                try:
-                    self._create_retry_task()
-                except Exception as e:
-                    logger.error(f"创建重试任务失败: {str(e)}")
-            elif self._failed_messages:
-                logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，但重试次数为0，不创建重试任务")
-            else:
-                logger.info("没有失败消息，无需创建重试任务")
+            # 然后将失败消息加入重试队列，每条消息按自身的退避时间重试
+            try:
+                self._create_retry_task([site.get("id") for site in do_sites])
+            except Exception as e:
+                logger.error(f"创建重试任务失败: {str(e)}")
             
         except Exception as e:
             logger.error(f"发送站点消息时发生异常: {str(e)}")
@@ -887,6 +778,162 @@ class GroupChatZone(_PluginBase):
                     pass
             logger.debug("喊话任务执行完成")
 
+    def _run_site_timeline(self, site: dict, messages: List[Dict], dqc_privileges: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        按站点自身的节奏依次发送消息（独立时间线），等待期间不占用对外请求许可
+        :return: 站点发送结果，retry_messages 为待重试的失败消息；站点没有处理器时返回 None
+        """
+        site_name = site.get("name")
+        logger.info(f"开始处理站点: {site_name}")
+
+        success_count = 0
+        failure_count = 0
+        failed_messages = []
+        skipped_messages = []
+        site_feedback = []
+        retry_messages = []
+        deferred_feedback = []
+
+        # 获取站点处理器
+        try:
+            handler = self.get_site_handler(site)
+            if not handler:
+                logger.error(f"站点 {site_name} 没有对应的处理器")
+                return None
+        except Exception as e:
+            logger.error(f"获取站点 {site_name} 的处理器失败: {str(e)}")
+            return None
+
+        for i, message_info in enumerate(messages):
+            # 检查是否需要过滤消息
+            if site_name == "大青虫" and dqc_privileges:
+                msg_type = message_info.get("type")
+                if msg_type == "vip":
+                    # 获取等级名称
+                    level_name = dqc_privileges.get("level_name", "")
+                    # 定义高等级列表
+                    high_levels = ["养老族", "发布员", "总版主", "管理员", "维护开发员", "主管"]
+
+                    # 如果等级高于VIP,直接跳过
+                    if level_name in high_levels:
+                        skip_reason = f"你都已经是 [{level_name}] 了，还求什么VIP？"
+                        logger.info(f"跳过求VIP消息，{skip_reason}")
+                        skipped_messages.append({
+                            "message": message_info.get("content"),
+                            "reason": skip_reason
+                        })
+                        continue
+
+                    # 如果等级不是高等级,则判断VIP到期时间
+                    vip_end = dqc_privileges.get("vip_end_time", "")
+                    if vip_end == "":
+                        logger.info(f"可以发送求VIP消息，因为VIP已到期")
+                    else:
+                        skip_reason = f"VIP未到期，到期时间: {vip_end}"
+                        logger.info(f"跳过求VIP消息，{skip_reason}")
+                        skipped_messages.append({
+                            "message": message_info.get("content"),
+                            "reason": skip_reason
+                        })
+                        continue
+                if msg_type == "rainbow":
+                    rainbow_end = dqc_privileges.get("rainbow_end_time", "")
+                    if rainbow_end == "":
+                        logger.info(f"可以发送求彩虹ID消息，因为彩虹ID已到期")
+                    else:
+                        skip_reason = f"彩虹ID未到期，到期时间: {rainbow_end}"
+                        logger.info(f"跳过求彩虹ID消息，{skip_reason}")
+                        skipped_messages.append({
+                            "message": message_info.get("content"),
+                            "reason": skip_reason
+                        })
+                        continue
+
+            try:
+                # 发送消息
+                with self._connection_slots:
+                    success, msg = handler.send_messagebox(message_info.get("content"))
+                if success:
+                    success_count += 1
+                    # 获取反馈
+                    if self._get_feedback:
+                        if handler.defer_feedback:
+                            # 群聊区反馈在站点消息发送完后统一收集
+                            deferred_feedback.append(message_info.get("content"))
+                        else:
+                            try:
+                                time.sleep(self._feedback_timeout)  # 等待反馈
+                                with self._connection_slots:
+                                    feedback = handler.get_feedback(message_info.get("content"))
+                                if feedback:
+                                    site_feedback.append(feedback)
+                            except Exception as e:
+                                logger.error(f"获取站点 {site_name} 的反馈失败: {str(e)}")
+                else:
+                    failure_count += 1
+                    failed_messages.append(f"{message_info.get('content')}")
+                    # 记录失败消息到全局列表，用于重试
+                    retry_messages.append({
+                        "site_name": site_name,
+                        "site_id": site.get("id"),
+                        "message": message_info.get("content"),
+                        "interval": message_info.get("interval"),
+                        "error": msg
+                    })
+
+            except Exception as e:
+                logger.error(f"向站点 {site_name} 发送消息 '{message_info.get('content')}' 失败: {str(e)}")
+                failure_count += 1
+                failed_messages.append(message_info.get("content"))
+                # 记录失败消息到全局列表，用于重试
+                retry_messages.append({
+                    "site_name": site_name,
+                    "site_id": site.get("id"),
+                    "message": message_info.get("content"),
+                    "interval": message_info.get("interval"),
+                    "error": str(e)
+                })
+
+            if i < len(messages) - 1:
+                # 优先使用配置的自定义间隔
+                msg_interval = message_info.get("interval")
+                if msg_interval is not None:
+                    interval = msg_interval
+                    logger.info(f"使用自定义间隔: 等待 {interval} 秒后继续发送下一条消息...")
+                else:
+                    # 如果是Moment、天枢站点，使用默认30秒间隔
+                    interval = 30 if "Moment" in site_name or "天枢" in site_name else self._interval_cnt
+                    logger.info(f"等待 {interval} 秒后继续发送下一条消息...")
+                time.sleep(interval)
+
+        if deferred_feedback:
+            site_feedback.extend(self._collect_deferred_feedback(handler, site_name, deferred_feedback))
+        logger.debug(f"站点 {site_name} 消息处理完成，成功消息数: {success_count}")
+
+        return {
+            "success_count": success_count,
+            "failure_count": failure_count,
+            "failed_messages": failed_messages,
+            "skipped_messages": skipped_messages,
+            "feedback": site_feedback,
+            "retry_messages": retry_messages
+        }
+
+    def _collect_deferred_feedback(self, handler, site_name: str, messages: List[str]) -> List[Dict]:
+        """
+        站点消息发送完后统一获取群聊区反馈，处理器每次抓取群聊区即可确认所有待确认的消息
+        """
+        feedbacks = []
+        time.sleep(self._feedback_timeout)  # 等待反馈
+        for message in messages:
+            try:
+                feedback = handler.get_feedback(message)
+                if feedback:
+                    feedbacks.append(feedback)
+            except Exception as e:
+                logger.error(f"获取站点 {site_name} 的反馈失败: {str(e)}")
+        return feedbacks
+
     def reregister_plugin(self) -> None:
         """
         重新注册插件
@@ -1193,12 +1240,13 @@ class GroupChatZone(_PluginBase):
                     self._scheduler.shutdown()
                 self._scheduler = None
             
-            # 清理重试任务
-            self._next_retry_time = None
-            
-            # 重置重试相关状态
+            # 关闭缓存的站点处理器会话
+            if self._handler_registry:
+                self._handler_registry.clear()
+
+            # 重试任务随调度器一同停止，重试队列已持久化，下次启动时恢复
             self._failed_messages = []
-            self._current_retry_count = 0
+            self._retry_results = {}
             
         except Exception as e:
             logger.error(f"退出插件失败：{str(e)}")
@@ -1334,6 +1382,7 @@ class GroupChatZone(_PluginBase):
                 failed_messages = []
                 skipped_messages = []
                 site_feedback = []
+                deferred_feedback = []
                 
                 # 获取站点处理器
                 try:
@@ -1356,14 +1405,18 @@ class GroupChatZone(_PluginBase):
                             success_count += 1
                             # 获取反馈
                             if self._get_feedback:
-                                try:
-                                    time.sleep(self._feedback_timeout)  # 等待反馈
-                                    feedback = handler.get_feedback(message_info.get("content"))
-                                    if feedback:
-                                        site_feedback.append(feedback)
-                                        all_feedback.append(feedback)
-                                except Exception as e:
-                                    logger.error(f"获取站点 {site_name} 的反馈失败: {str(e)}")
+                                if handler.defer_feedback:
+                                    # 群聊区反馈在站点消息发送完后统一收集
+                                    deferred_feedback.append(message_info.get("content"))
+                                else:
+                                    try:
+                                        time.sleep(self._feedback_timeout)  # 等待反馈
+                                        feedback = handler.get_feedback(message_info.get("content"))
+                                        if feedback:
+                                            site_feedback.append(feedback)
+                                            all_feedback.append(feedback)
+                                    except Exception as e:
+                                        logger.error(f"获取站点 {site_name} 的反馈失败: {str(e)}")
                         else:
                             failure_count += 1
                             failed_messages.append(f"{message_info.get('content')}")
@@ -1399,7 +1452,12 @@ class GroupChatZone(_PluginBase):
                             interval = self._zm_interval
                             logger.info(f"等待 {interval} 秒后继续发送下一条消息...")
                         time.sleep(interval)
-                
+
+                if deferred_feedback:
+                    feedbacks = self._collect_deferred_feedback(handler, site_name, deferred_feedback)
+                    site_feedback.extend(feedbacks)
+                    all_feedback.extend(feedbacks)
+
                 # 获取最新邮件时间
                 try:
                     logger.info(f"{site_name} 站点消息发送完成，获取最新邮件时间...")
@@ -1432,7 +1490,7 @@ class GroupChatZone(_PluginBase):
                     "handler": handler
                 }
 
-            # 保存配置以持久化失败消息
+            # 保存配置
             self.__update_config()
             
             # 先发送任务完成通知
@@ -1442,17 +1500,11 @@ class GroupChatZone(_PluginBase):
                 except Exception as e:
                     logger.error(f"发送通知失败: {str(e)}")
             
-            # 然后检查是否有失败消息，如果有则创建重试任务
-            if self._failed_messages and self._retry_count > 0:
-                logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，开始创建重试任务")
-                try:
-                    self._create_retry_task()
-                except Exception as e:
-                    logger.error(f"创建重试任务失败: {str(e)}")
-            elif self._failed_messages:
-                logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，但重试次数为0，不创建重试任务")
-            else:
-                logger.info("没有失败消息，无需创建重试任务")
+            # 然后将失败消息加入重试队列，每条消息按自身的退避时间重试
+            try:
+                self._create_retry_task([site.get("id") for site in zm_sites])
+            except Exception as e:
+                logger.error(f"创建重试任务失败: {str(e)}")
             
             self.reregister_plugin()
             
@@ -1467,213 +1519,342 @@ class GroupChatZone(_PluginBase):
                     pass
             logger.debug("织梦站点喊话任务执行完成")
 
-    def _create_retry_task(self):
+    @staticmethod
+    def _retry_key(site_id: Any, message: str) -> str:
         """
-        创建重试定时任务
+        重试消息去重键：同一站点的同一条消息只保留一条
         """
-        if not self._failed_messages:
-            logger.info("没有失败消息，无需创建重试任务")
-            return
-            
-        if self._current_retry_count >= self._retry_count:
-            logger.info(f"已达到最大重试次数 {self._retry_count}，不再创建重试任务")
-            return
-            
-        # 计算下次重试时间
-        next_retry_time = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(minutes=self._retry_interval)
-        
-        # 保存下次重试时间
-        self._next_retry_time = next_retry_time
+        return hashlib.md5(f"{site_id}|{message}".encode("utf-8")).hexdigest()[:16]
 
-        # 更新配置
-        self.__update_config()
-        
-        logger.info(f"已创建重试任务，将在 {next_retry_time.strftime('%Y-%m-%d %H:%M:%S')} 执行第 {self._current_retry_count + 1} 次重试")
+    @staticmethod
+    def _parse_retry_time(value: Optional[str]) -> Optional[datetime]:
+        """
+        解析重试时间，确保返回带时区的datetime对象
+        """
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+        return parsed if parsed.tzinfo else pytz.timezone(settings.TZ).localize(parsed)
 
-        # 发送重试通知（如果开关开启）
-        if self._retry_notify:
-            self._send_retry_notification(next_retry_time)
-        # 触发插件重新注册，让外部调度拾取新的重试任务
-        self.reregister_plugin()
+    def _retry_delay(self, attempts: int) -> timedelta:
+        """
+        指数退避：第 n 次重试等待 重试间隔 * 2^(n-1) 分钟，不超过最大退避间隔
+        """
+        return timedelta(minutes=min(self._retry_interval * (2 ** attempts), self._retry_backoff_max))
 
-    def _execute_retry(self):
+    def _load_retry_queue(self) -> Dict[str, Dict]:
         """
-        执行重试任务
+        读取持久化的重试队列：去重键 -> 失败消息
         """
-        if not self._retry_lock:
-            self._retry_lock = threading.Lock()
-            
-        if not self._retry_lock.acquire(blocking=False):
-            logger.warning("已有重试任务正在执行，本次重试跳过！")
+        queue = self.get_data("retry_queue")
+        return queue if isinstance(queue, dict) else {}
+
+    def _save_retry_queue(self, queue: Dict[str, Dict]):
+        """
+        保存重试队列，超过最大保留条数时丢弃最早加入的消息
+        """
+        if len(queue) > self._failed_messages_max:
+            drop_keys = list(queue.keys())[:len(queue) - self._failed_messages_max]
+            for key in drop_keys:
+                queue.pop(key, None)
+                self._remove_retry_job(key)
+            logger.warning(f"重试队列过长，已清理较早的 {len(drop_keys)} 条，仅保留最近 {self._failed_messages_max} 条")
+        self.save_data("retry_queue", queue)
+
+    def _schedule_retry_job(self, entry: Dict):
+        """
+        为单条失败消息安排重试任务，已过期的消息稍后立即执行
+        """
+        now = datetime.now(tz=pytz.timezone(settings.TZ))
+        run_date = self._parse_retry_time(entry.get("next_retry")) or now
+        if run_date < now:
+            run_date = now + timedelta(seconds=10)
+        with self._retry_queue_lock:
+            if not self._scheduler:
+                self._scheduler = BackgroundScheduler(timezone=settings.TZ)
+            self._scheduler.add_job(func=self._execute_retry, trigger='date', run_date=run_date,
+                                    id=f"GroupChatZoneRetry|{entry['key']}",
+                                    name=f"群聊区 - 重试任务 {entry.get('site_name')} (第{entry.get('attempts', 0) + 1}次)",
+                                    kwargs={"key": entry["key"]},
+                                    replace_existing=True)
+            if not self._scheduler.running:
+                self._scheduler.start()
+        logger.debug(f"已安排重试任务: {entry.get('site_name')} - {entry.get('message')}，将在 {run_date.strftime('%Y-%m-%d %H:%M:%S')} 执行")
+
+    def _remove_retry_job(self, key: str):
+        """
+        移除单条消息的重试任务
+        """
+        if not self._scheduler:
             return
-            
         try:
-            logger.info(f"开始执行第 {self._current_retry_count + 1} 次重试任务")
-            
+            self._scheduler.remove_job(f"GroupChatZoneRetry|{key}")
+        except JobLookupError:
+            pass
+
+    def _restore_retry_queue(self, legacy_failed_messages: Optional[List[Dict]] = None):
+        """
+        插件启动时恢复重试队列：迁移旧版本的失败消息，丢弃过期太久的消息，其余逐条安排重试
+        """
+        with self._retry_queue_lock:
+            queue = self._load_retry_queue()
+            now = datetime.now(tz=pytz.timezone(settings.TZ))
+            for failed_msg in legacy_failed_messages or []:
+                key = self._retry_key(failed_msg.get("site_id"), failed_msg.get("message"))
+                queue.setdefault(key, dict(failed_msg, key=key, attempts=0, next_retry=now.isoformat()))
+            if not queue:
+                return
+            if self._retry_count <= 0:
+                logger.info("重试次数为0，清空重试队列")
+                self._save_retry_queue({})
+                return
+
+            expire_before = now - timedelta(minutes=self._retry_backoff_max)
+            for key, entry in list(queue.items()):
+                next_retry = self._parse_retry_time(entry.get("next_retry"))
+                if not next_retry or next_retry < expire_before:
+                    logger.info(f"重试消息已过期，不再重试: {entry.get('site_name')} - {entry.get('message')}")
+                    queue.pop(key)
+            self._save_retry_queue(queue)
+            for entry in queue.values():
+                self._schedule_retry_job(entry)
+        if queue:
+            logger.info(f"已恢复 {len(queue)} 条待重试消息")
+
+    def _create_retry_task(self, site_ids: Optional[List[Any]] = None):
+        """
+        将本次任务的失败消息加入重试队列，每条消息单独安排重试任务
+        :param site_ids: 本次任务发送过的站点，队列中这些站点的旧消息已被本次发送取代
+        """
+        with self._retry_queue_lock:
+            queue = self._load_retry_queue()
+            superseded = [key for key, entry in queue.items() if entry.get("site_id") in (site_ids or [])]
+            for key in superseded:
+                queue.pop(key)
+                self._remove_retry_job(key)
+
             if not self._failed_messages:
-                logger.info("没有失败消息需要重试")
+                logger.info("没有失败消息，无需创建重试任务")
+                if superseded:
+                    self._save_retry_queue(queue)
                 return
-                
-            # 按站点分组失败消息
-            site_failed_messages = {}
+            if self._retry_count <= 0:
+                logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，但重试次数为0，不创建重试任务")
+                if superseded:
+                    self._save_retry_queue(queue)
+                return
+
+            next_retry = (datetime.now(tz=pytz.timezone(settings.TZ)) + self._retry_delay(0)).isoformat()
+            entries = []
             for failed_msg in self._failed_messages:
-                site_name = failed_msg["site_name"]
-                if site_name not in site_failed_messages:
-                    site_failed_messages[site_name] = []
-                site_failed_messages[site_name].append(failed_msg)
-            
-            # 执行重试
-            retry_results = {}
-            new_failed_messages = []
-            
-            for site_name, failed_msgs in site_failed_messages.items():
-                logger.info(f"重试站点 {site_name} 的失败消息")
-                
-                success_count = 0
-                failure_count = 0
-                site_new_failed_messages = []
-                
-                for i, failed_msg in enumerate(failed_msgs):
-                    try:
-                        site_id = failed_msg["site_id"]
-                        message = failed_msg["message"]
-                        
-                        # 根据站点ID重新获取站点信息和处理器
-                        all_sites = [site for site in self.sites.get_indexers() if not site.get("public")] + self.__custom_sites()
-                        site_info = None
-                        for site in all_sites:
-                            if site.get("id") == site_id:
-                                site_info = site
-                                break
-                        
-                        if not site_info:
-                            logger.error(f"重试时无法找到站点 {site_name} (ID: {site_id})")
-                            failure_count += 1
-                            site_new_failed_messages.append(failed_msg)
-                            continue
-                        
-                        # 重新创建处理器
-                        handler = self.get_site_handler(site_info)
+                key = self._retry_key(failed_msg.get("site_id"), failed_msg.get("message"))
+                if key in queue:
+                    # 同一消息重复失败时只更新错误信息
+                    queue[key]["error"] = failed_msg.get("error")
+                    continue
+                queue[key] = dict(failed_msg, key=key, attempts=0, next_retry=next_retry)
+                entries.append(queue[key])
+            self._save_retry_queue(queue)
+            entries = [entry for entry in entries if entry["key"] in queue]
+            for entry in entries:
+                self._schedule_retry_job(entry)
+
+        logger.info(f"检测到 {len(self._failed_messages)} 条失败消息，已加入重试队列，"
+                    f"将在 {self._retry_interval} 分钟后开始重试，最多重试 {self._retry_count} 次")
+
+        # 发送重试通知（如果开关开启）
+        if self._retry_notify and entries:
+            self._send_retry_notification(entries)
+
+    def _execute_retry(self, key: Optional[str] = None):
+        """
+        执行重试任务：处理所有已到期的重试消息，站点索引每批次只构建一次
+        同时到期的重试任务依次执行，后执行的任务只处理剩余的到期消息
+        """
+        if not self._retry_lock:
+            self._retry_lock = threading.Lock()
+
+        with self._retry_lock:
+            tz = pytz.timezone(settings.TZ)
+            batch: List[Dict] = []
+            try:
+                deadline = datetime.now(tz=tz) + timedelta(seconds=self._retry_batch_window)
+                with self._retry_queue_lock:
+                    batch = [entry for entry in self._load_retry_queue().values()
+                             if (self._parse_retry_time(entry.get("next_retry")) or deadline) <= deadline]
+                if not batch:
+                    logger.debug("没有到期的重试消息")
+                    return
+                # 同批次处理的消息不再单独执行
+                for entry in batch:
+                    if entry["key"] != key:
+                        self._remove_retry_job(entry["key"])
+                logger.info(f"开始执行重试任务，本批次共 {len(batch)} 条消息")
+
+                # 按站点分组失败消息
+                site_failed_messages: Dict[Any, List[Dict]] = {}
+                for entry in batch:
+                    site_failed_messages.setdefault(entry.get("site_id"), []).append(entry)
+
+                # 构建站点索引
+                all_sites = [site for site in self.sites.get_indexers() if not site.get("public")] + self.__custom_sites()
+                site_index = {site.get("id"): site for site in all_sites}
+
+                # 执行重试
+                outcomes: Dict[str, Tuple[bool, str]] = {}
+                for site_id, entries in site_failed_messages.items():
+                    site_name = entries[0].get("site_name")
+                    logger.info(f"重试站点 {site_name} 的失败消息")
+                    site_info = site_index.get(site_id)
+                    handler = None
+                    if not site_info:
+                        logger.error(f"重试时无法找到站点 {site_name} (ID: {site_id})")
+                    else:
+                        try:
+                            handler = self.get_site_handler(site_info)
+                        except Exception as e:
+                            logger.error(f"重试时获取站点 {site_name} 的处理器失败: {str(e)}")
                         if not handler:
                             logger.error(f"重试时无法创建站点 {site_name} 的处理器")
-                            failure_count += 1
-                            site_new_failed_messages.append(failed_msg)
+                    if not handler:
+                        for entry in entries:
+                            outcomes[entry["key"]] = (False, "无法找到对应的站点处理器")
+                        continue
+
+                    for i, entry in enumerate(entries):
+                        message = entry.get("message")
+                        try:
+                            with self._connection_slots:
+                                success, msg = handler.send_messagebox(message)
+                            if success:
+                                logger.info(f"重试成功: {site_name} - {message}")
+                            else:
+                                logger.warning(f"重试失败: {site_name} - {message} ({msg})")
+                            outcomes[entry["key"]] = (success, msg)
+                        except Exception as e:
+                            logger.error(f"重试异常: {site_name} - {message} - {str(e)}")
+                            outcomes[entry["key"]] = (False, str(e))
+
+                        if i < len(entries) - 1:
+                            # 优先使用消息中的自定义间隔
+                            msg_interval = entry.get("interval")
+                            if msg_interval is not None:
+                                interval = msg_interval
+                                logger.info(f"重试使用自定义间隔: 等待 {interval} 秒...")
+                            else:
+                                interval = self._interval_cnt
+                                logger.info(f"重试等待 {interval} 秒...")
+                            time.sleep(interval)
+
+                # 更新重试队列：成功或用尽重试次数的消息出队，其余按退避时间重新安排
+                rescheduled = []
+                with self._retry_queue_lock:
+                    queue = self._load_retry_queue()
+                    now = datetime.now(tz=tz)
+                    for entry in batch:
+                        current = queue.get(entry["key"])
+                        # 执行期间已被新一轮任务取代的消息保持不变
+                        if (not current or entry["key"] not in outcomes
+                                or current.get("attempts") != entry.get("attempts")
+                                or current.get("next_retry") != entry.get("next_retry")):
                             continue
-                        
-                        # 重新发送消息
-                        if "织梦" in site_name:
-                            # 尝试获取统计信息（这里简单处理，可能为空）
-                            success, msg = handler.send_messagebox(message)
-                        else:
-                            success, msg = handler.send_messagebox(message)
-                        
+                        success, msg = outcomes[entry["key"]]
+                        result = self._retry_results.setdefault(entry.get("site_name"),
+                                                                {"success_count": 0, "failure_count": 0})
                         if success:
-                            success_count += 1
-                            logger.info(f"重试成功: {site_name} - {message}")
-                        else:
-                            failure_count += 1
-                            logger.warning(f"重试失败: {site_name} - {message} ({msg})")
-                            # 记录新的失败消息
-                            site_new_failed_messages.append(failed_msg)
-                            
-                    except Exception as e:
-                        failure_count += 1
-                        logger.error(f"重试异常: {site_name} - {failed_msg['message']} - {str(e)}")
-                        # 记录新的失败消息
-                        site_new_failed_messages.append(failed_msg)
-                    
-                    if i < len(failed_msgs) - 1:
-                        # 优先使用消息中的自定义间隔
-                        msg_interval = failed_msg.get("interval")
-                        if msg_interval is not None:
-                            interval = msg_interval
-                            logger.info(f"重试使用自定义间隔: 等待 {interval} 秒...")
-                        else:
-                            interval = self._interval_cnt
-                            logger.info(f"重试等待 {interval} 秒...")
-                        time.sleep(interval)
-            
-            # 更新失败消息列表
-            self._failed_messages = new_failed_messages
-            
-            # 增加重试次数
-            self._current_retry_count += 1
-            
-            # 保存配置以持久化失败消息和重试状态（保存前先清理）
-            self._prune_failed_messages()
-            self.__update_config()
-            
-            # 清理当前执行的重试任务时间点
-            self._next_retry_time = None
+                            result["success_count"] += 1
+                            queue.pop(entry["key"])
+                            continue
+                        current["attempts"] = current.get("attempts", 0) + 1
+                        current["error"] = msg
+                        if current["attempts"] >= self._retry_count:
+                            logger.info(f"已达到最大重试次数 {self._retry_count}，不再重试: {entry.get('site_name')} - {entry.get('message')}")
+                            result["failure_count"] += 1
+                            queue.pop(entry["key"])
+                            continue
+                        current["next_retry"] = (now + self._retry_delay(current["attempts"])).isoformat()
+                        rescheduled.append(current)
+                    self._save_retry_queue(queue)
+                    for entry in rescheduled:
+                        self._schedule_retry_job(entry)
+                    remaining = len(queue)
+
+                if rescheduled:
+                    logger.info(f"重试后仍有 {len(rescheduled)} 条失败消息，已按退避时间重新安排重试")
+                    if self._retry_notify:
+                        self._send_retry_notification(rescheduled)
+                if not remaining:
+                    logger.info("所有重试任务已完成或已达到最大重试次数")
+                    retry_results, self._retry_results = self._retry_results, {}
+                    # 发送最终重试结果通知
+                    if self._notify:
+                        self._send_final_retry_notification(retry_results)
 
-            # 如果还有失败消息且未达到最大重试次数，继续创建重试任务
-            if self._failed_messages and self._current_retry_count < self._retry_count:
-                logger.info(f"重试后仍有失败消息，将创建第 {self._current_retry_count + 1} 次重试任务")
-                self._create_retry_task()
-            else:
-                logger.info("所有重试任务已完成或已达到最大重试次数")
-                # 重置重试计数
-                self._current_retry_count = 0
-                # 清空失败消息列表
-                self._failed_messages = []
-                
-                # 保存已清理的配置
-                self.__update_config()
-                
-                # 发送最终重试结果通知
-                if self._notify:
-                    self._send_final_retry_notification(retry_results)
+            except Exception as e:
+                logger.error(f"执行重试任务时发生异常: {str(e)}")
+            finally:
+                self._reschedule_unresolved(batch)
 
+    def _reschedule_unresolved(self, batch: List[Dict]):
+        """
+        重新安排本批次中未写回结果的消息：执行中断时这些消息仍在队列中，但其重试任务已执行或已被移除，
+        按当前重试次数的退避时间重新安排，避免等到插件重启才再次重试
+        """
+        if not batch:
+            return
+        try:
+            with self._retry_queue_lock:
+                queue = self._load_retry_queue()
+                now = datetime.now(tz=pytz.timezone(settings.TZ))
+                for entry in batch:
+                    current = queue.get(entry["key"])
+                    if (not current or current.get("attempts") != entry.get("attempts")
+                            or current.get("next_retry") != entry.get("next_retry")):
+                        continue
+                    retry_at = now + self._retry_delay(current.get("attempts", 0))
+                    self._schedule_retry_job(dict(current, next_retry=retry_at.isoformat()))
         except Exception as e:
-            logger.error(f"执行重试任务时发生异常: {str(e)}")
-        finally:
-            # 安全释放重试锁
-            if self._retry_lock:
-                try:
-                    if self._retry_lock.locked():
-                        self._retry_lock.release()
-                except (RuntimeError, AttributeError):
-                    pass
+            logger.error(f"重新安排未完成的重试消息失败: {str(e)}")
 
-    def _send_retry_notification(self, next_retry_time: datetime):
+    def _send_retry_notification(self, entries: List[Dict]):
         """
         发送重试通知
         """
-        if not self._failed_messages:
+        if not entries:
             return
-            
+
         # 按站点分组失败消息
         site_failed_messages = {}
-        for failed_msg in self._failed_messages:
-            site_name = failed_msg["site_name"]
-            if site_name not in site_failed_messages:
-                site_failed_messages[site_name] = []
-            site_failed_messages[site_name].append(failed_msg)
-        
+        for entry in entries:
+            site_failed_messages.setdefault(entry.get("site_name"), []).append(entry)
+
         # 构建通知内容
         title = "⚠️ 喊话失败重试通知"
         notification_text = ""
-        
+
         # 站点列表
         site_names = list(site_failed_messages.keys())
         notification_text += f"🌐 站点: {', '.join(site_names)}\n"
-        
+
         # 重试信息
-        notification_text += f"🔄 当前重试次数: 第{self._current_retry_count + 1}次\n"
-        notification_text += f"📊 剩余重试次数: {self._retry_count - self._current_retry_count - 1}次\n"
-        notification_text += f"⏰ 重试间隔: {self._retry_interval}分钟\n"
-        notification_text += f"🕐 下次重试时间: {next_retry_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        notification_text += f"🔄 最大重试次数: {self._retry_count}次\n"
+        notification_text += f"⏰ 重试间隔: {self._retry_interval}分钟起，每次失败后翻倍\n"
         notification_text += "\n"
-        
+
         # 失败消息详情
-        for site_name, failed_msgs in site_failed_messages.items():
+        for site_name, site_entries in site_failed_messages.items():
             notification_text += f"🚫 {site_name}失败的消息:\n"
-            for i, failed_msg in enumerate(failed_msgs, 1):
-                notification_text += f"  {i}. {failed_msg['message']}\n"
+            for i, entry in enumerate(site_entries, 1):
+                next_retry = self._parse_retry_time(entry.get("next_retry"))
+                next_retry_str = next_retry.strftime('%Y-%m-%d %H:%M:%S') if next_retry else "-"
+                notification_text += f"  {i}. {entry.get('message')}（第{entry.get('attempts', 0) + 1}次重试: {next_retry_str}）\n"
             notification_text += "\n"
-        
+
         notification_text += f"⏱️ 通知发送时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time()))}"
-        
+
         # 发送通知
         self.post_message(
             mtype=NotificationType.SiteMessage,
@@ -11,6 +11,9 @@ class ThirteenCityHandler(NexusPHPHandler):
     13City站点处理类
     """
 
+    # 判断是否为13City站点
+    site_keywords = ["13City"]
+
     BLESSING_MEDAL_NAME = "诸神赐福"
     BLESSING_MEDAL_ID = "11"
     BLESSING_BOT_NAME = "掌管啤酒瓶的神"
@@ -24,12 +27,6 @@ class ThirteenCityHandler(NexusPHPHandler):
             "medal_status": "未检查",
             "purchase_status": "未触发"
         }
-    
-    def match(self) -> bool:
-        """
-        判断是否为13City站点
-        """
-        return "13City" in self.site_name
 
     def get_feedback(self, message: str = None) -> Optional[dict]:
         """
@@ -1,6 +1,5 @@
-from typing import Tuple, Optional, Dict
+from typing import Dict, List, Optional, Tuple
 from lxml import etree
-import time
 import re
 
 from app.log import logger
@@ -11,12 +10,11 @@ class CangBaoHandler(NexusPHPHandler):
     """
     藏宝阁站点处理类
     """
-    
-    def match(self) -> bool:
-        """
-        判断是否为藏宝阁站点
-        """
-        return "藏宝阁" in self.site_name
+
+    # 判断是否为藏宝阁站点
+    site_keywords = ["藏宝阁"]
+    defer_feedback = True
+    feedback_backoff = (0, 3, 3, 3, 3)
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
@@ -30,29 +28,18 @@ class CangBaoHandler(NexusPHPHandler):
             if not result[0]:
                 return result
 
-            # 获取当前用户名
-            username = self.get_username()
-            if not username:
-                self._last_message_result = result[1]
-                return result
-
-            feedback = self._poll_feedback(username, message)
-            if feedback:
-                logger.info(f"获取到反馈消息: {feedback}")
-                result = (True, feedback)
-            else:
-                logger.info("未获取到相关反馈消息，保留发送结果")
-                
-            self._last_message_result = result[1] if result[0] else None
+            # 登记待确认反馈，获取反馈时统一轮询群聊区
+            self._last_message_result = result[1]
+            self._track_feedback(message, self._get_feedback_keywords(message))
             return result
-            
+
         except Exception as e:
             logger.error(f"获取反馈消息失败: {str(e)}")
             return result
 
-    def _poll_feedback(self, username: str, message: str = None) -> Optional[str]:
+    def _get_feedback_keywords(self, message: str = None) -> Tuple[str, ...]:
         """
-        轮询藏宝阁 shoutbox，获取系统反馈
+        根据喊话内容确定反馈关键字
         """
         reward_keyword = None
         if message:
@@ -60,27 +47,26 @@ class CangBaoHandler(NexusPHPHandler):
                 reward_keyword = "上传量"
             elif "魔力" in message:
                 reward_keyword = "魔力值"
+        return (reward_keyword, "您今天已经求过奖励啦") if reward_keyword else ("",)
 
-        for attempt in range(5):
-            if attempt > 0:
-                time.sleep(3)
-
-            response = self._send_get_request(self.shoutbox_url)
-            if not response:
-                continue
+    def _fetch_feedback_rows(self) -> Optional[List[Tuple[int, str]]]:
+        """
+        获取群聊区的系统反馈，越靠前的消息优先级越高
+        """
+        response = self._send_get_request(self.shoutbox_url)
+        if not response:
+            return None
 
-            html = etree.HTML(response.text)
-            if html is None:
-                continue
+        html = etree.HTML(response.text)
+        if html is None:
+            return None
 
-            rows = html.xpath("//td[contains(@class, 'shoutrow')][position() <= 20]")
-            for row in rows:
-                row_content = self._extract_row_text(row)
-                feedback = self._match_feedback(row_content, username, reward_keyword)
-                if feedback:
-                    return feedback
-
-        return None
+        rows = []
+        for index, row in enumerate(html.xpath("//td[contains(@class, 'shoutrow')][position() <= 20]")):
+            row_content = self._extract_row_text(row)
+            if self._match_feedback(row_content, self._get_cached_username()):
+                rows.append((-index, row_content))
+        return rows
 
     def _extract_row_text(self, row) -> str:
         """
@@ -110,4 +96,11 @@ class CangBaoHandler(NexusPHPHandler):
         """
         获取消息反馈
         """
+        if message and self._get_feedback_collector().is_tracked(message):
+            feedback = self._resolve_feedback(message)
+            if feedback:
+                logger.info(f"获取到反馈消息: {feedback}")
+            else:
+                logger.info("未获取到相关反馈消息")
+            self._last_message_result = feedback
         return super().get_feedback(message)
@@ -9,11 +9,8 @@ class DubheHandler(NexusPHPHandler):
     天枢 (Dubhe) 站点处理类
     """
 
-    def match(self) -> bool:
-        """
-        判断是否为天枢站点
-        """
-        return "天枢" in self.site_name
+    # 判断是否为天枢站点
+    site_keywords = ["天枢"]
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
@@ -9,12 +9,9 @@ class HxptHandler(NexusPHPHandler):
     """
     好学(Hxpt)站点处理类
     """
-    
-    def match(self) -> bool:
-        """
-        判断是否为好学站点
-        """
-        return "好学" in self.site_name
+
+    # 判断是否为好学站点
+    site_keywords = ["好学"]
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
@@ -3,7 +3,6 @@ import json
 import re
 from app.log import logger
 from app.utils.string import StringUtils
-from app.db.site_oper import SiteOper
 from . import ISiteHandler
 
 class LongPTHandler(ISiteHandler):
@@ -15,15 +14,14 @@ class LongPTHandler(ISiteHandler):
         super().__init__(site_info)
         # LongPT使用API接口
         self.api_url = "https://longpt.org/pt-api/v1/nexus/shoutbox/shout"
-        self.siteoper = SiteOper()
         self._last_message_result = None  # 保存最后一次消息发送结果
         
-    def match(self) -> bool:
+    @classmethod
+    def match_site(cls, site_name: str, site_url: str = "") -> bool:
         """
         判断是否为LongPT站点
         """
-        site_name = self.site_name.lower()
-        return "longpt" in site_name
+        return "longpt" in site_name.lower()
         
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
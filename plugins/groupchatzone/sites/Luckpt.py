@@ -10,11 +10,8 @@ class LuckptHandler(NexusPHPHandler):
     采用非标准的 DIV + Flex 布局，包含左侧聊天区和右侧许愿池
     """
 
-    def match(self) -> bool:
-        """
-        判断是否为 LuckPT 站点
-        """
-        return "LuckPT" in self.site_name or "幸运" in self.site_name
+    # 判断是否为 LuckPT 站点
+    site_keywords = ["LuckPT", "幸运"]
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
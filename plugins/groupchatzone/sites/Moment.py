@@ -9,12 +9,9 @@ class MomentHandler(NexusPHPHandler):
     """
     Moment站点处理类
     """
-    
-    def match(self) -> bool:
-        """
-        判断是否为Moment站点
-        """
-        return "Moment" in self.site_name
+
+    # 判断是否为Moment站点
+    site_keywords = ["Moment"]
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
@@ -5,31 +5,22 @@ import re
 
 from app.log import logger
 from app.utils.string import StringUtils
-from app.db.site_oper import SiteOper
 from . import ISiteHandler
 
 class NexusPHPHandler(ISiteHandler):
     """
     通用NexusPHP站点处理类
     """
+
+    # 通用NexusPHP站点：已有特定适配的站点由对应处理器优先匹配
+    fallback = True
     
     def __init__(self, site_info: dict):
         super().__init__(site_info)
         self.shoutbox_url = urljoin(self.site_url, "/shoutbox.php")
         self.messages_url = urljoin(self.site_url, "/messages.php")
-        self.siteoper = SiteOper()
         self._last_message_result = None  # 保存最后一次消息发送结果
-        
-    def match(self) -> bool:
-        """
-        判断是否为通用NexusPHP站点
-        """
-        # 排除已经有特定适配的站点
-        excluded_sites = ["织梦", "象站", "青蛙", "LongPT", "藏宝阁", "Moment", "13City", "好学", "PTS", "天枢", "LuckPT", "幸运", "PTLGS"]
-        if any(site in self.site_name for site in excluded_sites):
-            return False
-        return True
-        
+
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
         发送群聊区消息
@@ -8,11 +8,8 @@ class PtskitHandler(NexusPHPHandler):
     Ptskit (PTS) 站点处理器
     """
 
-    def match(self) -> bool:
-        """
-        判断是否为PTS站点
-        """
-        return "PTS" in self.site_name
+    # 判断是否为PTS站点
+    site_keywords = ["PTS"]
 
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
@@ -5,26 +5,20 @@ from lxml import etree
 
 from app.log import logger
 from app.utils.string import StringUtils
-from app.db.site_oper import SiteOper
 from . import ISiteHandler
 
 class QingwaHandler(ISiteHandler):
     """
     青蛙站点处理类
     """
+
+    # 判断是否为青蛙站点
+    site_keywords = ["青蛙"]
     
     def __init__(self, site_info: dict):
         super().__init__(site_info)
         self.shoutbox_url = urljoin(self.site_url, "/shoutbox.php")
-        self.siteoper = SiteOper()
-        
-    def match(self) -> bool:
-        """
-        判断是否为青蛙站点
-        """
-        site_name = self.site_name.lower()
-        return "青蛙" in site_name
-        
+
     def send_messagebox(self, message: str = None, callback=None) -> Tuple[bool, str]:
         """
         发送群聊区消息
@@ -2,27 +2,21 @@ from typing import Dict, Optional, Tuple
 from urllib.parse import urljoin
 
 from app.log import logger
-from app.db.site_oper import SiteOper
 from . import ISiteHandler
 
 class VicomoHandler(ISiteHandler):
     """
     Vicomo站点处理类
     """
+
+    # 判断是否为Vicomo站点
+    site_keywords = ["象站"]
     
     def __init__(self, site_info: dict):
         super().__init__(site_info)
         self.shoutbox_url = urljoin(self.site_url, "/shoutbox.php")
         self.messages_url = urljoin(self.site_url, "/messages.php")
-        self.siteoper = SiteOper()
-        
-    def match(self) -> bool:
-        """
-        判断是否为Vicomo站点
-        """
-        site_name = self.site_name.lower()
-        return "象站" in site_name
-        
+
     def send_messagebox(self, message: str) -> Tuple[bool, str]:
         """
         发送消息到喊话区并获取反馈
@@ -6,28 +6,24 @@ import re
 
 from app.log import logger
 from app.utils.string import StringUtils
-from app.db.site_oper import SiteOper
 from . import ISiteHandler
 
 class ZmHandler(ISiteHandler):
     """
     Zm站点处理类
     """
+
+    # 判断是否为Zm站点
+    site_keywords = ["织梦"]
+    defer_feedback = True
+    feedback_mention = "@{username}："
     
     def __init__(self, site_info: dict):
         super().__init__(site_info)
         self.shoutbox_url = urljoin(self.site_url, "/shoutbox.php")
         self.messages_url = urljoin(self.site_url, "/messages.php")
-        self.siteoper = SiteOper()
         self._feedback_timeout = site_info.get("feedback_timeout", 5)  # 从配置中获取反馈超时时间，默认5秒
         self._last_message_result = None  # 初始化最后一次消息发送结果
-        
-    def match(self) -> bool:
-        """
-        判断是否为Zm站点
-        :return: 是否匹配
-        """
-        return "织梦" in self.site_name.lower()
 
     def send_messagebox(self, messages: List[str] = None, callback=None, zm_stats: Dict = None) -> Tuple[bool, str]:
         """
@@ -43,32 +39,28 @@ class ZmHandler(ISiteHandler):
             elif isinstance(messages, str):
                 messages = [messages]
                 
-            result_list = []
             success_count = 0
             
-            for message in messages:
+            for i, message in enumerate(messages):
                 # 发送消息
                 result = super().send_messagebox(message, lambda response: "")
                 if not result[0]:
                     logger.error(f"发送消息失败: {message}")
                     continue
-                    
+
                 success_count += 1
                 logger.info(f"消息发送成功: {message}")
-                
-                # 等待消息发送完成
-                time.sleep(self._feedback_timeout)
-                
-                # 获取群聊区反馈
-                feedback = self._get_messagebox_feedback(message)
-                if feedback:
-                    result_list.append(feedback)
-                    logger.info(f"获取到反馈: {feedback}")
-                else:
-                    logger.warning(f"未获取到反馈: {message}")
-                    
-            # 保存结果
-            self._last_message_result = "\n".join(result_list) if result_list else None
+
+                # 登记待确认反馈，获取反馈时统一轮询群聊区
+                keywords = self._get_feedback_keywords(message)
+                if keywords:
+                    self._track_feedback(message, keywords)
+
+                if i < len(messages) - 1:
+                    time.sleep(self._feedback_timeout)
+
+            # 逐条发送时由 get_feedback 获取群聊区反馈
+            self._last_message_result = None
             
             # 只有当所有消息都发送成功时才返回True
             if success_count == len(messages):
@@ -86,6 +78,16 @@ class ZmHandler(ISiteHandler):
         :param message: 消息内容
         :return: 反馈信息字典
         """
+        # 从群聊区反馈中取出回复内容
+        content = self._resolve_feedback(message)
+        if content:
+            self._last_message_result = content.split(self.feedback_mention.format(
+                username=self._get_cached_username()))[-1].strip()
+            logger.info(f"获取到反馈: {self._last_message_result}")
+        else:
+            self._last_message_result = None
+            logger.warning(f"未获取到反馈: {message}")
+
         # 如果有最后一次消息发送结果,使用它
         if self._last_message_result:
             return {
@@ -164,29 +166,24 @@ class ZmHandler(ISiteHandler):
             logger.error(f"获取最新电力赠送邮件时间失败: {str(e)}")
             return None
 
-    def _get_messagebox_feedback(self, message: str) -> Optional[str]:
+    @staticmethod
+    def _get_feedback_keywords(message: str) -> Optional[Tuple[str, ...]]:
         """
-        从群聊区获取反馈消息
-        :param message: 发送的消息
-        :return: 反馈消息或None
+        根据消息类型确定反馈关键字
         """
-        try:
-            # 获取用户名
-            username = self.get_username()
-            if not username:
-                logger.error("获取用户名失败")
-                return None
-
-            # 先刷新页面
-            refresh_response = self._send_get_request(self.shoutbox_url)
-            if not refresh_response:
-                logger.error("刷新群聊区页面失败")
-                return None
-
-            # 等待页面刷新完成
-            time.sleep(5)
+        if "求上传" in message:
+            return "上传量", "没有理你"
+        if "求电力" in message:
+            return "电力", "没有理你"
+        logger.debug("未识别到有效的消息类型")
+        return None
 
-            # 获取群聊区页面内容
+    def _fetch_feedback_rows(self) -> Optional[List[Tuple[int, str]]]:
+        """
+        获取群聊区中皮总的反馈消息
+        :return: [(优先级, 消息内容)]，越新的消息优先级越高
+        """
+        try:
             response = self._send_get_request(self.shoutbox_url)
             if not response:
                 logger.error("获取群聊区页面失败")
@@ -194,98 +191,38 @@ class ZmHandler(ISiteHandler):
 
             # 解析HTML
             html = etree.HTML(response.text)
-            if not html:
+            if html is None:
                 logger.error("解析群聊区HTML失败")
                 return None
 
-            # 获取所有消息行
-            message_rows = html.xpath("//td[@class='shoutrow']")
-            if not message_rows:
-                logger.warning("未找到任何消息")
-                return None
-
-            # 确定消息类型
-            message_type = None
-            if "求上传" in message:
-                message_type = ("上传量", "没有理你")
-                logger.debug(f"识别到上传量请求消息,将匹配'上传量'或'没有理你'")
-            elif "求电力" in message:
-                message_type = ("电力", "没有理你")
-                logger.debug(f"识别到电力请求消息,将匹配'电力'或'没有理你'")
-
-            if not message_type:
-                logger.debug("未识别到有效的消息类型")
-                return None
-
-            # 存储匹配的消息及其时间
-            matched_messages = []
-
-            # 遍历消息行查找反馈
-            for row in message_rows:
-                try:
-                    # 提取时间前缀
-                    time_span = row.xpath(".//span[@class='date']/text()")
-                    if not time_span:
-                        continue
-                    time_prefix = time_span[0].strip()
-                    
-                    # 提取消息内容
-                    content = row.xpath("string(.)").strip()
-                    if not content:
-                        continue
-
-                    # 检查是否包含@用户名
-                    if f"@{username}：" not in content:
-                        continue
-
-                    # 检查是否包含皮总
-                    if "皮总" not in content:
-                        continue
-
-                    # 检查消息类型是否匹配
-                    if not (message_type[0] in content or message_type[1] in content):
-                        logger.debug(f"消息类型不匹配: 期望匹配'{message_type[0]}'或'{message_type[1]}', 实际内容={content}")
-                        continue
-
-                    # 提取反馈内容
-                    feedback = content.split(f"@{username}：")[-1].strip()
-                    
-                    # 验证反馈消息格式
-                    if any(keyword in feedback for keyword in ["赠送", "扣减", "没有理你"]):
-                        # 根据时间前缀确定优先级
-                        priority = 0
-                        
-                        # 处理时间前缀
-                        if "< 1分钟前" in time_prefix:
-                            # 小于1分钟的情况，给予最高优先级
-                            priority = 100
-                        else:
-                            # 提取数字部分
-                            time_match = re.search(r'\[(\d+)分钟前\]', time_prefix)
-                            if time_match:
-                                minutes = int(time_match.group(1))
-                                # 数字越小优先级越高，使用100减去分钟数
-                                priority = 100 - minutes
-                        
-                        if priority > 0:
-                            matched_messages.append((priority, feedback, time_prefix))
-                            logger.debug(f"找到匹配消息: 时间={time_prefix}, 优先级={priority}, 内容={feedback}")
-
-                except Exception as e:
-                    logger.error(f"解析消息行失败: {str(e)}")
+            rows = []
+            for row in html.xpath("//td[@class='shoutrow']"):
+                # 提取时间前缀
+                time_span = row.xpath(".//span[@class='date']/text()")
+                if not time_span:
                     continue
+                time_prefix = time_span[0].strip()
 
-            if not matched_messages:
-                logger.debug("未找到符合条件的反馈消息")
-                return None
+                # 提取消息内容
+                content = row.xpath("string(.)").strip()
+                if "皮总" not in content:
+                    continue
+                if not any(keyword in content for keyword in ["赠送", "扣减", "没有理你"]):
+                    continue
 
-            # 按优先级排序，取最新的消息
-            matched_messages.sort(key=lambda x: x[0], reverse=True)
-            latest_feedback = matched_messages[0][1]
-            latest_time = matched_messages[0][2]
-            
-            logger.debug(f"找到最新反馈消息: {latest_time} - {latest_feedback}")
-            return latest_feedback
+                # 根据时间前缀确定优先级
+                priority = 0
+                if "< 1分钟前" in time_prefix:
+                    # 小于1分钟的情况，给予最高优先级
+                    priority = 100
+                else:
+                    time_match = re.search(r'\[(\d+)分钟前\]', time_prefix)
+                    if time_match:
+                        # 数字越小优先级越高，使用100减去分钟数
+                        priority = 100 - int(time_match.group(1))
+                if priority > 0:
+                    rows.append((priority, content))
+            return rows
 
         except Exception as e:
             logger.error(f"获取群聊区反馈失败: {str(e)}")
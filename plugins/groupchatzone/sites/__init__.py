@@ -1,5 +1,14 @@
+import importlib.util
+import inspect
+import threading
+import time
+import zlib
 from abc import ABCMeta, abstractmethod
-from typing import Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from urllib.parse import urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -12,6 +21,370 @@ from app.log import logger
 from app.utils.string import StringUtils
 from app.helper.browser import PlaywrightHelper
 
+try:
+    from cf_clearance import sync_cf_retry
+except ImportError:
+    sync_cf_retry = None
+
+
+class _BrowserWorker:
+    """
+    浏览器工作线程
+    Playwright 同步接口只能在创建它的线程中使用，因此浏览器及其上下文由单一线程持有，所有操作提交到该线程执行
+    """
+
+    def __init__(self, max_contexts: int, idle_timeout: int):
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="groupchatzone-browser")
+        self._playwright = None
+        self._browser = None
+        # (站点, 代理, UA) -> {"context": 上下文, "cookies": 已注入的Cookie, "last_used": 最近使用时间}
+        self._contexts: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._contexts)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        return self._executor.submit(fn, *args)
+
+    def shutdown(self, timeout: int = 30):
+        """
+        关闭浏览器并结束工作线程
+        """
+        try:
+            self.submit(self._close_browser).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"关闭浏览器失败: {str(e)}")
+        self._executor.shutdown(wait=False)
+
+    # 以下方法均在工作线程中执行
+
+    def run(self, key: tuple, url: str, callback: Callable, cookies: Optional[str],
+            ua: Optional[str], proxies: Optional[dict], timeout: int) -> Any:
+        """
+        使用预热的上下文打开页面并执行回调，浏览器已断开时重启后重试一次
+        """
+        for attempt in range(2):
+            try:
+                context = self._acquire_context(key, url, cookies, ua, proxies)
+                page = context.new_page()
+                try:
+                    page.goto(url, timeout=timeout * 1000)
+                    try:
+                        page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+                    except Exception:
+                        pass
+                    if sync_cf_retry:
+                        sync_cf_retry(page)
+                    return callback(page)
+                finally:
+                    page.close()
+            except Exception:
+                self._close_context(key)
+                if attempt or (self._browser and self._browser.is_connected()):
+                    raise
+                logger.warning("浏览器连接已断开，重新启动浏览器后重试")
+                self._close_browser()
+
+    def evict_idle(self):
+        """
+        回收闲置超时的上下文，全部回收后关闭浏览器
+        """
+        now = time.time()
+        for key in [key for key, entry in self._contexts.items() if now - entry["last_used"] > self.idle_timeout]:
+            self._close_context(key)
+        if not self._contexts:
+            self._close_browser()
+
+    def _ensure_browser(self):
+        if self._browser and self._browser.is_connected():
+            return self._browser
+        self._close_browser()
+        from playwright.sync_api import sync_playwright
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=True)
+        return self._browser
+
+    def _is_healthy(self, entry: Dict) -> bool:
+        """
+        检查上下文是否仍然可用
+        """
+        try:
+            entry["context"].cookies()
+            return True
+        except Exception:
+            return False
+
+    def _acquire_context(self, key: tuple, url: str, cookies: Optional[str],
+                         ua: Optional[str], proxies: Optional[dict]):
+        """
+        获取站点的上下文，不存在或已失效时新建，Cookie 变化时重新注入
+        """
+        self.evict_idle()
+        browser = self._ensure_browser()
+        entry = self._contexts.get(key)
+        if entry and not self._is_healthy(entry):
+            logger.debug(f"浏览器上下文已失效，重新创建: {key[0]}")
+            self._close_context(key)
+            entry = None
+        if not entry:
+            while len(self._contexts) >= self.max_contexts:
+                self._close_context(next(iter(self._contexts)))
+            options = {}
+            if ua:
+                options["user_agent"] = ua
+            if proxies:
+                options["proxy"] = proxies
+            entry = {"context": browser.new_context(**options), "cookies": None}
+            self._contexts[key] = entry
+        if entry["cookies"] != cookies:
+            self._inject_cookies(entry["context"], url, cookies)
+            entry["cookies"] = cookies
+        entry["last_used"] = time.time()
+        self._contexts.move_to_end(key)
+        return entry["context"]
+
+    @staticmethod
+    def _inject_cookies(context, url: str, cookies: Optional[str]):
+        """
+        将站点 Cookie 字符串注入上下文
+        """
+        context.clear_cookies()
+        if not cookies:
+            return
+        parsed = urlparse(url)
+        base_url = f"{parsed.scheme}://{parsed.netloc}"
+        items = []
+        for item in cookies.split(";"):
+            name, sep, value = item.strip().partition("=")
+            if sep and name:
+                items.append({"name": name.strip(), "value": value.strip(), "url": base_url})
+        if items:
+            context.add_cookies(items)
+
+    def _close_context(self, key: tuple):
+        entry = self._contexts.pop(key, None)
+        if entry:
+            try:
+                entry["context"].close()
+            except Exception:
+                pass
+
+    def _close_browser(self):
+        for key in list(self._contexts.keys()):
+            self._close_context(key)
+        for obj, method in ((self._browser, "close"), (self._playwright, "stop")):
+            if obj:
+                try:
+                    getattr(obj, method)()
+                except Exception:
+                    pass
+        self._browser = None
+        self._playwright = None
+
+
+class BrowserContextPool:
+    """
+    浏览器上下文池
+    渲染模式的请求复用预热的浏览器上下文（按 站点、代理、UA 区分），避免每次请求都冷启动浏览器；
+    浏览器数量、每个浏览器的上下文数量均有上限，闲置超时的上下文自动回收，失效的上下文重建
+    """
+
+    def __init__(self, max_browsers: int = 2, max_contexts: int = 4, idle_timeout: int = 300, page_timeout: int = 30):
+        """
+        :param max_browsers: 浏览器（工作线程）数量上限，站点固定分配到同一浏览器
+        :param max_contexts: 每个浏览器保留的上下文数量上限，超出时回收最久未使用的上下文
+        :param idle_timeout: 上下文闲置回收时间(秒)
+        :param page_timeout: 页面加载超时时间(秒)
+        """
+        self.max_browsers = max(1, max_browsers)
+        self.max_contexts = max(1, max_contexts)
+        self.idle_timeout = idle_timeout
+        self.page_timeout = page_timeout
+        self._workers: Dict[int, _BrowserWorker] = {}
+        self._sweeper: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """
+        是否可以使用上下文池：需要安装 Playwright，且系统浏览器仿真方式为 Playwright
+        """
+        if getattr(settings, "BROWSER_EMULATION", "playwright") != "playwright":
+            return False
+        return importlib.util.find_spec("playwright") is not None
+
+    def action(self, url: str, callback: Callable, cookies: Optional[str] = None, ua: Optional[str] = None,
+               proxies: Optional[dict] = None, site: Optional[str] = None) -> Any:
+        """
+        在站点的上下文中打开页面并执行回调
+        :param site: 站点地址，用于区分上下文，默认取请求地址的域名
+        """
+        key = (StringUtils.get_url_domain(site or url), (proxies or {}).get("server"), ua or "")
+        with self._lock:
+            slot = zlib.crc32(repr(key).encode("utf-8")) % self.max_browsers
+            worker = self._workers.get(slot)
+            if not worker:
+                worker = self._workers[slot] = _BrowserWorker(self.max_contexts, self.idle_timeout)
+        try:
+            return worker.submit(worker.run, key, url, callback, cookies, ua, proxies,
+                                 self.page_timeout).result(timeout=self.page_timeout * 4)
+        finally:
+            self._schedule_sweep()
+
+    def get_page_source(self, url: str, cookies: Optional[str] = None, ua: Optional[str] = None,
+                        proxies: Optional[dict] = None, site: Optional[str] = None) -> Optional[str]:
+        """
+        获取页面源码
+        """
+        return self.action(url=url, callback=lambda page: page.content(),
+                           cookies=cookies, ua=ua, proxies=proxies, site=site)
+
+    def _schedule_sweep(self):
+        with self._lock:
+            if self._sweeper or not self._workers:
+                return
+            self._sweeper = threading.Timer(self.idle_timeout, self._sweep)
+            self._sweeper.daemon = True
+            self._sweeper.start()
+
+    def _sweep(self):
+        """
+        定期回收闲置的上下文，仍有上下文时继续定期检查
+        """
+        with self._lock:
+            self._sweeper = None
+            workers = list(self._workers.values())
+        for worker in workers:
+            try:
+                worker.submit(worker.evict_idle).result(timeout=self.page_timeout)
+            except Exception as e:
+                logger.warning(f"回收闲置浏览器上下文失败: {str(e)}")
+        if any(worker.active for worker in workers):
+            self._schedule_sweep()
+
+    def close(self):
+        """
+        关闭所有浏览器，之后再次使用时重新启动
+        """
+        with self._lock:
+            if self._sweeper:
+                self._sweeper.cancel()
+                self._sweeper = None
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.shutdown()
+
+
+class ShoutboxFeedbackCollector:
+    """
+    群聊区反馈收集器
+    登记站点所有待确认的消息，按退避间隔轮询群聊区；每次轮询只抓取、解析一次页面，
+    以 (用户名, 关键字) 建立索引后一次匹配所有待确认消息，每行反馈只归属一条消息（跨轮询有效）
+    """
+
+    def __init__(self, fetch_rows: Callable[[], Optional[List[Tuple[int, str]]]],
+                 backoff: Tuple[int, ...] = (0, 5, 10), mention: str = "@{username}", max_age: int = 600):
+        """
+        :param fetch_rows: 抓取并解析群聊区，返回 [(优先级, 行文本)]，优先级越高越新
+        :param backoff: 每次轮询前的等待秒数，轮询次数即其长度
+        :param mention: 反馈中提及用户的格式
+        :param max_age: 待确认消息的最长保留时间(秒)，超时未收集的消息直接丢弃
+        """
+        self._fetch_rows = fetch_rows
+        self._backoff = backoff
+        self._mention = mention
+        self._max_age = max_age
+        # 消息 -> (用户名, 关键字, 登记时间)
+        self._pending: Dict[str, Tuple[str, Tuple[str, ...], float]] = {}
+        self._results: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, message: str, username: str, keywords: Tuple[str, ...]):
+        """
+        登记待确认的消息，keywords 中任一出现在反馈中即匹配，空字符串匹配该用户的任意反馈
+        """
+        now = time.time()
+        with self._lock:
+            for expired in [m for m, (_, _, at) in self._pending.items() if now - at > self._max_age]:
+                del self._pending[expired]
+            self._pending[message] = (username, tuple(keywords), now)
+            self._results.pop(message, None)
+
+    def is_pending(self, message: str) -> bool:
+        return message in self._pending
+
+    def is_tracked(self, message: str) -> bool:
+        """
+        消息是否已登记（待确认或已确认未取走）
+        """
+        return message in self._pending or message in self._results
+
+    def pop(self, message: str) -> Optional[str]:
+        with self._lock:
+            return self._results.pop(message, None)
+
+    def collect(self) -> int:
+        """
+        轮询群聊区直到所有待确认消息都匹配到反馈或轮询次数用完
+        :return: 抓取群聊区的次数
+        """
+        fetch_count = 0
+        # 本次收集已认领的反馈行文本及次数，已认领的行在之后的轮询中仍留在页面上，不能再次认领
+        claimed: Counter = Counter()
+        with self._lock:
+            for delay in self._backoff:
+                if not self._pending:
+                    break
+                if delay:
+                    time.sleep(delay)
+                rows = self._fetch_rows()
+                fetch_count += 1
+                if rows:
+                    self._match(rows, claimed)
+            for message in self._pending:
+                self._results[message] = None
+            self._pending.clear()
+        return fetch_count
+
+    def _match(self, rows: List[Tuple[int, str]], claimed: Counter):
+        """
+        :param claimed: 之前轮询已认领的反馈行文本及次数，匹配时跳过页面上相同数量的同文本行，认领结果累加到其中
+        """
+        keywords = {kw for _, kws, _ in self._pending.values() for kw in kws}
+        mentions = {username: self._mention.format(username=username) for username, _, _ in self._pending.values()}
+        # 行的优先级随新消息到来会变化，因此按文本识别已认领的行，最新的同文本行优先视为已认领
+        skip = Counter(claimed)
+        available = []
+        for row_id, (priority, text) in sorted(enumerate(rows), key=lambda row: row[1][0], reverse=True):
+            if skip[text] > 0:
+                skip[text] -= 1
+                continue
+            available.append((row_id, priority, text))
+        index: Dict[Tuple[str, str], List[Tuple[int, int, str]]] = {}
+        for row_id, priority, text in available:
+            for username, mention in mentions.items():
+                if mention not in text:
+                    continue
+                for kw in keywords:
+                    if kw in text:
+                        index.setdefault((username, kw), []).append((priority, -row_id, text))
+        # 后发送的消息优先认领最新的反馈
+        claimed_rows = set()
+        for message in reversed(list(self._pending)):
+            username, kws, _ = self._pending[message]
+            candidates = [c for kw in kws for c in index.get((username, kw), []) if c[1] not in claimed_rows]
+            if not candidates:
+                continue
+            best = max(candidates)
+            claimed_rows.add(best[1])
+            claimed[best[2]] += 1
+            self._results[message] = best[2]
+            del self._pending[message]
+
 
 class ISiteHandler(metaclass=ABCMeta):
     """
@@ -19,6 +392,21 @@ class ISiteHandler(metaclass=ABCMeta):
     """
     
     
+    # 站点名称关键字，任一包含即匹配
+    site_keywords: List[str] = []
+    # 站点地址域名关键字，任一包含即匹配
+    site_domains: List[str] = []
+    # 通用处理器：其他处理器均不匹配时使用，只对声明的类本身生效，不被子类继承
+    fallback: bool = False
+    # 会话连接池大小：站点内请求串行发送，另留一个给同时进行的重试/反馈请求
+    pool_size: int = 2
+    # 反馈需要轮询群聊区匹配：由插件在站点消息发送完后统一收集
+    defer_feedback: bool = False
+    # 轮询群聊区前的等待秒数
+    feedback_backoff: Tuple[int, ...] = (0, 5, 10)
+    # 反馈中提及用户的格式
+    feedback_mention: str = "@{username}"
+
     class MockResponse:
         """
         模拟Requests Response对象
@@ -52,6 +440,13 @@ class ISiteHandler(metaclass=ABCMeta):
         
         # 初始化站点操作对象
         self.siteoper = SiteOper()
+
+        # 对外请求许可，由插件设置以限制全局并发
+        self.request_slots: Optional[threading.BoundedSemaphore] = None
+        # 渲染模式共享的浏览器上下文池，由处理器注册表设置
+        self.browser_pool: Optional[BrowserContextPool] = None
+        self._username: Optional[str] = None
+        self._feedback_collector: Optional[ShoutboxFeedbackCollector] = None
         
         # 初始化URL
         self.url_shoutbox = self.site_url + "/shoutbox.php"
@@ -71,7 +466,7 @@ class ISiteHandler(metaclass=ABCMeta):
             allowed_methods=frozenset(['GET', 'POST']),
             raise_on_status=False
         )
-        adapter = HTTPAdapter(max_retries=retries, pool_connections=1, pool_maxsize=1)
+        adapter = HTTPAdapter(max_retries=retries, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
         session.mount('https://', adapter)
         session.mount('http://', adapter)
         session.headers.update(self.headers)
@@ -79,10 +474,10 @@ class ISiteHandler(metaclass=ABCMeta):
             session.proxies = self.proxies
         return session
 
-    def _get_page_source_via_browser(self, url: str, ua: str = None) -> Optional[str]:
-        """通过PlaywrightHelper获取页面源码 (支持 FlareSolverr/Playwright)"""
-        # 构造代理配置
-        proxies = None
+    def _get_browser_proxies(self) -> Optional[dict]:
+        """
+        构造浏览器代理配置
+        """
         if self.use_proxy and hasattr(settings, 'PROXY') and settings.PROXY:
             try:
                 proxy_url = None
@@ -90,13 +485,28 @@ class ISiteHandler(metaclass=ABCMeta):
                     proxy_url = settings.PROXY.get('http') or settings.PROXY.get('https')
                 elif isinstance(settings.PROXY, str):
                     proxy_url = settings.PROXY
-                
+
                 if proxy_url:
-                    proxies = {"server": proxy_url}
+                    return {"server": proxy_url}
             except Exception as e:
                 logger.warning(f"解析代理配置失败: {e}")
+        return None
+
+    def _use_browser_pool(self) -> bool:
+        return bool(self.browser_pool and self.browser_pool.available)
 
+    def _get_page_source_via_browser(self, url: str, ua: str = None) -> Optional[str]:
+        """通过浏览器上下文池获取页面源码，上下文池不可用时使用PlaywrightHelper (支持 FlareSolverr/Playwright)"""
+        proxies = self._get_browser_proxies()
         try:
+            if self._use_browser_pool():
+                return self.browser_pool.get_page_source(
+                    url=url,
+                    cookies=self.site_cookie,
+                    ua=ua,
+                    proxies=proxies,
+                    site=self.site_url
+                )
             return PlaywrightHelper().get_page_source(
                 url=url,
                 cookies=self.site_cookie,
@@ -108,21 +518,8 @@ class ISiteHandler(metaclass=ABCMeta):
             return None
 
     def _post_via_browser(self, url: str, data: dict = None) -> Optional[str]:
-        """通过PlaywrightHelper执行POST请求"""
-        # 构造代理配置
-        proxies = None
-        if self.use_proxy and hasattr(settings, 'PROXY') and settings.PROXY:
-            try:
-                proxy_url = None
-                if isinstance(settings.PROXY, dict):
-                    proxy_url = settings.PROXY.get('http') or settings.PROXY.get('https')
-                elif isinstance(settings.PROXY, str):
-                    proxy_url = settings.PROXY
-                
-                if proxy_url:
-                    proxies = {"server": proxy_url}
-            except Exception as e:
-                logger.warning(f"解析代理配置失败: {e}")
+        """通过浏览器上下文池执行POST请求，上下文池不可用时使用PlaywrightHelper"""
+        proxies = self._get_browser_proxies()
 
         def post_action(page):
             js_data = data if data else {}
@@ -142,6 +539,15 @@ class ISiteHandler(metaclass=ABCMeta):
             """, js_data)
 
         try:
+            if self._use_browser_pool():
+                return self.browser_pool.action(
+                    url=url,
+                    callback=post_action,
+                    cookies=self.site_cookie,
+                    ua=self.ua,
+                    proxies=proxies,
+                    site=self.site_url
+                )
             return PlaywrightHelper().action(
                 url=url,
                 callback=post_action,
@@ -153,8 +559,6 @@ class ISiteHandler(metaclass=ABCMeta):
             logger.error(f"BrowserHelper POST请求异常: {e}")
             return None
 
-
-
     def _send_get_request(self, url: str, params: dict = None, rt_method: callable = None) -> Optional[requests.Response]:
         """
         发送GET请求
@@ -284,12 +688,35 @@ class ISiteHandler(metaclass=ABCMeta):
         }
         return self._send_post_request(self.messages_url, data=data, rt_method=rt_method)
 
-    @abstractmethod
+    @classmethod
+    def match_site(cls, site_name: str, site_url: str = "") -> bool:
+        """
+        按站点名称/域名判断是否匹配该站点处理器，无需实例化
+        """
+        if cls.is_fallback():
+            return True
+        site_url = (site_url or "").lower()
+        return (any(keyword in site_name for keyword in cls.site_keywords)
+                or any(domain in site_url for domain in cls.site_domains))
+
+    @classmethod
+    def is_fallback(cls) -> bool:
+        return bool(cls.__dict__.get("fallback", False))
+
     def match(self) -> bool:
         """
         判断是否匹配该站点处理器
         """
-        pass
+        return self.match_site(self.site_name, self.site_url)
+
+    def close(self):
+        """
+        关闭请求会话
+        """
+        try:
+            self.session.close()
+        except Exception:
+            pass
 
     @abstractmethod
     def get_feedback(self, message: str = None) -> Optional[Dict]:
@@ -300,6 +727,52 @@ class ISiteHandler(metaclass=ABCMeta):
         """
         pass
 
+    def _fetch_feedback_rows(self) -> Optional[List[Tuple[int, str]]]:
+        """
+        抓取并解析群聊区，返回 [(优先级, 行文本)]，由需要轮询反馈的处理器实现
+        """
+        return None
+
+    def _poll_feedback_rows(self) -> Optional[List[Tuple[int, str]]]:
+        with self.request_slots or nullcontext():
+            return self._fetch_feedback_rows()
+
+    def _get_feedback_collector(self) -> ShoutboxFeedbackCollector:
+        if self._feedback_collector is None:
+            self._feedback_collector = ShoutboxFeedbackCollector(
+                self._poll_feedback_rows, backoff=self.feedback_backoff, mention=self.feedback_mention)
+        return self._feedback_collector
+
+    def _track_feedback(self, message: str, keywords: Tuple[str, ...]) -> bool:
+        """
+        登记待确认反馈的消息
+        """
+        username = self._get_cached_username()
+        if not username or not message:
+            return False
+        self._get_feedback_collector().track(message, username, keywords)
+        return True
+
+    def _resolve_feedback(self, message: str) -> Optional[str]:
+        """
+        获取消息的群聊区反馈，消息尚未确认时轮询一次，同时确认站点所有待确认消息
+        """
+        if not message:
+            return None
+        collector = self._get_feedback_collector()
+        if collector.is_pending(message):
+            fetch_count = collector.collect()
+            logger.debug(f"站点 {self.site_name} 抓取群聊区 {fetch_count} 次完成反馈匹配")
+        return collector.pop(message)
+
+    def _get_cached_username(self) -> Optional[str]:
+        """
+        获取用户名，处理器实例内只查询一次
+        """
+        if not self._username:
+            self._username = self.get_username()
+        return self._username
+
     def get_rewards(self) -> List[Dict]:
         """
         获取奖励信息
@@ -326,4 +799,75 @@ class ISiteHandler(metaclass=ABCMeta):
             return None
         except Exception as e:
             logger.error(f"获取站点 {site_name} 的用户信息失败: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+
+class SiteHandlerRegistry:
+    """
+    站点处理器注册表
+    按类属性匹配处理器类（专用处理器优先，通用处理器兜底），匹配结果按域名缓存；
+    处理器实例按站点缓存，站点信息不变时复用同一实例及其会话（Cookie、连接）；
+    所有处理器共享同一个浏览器上下文池
+    """
+
+    def __init__(self, handler_classes: list):
+        classes = []
+        for handler_class in handler_classes or []:
+            if (inspect.isclass(handler_class)
+                    and issubclass(handler_class, ISiteHandler)
+                    and handler_class is not ISiteHandler
+                    and not inspect.isabstract(handler_class)
+                    and handler_class not in classes):
+                classes.append(handler_class)
+        self._classes: List[Type[ISiteHandler]] = ([c for c in classes if not c.is_fallback()]
+                                                   + [c for c in classes if c.is_fallback()])
+        # 域名 -> 处理器类
+        self._class_cache: Dict[str, Optional[Type[ISiteHandler]]] = {}
+        # 站点 -> (站点信息签名, 处理器实例)
+        self._instances: Dict[str, Tuple[tuple, ISiteHandler]] = {}
+        self._lock = threading.Lock()
+        self.browser_pool = BrowserContextPool()
+
+    def resolve(self, site_name: str, site_url: str = "") -> Optional[Type[ISiteHandler]]:
+        """
+        获取站点对应的处理器类
+        """
+        key = StringUtils.get_url_domain(site_url) if site_url else ""
+        key = f"{key}|{site_name}"
+        if key not in self._class_cache:
+            self._class_cache[key] = next(
+                (c for c in self._classes if c.match_site(site_name, site_url)), None)
+        return self._class_cache[key]
+
+    def get(self, site_info: dict) -> Optional[ISiteHandler]:
+        """
+        获取站点对应的处理器实例，站点信息变化时重新创建
+        """
+        site_name = (site_info.get("name") or "").strip()
+        site_url = (site_info.get("url") or "").strip()
+        key = str(site_info.get("id") or site_url or site_name)
+        signature = tuple(sorted((k, repr(v)) for k, v in site_info.items()))
+        with self._lock:
+            cached = self._instances.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+            handler_class = self.resolve(site_name, site_url)
+            if not handler_class:
+                return None
+            handler = handler_class(site_info)
+            handler.browser_pool = self.browser_pool
+            if cached:
+                cached[1].close()
+            self._instances[key] = (signature, handler)
+            return handler
+
+    def clear(self):
+        """
+        关闭并清空缓存的处理器实例，关闭浏览器上下文池
+        """
+        with self._lock:
+            for _, handler in self._instances.values():
+                handler.close()
+            self._instances.clear()
+            self._class_cache.clear()
+        self.browser_pool.close()
@@ -2,6 +2,9 @@ import time
 import zipfile
 import shutil
 import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime
@@ -26,7 +29,7 @@ class SpanelHelper(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/KoWming/MoviePilot-Plugins/main/icons/sun-panel.png"
     # 插件版本
-    plugin_version = "1.2"
+    plugin_version = "1.4"
     # 插件作者
     plugin_author = "KoWming"
     # 作者主页
@@ -44,6 +47,11 @@ class SpanelHelper(_PluginBase):
         "bilibili": "playletpt"
     }
 
+    # 图标文件扩展名，同名图标按此顺序优先
+    ICON_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.ico', '.gif', '.webp']
+    # 同步卡片的最大并发请求数
+    SYNC_MAX_WORKERS = 4
+
     # 私有属性
     _enabled = False
     _custom_domains = ""
@@ -58,6 +66,8 @@ class SpanelHelper(_PluginBase):
     _icon_repo_url = "" # 图标库URL
     _description_fields: List[str] = [] # 描述字段选择
     _scheduler: Optional[BackgroundScheduler] = None
+    # 图标索引: 小写文件名(不含扩展名) -> 相对图标库目录的路径
+    _icon_index: Optional[Dict[str, str]] = None
 
     def init_plugin(self, config: dict = None):
         # 停止现有任务
@@ -81,6 +91,7 @@ class SpanelHelper(_PluginBase):
         self._data_path = Path(settings.CONFIG_PATH) / "plugins" / "spanelhelper"
         if not self._data_path.exists():
             self._data_path.mkdir(parents=True, exist_ok=True)
+        self._icon_index = None
             
         if self._enabled and self._run_now:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -375,22 +386,28 @@ class SpanelHelper(_PluginBase):
                     self.post_message(mtype=NotificationType.Plugin, title="【☀️Sun-Panel助手】同步失败", text=f"❌ 无法获取或创建分组: {self._group_name}")
                 return
 
-            # 3. 按加入时间排序站点（确保新创建的卡片按加入时间排列）
+            # 3. 一次性查询站点用户数据，按加入时间排序站点（确保新创建的卡片按加入时间排列）
+            userdata_map = {}
+            try:
+                for userdata in SiteOper().get_userdata_latest() or []:
+                    userdata_map[userdata.domain] = userdata
+            except Exception as e:
+                logger.debug(f"获取站点用户数据失败: {e}")
+
             def _get_join_at(site):
-                try:
-                    userdatas = SiteOper().get_userdata_by_domain(site.domain)
-                    if userdatas and userdatas[0].join_at:
-                        return userdatas[0].join_at
-                except Exception:
-                    pass
+                userdata = userdata_map.get(site.domain)
+                if userdata and userdata.join_at:
+                    return userdata.join_at
                 return "9999-12-31"  # 无加入时间的排到最后
             sites.sort(key=_get_join_at)
 
-            # 4. 同步站点
+            # 4. 生成卡片并与上次同步的指纹对比
             success_count = 0
             fail_count = 0
+            unchanged_count = 0
+            changed_count = 0
             total_count = len(sites)
-            
+
             custom_mapping = {}
             if self._custom_domains:
                 for line in self._custom_domains.splitlines():
@@ -400,14 +417,82 @@ class SpanelHelper(_PluginBase):
                     parts = line.split('|', 1)
                     if len(parts) == 2:
                         custom_mapping[parts[0].strip()] = parts[1].strip()
-            
+
+            sync_target = self._spanel_url.rstrip('/')
+            stored = self.get_data("item_fingerprints") or {}
+            fingerprints = stored.get("items", {}) if stored.get("target") == sync_target else {}
+            new_fingerprints = {}
+            active_names = set()
+            pending_cards = []
             for site in sites:
-                if self.__sync_site_item(site, group_id, group_only_name, custom_mapping):
+                if site.domain:
+                    active_names.add(f"mp_site_{site.domain}")
+                card = self.__build_site_card(site, userdata_map.get(site.domain), custom_mapping)
+                if not card:
+                    fail_count += 1
+                    continue
+                if (not self._force_update
+                        and fingerprints.get(card["onlyName"]) == card["fingerprint"]):
+                    new_fingerprints[card["onlyName"]] = card["fingerprint"]
+                    unchanged_count += 1
+                    continue
+                pending_cards.append(card)
+            # 上次同步过、但站点已不再启用的卡片
+            stale_names = [name for name in fingerprints if name not in active_names]
+
+            # 5. 并发更新有变化的卡片、删除失效卡片，没有同步记录的卡片先查询远端
+            def _sync_existing(card):
+                if card["onlyName"] in fingerprints:
+                    action = "更新"
+                else:
+                    action = self.__check_remote_item(card, group_id, group_only_name)
+                if action == "更新":
+                    return action, self.__send_card(card, group_id, group_only_name, action)
+                return action, True
+
+            create_cards = []
+            deleted_count = 0
+            if pending_cards or stale_names:
+                with ThreadPoolExecutor(max_workers=self.SYNC_MAX_WORKERS,
+                                        thread_name_prefix="spanelhelper") as executor:
+                    futures = {executor.submit(_sync_existing, card): card for card in pending_cards}
+                    delete_futures = {executor.submit(self.__delete_item, name): name for name in stale_names}
+                    for future in as_completed(futures):
+                        card = futures[future]
+                        try:
+                            action, ok = future.result()
+                        except Exception as e:
+                            logger.error(f"同步站点异常 {card['title']}: {e}")
+                            action, ok = "更新", False
+                        if action == "创建":
+                            create_cards.append(card)
+                            continue
+                        if ok:
+                            success_count += 1
+                            new_fingerprints[card["onlyName"]] = card["fingerprint"]
+                            if action:
+                                changed_count += 1
+                        else:
+                            fail_count += 1
+                    for future in as_completed(delete_futures):
+                        if future.result():
+                            deleted_count += 1
+
+            # 6. 按加入时间顺序依次创建新卡片
+            create_cards.sort(key=lambda c: pending_cards.index(c))
+            for card in create_cards:
+                if self.__send_card(card, group_id, group_only_name, "创建"):
                     success_count += 1
+                    changed_count += 1
+                    new_fingerprints[card["onlyName"]] = card["fingerprint"]
                 else:
                     fail_count += 1
-            
-            logger.info(f"同步完成，共同步 {success_count} 个站点，失败 {fail_count} 个")
+            success_count += unchanged_count
+
+            self.save_data("item_fingerprints", {"target": sync_target, "items": new_fingerprints})
+
+            logger.info(f"同步完成，共同步 {success_count} 个站点（变更 {changed_count} 个，"
+                        f"未变更 {unchanged_count} 个，删除 {deleted_count} 个），失败 {fail_count} 个")
             if self._notify:
                 notify_lines = []
                 notify_lines.append("━━━━━━━━━━━━━━")
@@ -417,6 +502,9 @@ class SpanelHelper(_PluginBase):
                 notify_lines.append(f"📁 分组名称：{self._group_name}")
                 notify_lines.append(f"🗂️ 活跃站点：{total_count}")
                 notify_lines.append(f"✅ 成功同步：{success_count}")
+                notify_lines.append(f"✏️ 实际变更：{changed_count}")
+                if deleted_count > 0:
+                    notify_lines.append(f"🗑️ 删除卡片：{deleted_count}")
                 if fail_count > 0:
                     notify_lines.append(f"❌ 失败数量：{fail_count}")
                 notify_lines.append("━━━━━━━━━━━━━━")
@@ -516,32 +604,116 @@ class SpanelHelper(_PluginBase):
 
         return None, None
 
+    def __load_icon_meta(self) -> Dict[str, Any]:
+        """
+        读取图标库元数据（下载地址、ETag、Last-Modified、ZIP 摘要与图标索引）
+        """
+        meta_path = self._data_path / "icons_index.json"
+        if not meta_path.exists():
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except Exception as e:
+            logger.warning(f"读取图标索引失败: {e}")
+            return {}
+
+    def __save_icon_meta(self, meta: Dict[str, Any]):
+        try:
+            with open(self._data_path / "icons_index.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"保存图标索引失败: {e}")
+
+    def __build_icon_index(self, extract_path: Path) -> Dict[str, str]:
+        """
+        遍历一次图标库目录，建立 小写文件名(不含扩展名) -> 相对路径 的索引
+        """
+        index = {}
+        ranks = {}
+        for root, _, files in os.walk(extract_path):
+            for filename in files:
+                stem, ext = os.path.splitext(filename)
+                ext = ext.lower()
+                if ext not in self.ICON_EXTENSIONS:
+                    continue
+                key = stem.lower()
+                rank = self.ICON_EXTENSIONS.index(ext)
+                if key not in ranks or rank < ranks[key]:
+                    ranks[key] = rank
+                    index[key] = os.path.relpath(os.path.join(root, filename), extract_path)
+        return index
+
+    def __get_icon_index(self) -> Dict[str, str]:
+        """
+        获取图标索引，首次使用时从元数据加载，旧版本解压的图标库没有索引时补建
+        """
+        if self._icon_index is not None:
+            return self._icon_index
+        extract_path = self._data_path / "icons"
+        if not extract_path.exists():
+            return {}
+        meta = self.__load_icon_meta()
+        if meta.get("icons") is None:
+            meta["icons"] = self.__build_icon_index(extract_path)
+            self.__save_icon_meta(meta)
+        self._icon_index = meta["icons"]
+        return self._icon_index
+
     def _download_icon_zip(self):
         """
         下载并解压图标库ZIP
+        已下载过时使用 ETag/If-Modified-Since 条件请求，ZIP 内容未变化时不重新解压和建立索引
         """
         try:
             if not self._icon_repo_url:
                 return
 
+            meta = self.__load_icon_meta()
+            zip_path = self._data_path / "icons.zip"
+            extract_path = self._data_path / "icons"
+            headers = {"User-Agent": settings.USER_AGENT}
+            if meta.get("url") == self._icon_repo_url and extract_path.exists():
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
             logger.info(f"正在下载图标库ZIP: {self._icon_repo_url}")
-            res = RequestUtils(proxies=self._get_proxies()).get_res(self._icon_repo_url)
+            res = RequestUtils(headers=headers, proxies=self._get_proxies()).get_res(self._icon_repo_url)
+            if res is not None and res.status_code == 304:
+                logger.info("图标库未更新，使用已解压的图标")
+                return
             if res and res.status_code == 200:
-                # 保存 ZIP
-                zip_path = self._data_path / "icons.zip"
-                with open(zip_path, "wb") as f:
-                    f.write(res.content)
-                
-                # 解压
-                extract_path = self._data_path / "icons"
-                if extract_path.exists():
-                    shutil.rmtree(extract_path)
-                extract_path.mkdir(parents=True, exist_ok=True)
-                
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_path)
-                
-                logger.info(f"图标库解压完成: {extract_path}")
+                content = res.content
+                zip_hash = hashlib.sha256(content).hexdigest()
+                icons = meta.get("icons")
+                if zip_hash == meta.get("zip_hash") and extract_path.exists() and icons is not None:
+                    logger.info("图标库内容未变化，跳过解压")
+                else:
+                    # 保存 ZIP
+                    with open(zip_path, "wb") as f:
+                        f.write(content)
+
+                    # 解压
+                    if extract_path.exists():
+                        shutil.rmtree(extract_path)
+                    extract_path.mkdir(parents=True, exist_ok=True)
+
+                    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                        zip_ref.extractall(extract_path)
+
+                    icons = self.__build_icon_index(extract_path)
+                    logger.info(f"图标库解压完成: {extract_path}，共索引 {len(icons)} 个图标")
+
+                self.__save_icon_meta({
+                    "url": self._icon_repo_url,
+                    "etag": res.headers.get("ETag", ""),
+                    "last_modified": res.headers.get("Last-Modified", ""),
+                    "zip_hash": zip_hash,
+                    "icons": icons
+                })
+                self._icon_index = icons
             else:
                 logger.error(f"图标库下载失败: {res.status_code if res else 'No Response'}")
 
@@ -550,16 +722,17 @@ class SpanelHelper(_PluginBase):
 
     def _get_icon_from_repo(self, site) -> str:
         """
-        从图标库获取图标 
+        从图标库获取图标
         (仅支持 ZIP 下载解压后的本地匹配)
         """
         if not self._icon_repo_url:
             return ""
 
         extract_path = self._data_path / "icons"
-        if not extract_path.exists():
+        icon_index = self.__get_icon_index()
+        if not icon_index:
             return ""
-        
+
         # 准备匹配候选词
         candidates = []
         if hasattr(site, 'domain') and site.domain and "." in site.domain:
@@ -568,35 +741,29 @@ class SpanelHelper(_PluginBase):
 
             if domain_prefix in ['api', 'www', 'pt', 'kp', 'tracker'] and len(parts) > 2:
                 domain_prefix = parts[1]
-                
+
             candidates.append(domain_prefix)
-            
+
             if domain_prefix in self.ICON_ALIAS_MAPPING:
                 candidates.append(self.ICON_ALIAS_MAPPING[domain_prefix])
-            
+
             if "-" in domain_prefix:
                 candidates.append(domain_prefix.replace("-", ""))
                 candidates.append(domain_prefix.replace("-", "_"))
-            
+
             candidates.append(site.domain.replace(".", ""))
-                
+
         if hasattr(site, 'domain') and site.domain:
             candidates.append(site.domain)
 
         if site.name:
             candidates.append(site.name)
-        
-        # 查找逻辑
+
+        # 按索引查找（文件名不区分大小写）
         for candidate in candidates:
-            for ext in ['.png', '.jpg', '.jpeg', '.ico', '.gif', '.webp']:
-                found = list(extract_path.rglob(f"{candidate}{ext}"))
-                if found:
-                    return str(found[0])
-                
-                # 遍历所有文件匹配文件名
-                for p in extract_path.rglob("*"):
-                    if p.is_file() and p.name.lower() == f"{candidate}{ext}".lower():
-                        return str(p)
+            relative_path = icon_index.get(candidate.lower())
+            if relative_path:
+                return str(extract_path / relative_path)
         return ""
 
     def _get_icon_base64(self, url_or_path: str) -> str:
@@ -655,15 +822,43 @@ class SpanelHelper(_PluginBase):
         return ""
 
 
-    def __sync_site_item(self, site, group_id, group_only_name, custom_mapping: dict = None) -> bool:
+    def __build_description(self, site, userdata) -> str:
+        """
+        根据配置生成卡片描述
+        """
+        desc_parts = []
+        try:
+            if userdata:
+                if "join_at" in self._description_fields:
+                    if userdata.join_at:
+                        join_at = userdata.join_at
+                        # 格式化：只保留年月日部分
+                        if " " in join_at:
+                            join_at = join_at.split(" ")[0]
+                        elif "T" in join_at:
+                            join_at = join_at.split("T")[0]
+                        desc_parts.append(f"加入时间: {join_at}")
+                    else:
+                        desc_parts.append("加入时间: 未知")
+                if "upload" in self._description_fields and userdata.upload:
+                    desc_parts.append(f"⬆️: {self.__format_size(userdata.upload)}")
+                if "download" in self._description_fields and userdata.download:
+                    desc_parts.append(f"⬇️: {self.__format_size(userdata.download)}")
+            if site.public == 1:
+                desc_parts.append("公开站点")
+        except Exception as e:
+            logger.debug(f"获取站点 {site.name} 描述信息失败: {e}")
+        return "\n".join(desc_parts)
+
+    def __build_site_card(self, site, userdata, custom_mapping: dict = None) -> Optional[dict]:
         """
-        同步单个站点
+        生成站点卡片的目标数据及指纹（标题、地址、图标摘要、描述、分组）
+        图标只在卡片需要同步时才读取/下载为Base64
         """
         # 使用站点域名Key作为唯一标识（比站点ID更稳定，删除重建后不变）
         if not site.domain:
             logger.warning(f"站点 {site.name} 无domain标识，跳过同步")
-            return False
-        item_only_name = f"mp_site_{site.domain}"
+            return None
 
         # URL 替换逻辑：使用自定义域名配置
         site_url = site.url
@@ -671,20 +866,57 @@ class SpanelHelper(_PluginBase):
         if site.name in custom_mapping:
             logger.info(f"使用自定义域名: {site.name} {site_url} -> {custom_mapping[site.name]}")
             site_url = custom_mapping[site.name]
-        
+
         # 移除末尾斜杠以更好对比
         site_url = site_url.rstrip('/') if site_url else ""
 
         # URL为空时跳过该站点
         if not site_url:
             logger.warning(f"站点 {site.name} 无有效URL，跳过同步")
-            return False
+            return None
+
+        # 1. 优先使用图标库图标，摘要取文件内容
+        repo_icon_path = self._get_icon_from_repo(site) if self._icon_repo_url else ""
+        icon_url = ""
+        icon_hash = ""
+        if repo_icon_path:
+            try:
+                with open(repo_icon_path, "rb") as f:
+                    icon_hash = hashlib.md5(f.read()).hexdigest()
+            except Exception as e:
+                logger.warning(f"读取本地图标失败: {e}")
+                repo_icon_path = ""
+
+        # 2. 默认逻辑，摘要取图标地址
+        if not repo_icon_path:
+            site_icon = SiteOper().get_icon_by_domain(site.domain)
+            icon_url = site_icon.url if site_icon else ""
+            if not icon_url:
+                icon_url = f"{site_url}/favicon.ico"
+            icon_hash = hashlib.md5(icon_url.encode("utf-8")).hexdigest()
 
+        card = {
+            "onlyName": f"mp_site_{site.domain}",
+            "title": site.name,
+            "url": site_url,
+            "description": self.__build_description(site, userdata),
+            "repo_icon_path": repo_icon_path,
+            "icon_url": icon_url
+        }
+        card["fingerprint"] = hashlib.md5(json.dumps([
+            card["title"], card["url"], icon_hash, card["description"], self._group_name
+        ], ensure_ascii=False).encode("utf-8")).hexdigest()
+        return card
+
+    def __check_remote_item(self, card: dict, group_id, group_only_name) -> Optional[str]:
+        """
+        查询没有同步记录的卡片，返回需要执行的操作（创建/更新），与远端一致时返回 None
+        """
         # 通过onlyName查询已有项目
         remote_item = None
         check_url = f"{self._spanel_url.rstrip('/')}/openapi/v1/item/getInfoByOnlyName"
         try:
-            res = RequestUtils(headers=self.__get_request_headers()).post_res(check_url, json={"onlyName": item_only_name})
+            res = RequestUtils(headers=self.__get_request_headers()).post_res(check_url, json={"onlyName": card["onlyName"]})
             if res and res.status_code == 200:
                 data = res.json()
                 if data.get("code") == 0:
@@ -692,108 +924,66 @@ class SpanelHelper(_PluginBase):
         except Exception as e:
             logger.warning(f"获取项目详情异常: {e}")
 
-        # 准备目标数据
-        target_title = site.name
+        if not remote_item:
+            return "创建"
 
-        # 根据配置生成卡片描述
-        site_description = ""
-        desc_parts = []
-        try:
-            userdatas = SiteOper().get_userdata_by_domain(site.domain)
-            if userdatas:
-                userdata = userdatas[0]
-                if "join_at" in self._description_fields:
-                    if userdata.join_at:
-                        join_at = userdata.join_at
-                        # 格式化：只保留年月日部分
-                        if " " in join_at:
-                            join_at = join_at.split(" ")[0]
-                        elif "T" in join_at:
-                            join_at = join_at.split("T")[0]
-                        desc_parts.append(f"加入时间: {join_at}")
-                    else:
-                        desc_parts.append("加入时间: 未知")
-                if "upload" in self._description_fields and userdata.upload:
-                    desc_parts.append(f"⬆️: {self.__format_size(userdata.upload)}")
-                if "download" in self._description_fields and userdata.download:
-                    desc_parts.append(f"⬇️: {self.__format_size(userdata.download)}")
-            if site.public == 1:
-                desc_parts.append("公开站点")
-        except Exception as e:
-            logger.debug(f"获取站点 {site.name} 描述信息失败: {e}")
-        site_description = "\n".join(desc_parts)
+        # 对比字段: Title, URL, Description
+        remote_url = remote_item.get("url", "").rstrip('/')
+        remote_title = remote_item.get("title", "")
+        remote_desc = remote_item.get("description", "")
+
+        # 分组对比
+        is_group_diff = False
+        remote_group_id = remote_item.get("itemGroupID")
+        remote_group_name = remote_item.get("itemGroupOnlyName")
+
+        if group_id:
+            if remote_group_id != group_id:
+                is_group_diff = True
+        elif group_only_name:
+            if remote_group_name != group_only_name:
+                is_group_diff = True
 
         # 判断是否需要更新
-        need_update = False
-        action = "创建"
-        
-        if remote_item:
-            action = "更新"
-            # 对比字段: Title, URL, Description
-            remote_url = remote_item.get("url", "").rstrip('/')
-            remote_title = remote_item.get("title", "")
-            remote_desc = remote_item.get("description", "")
-            
-            # 分组对比
-            is_group_diff = False
-            remote_group_id = remote_item.get("itemGroupID")
-            remote_group_name = remote_item.get("itemGroupOnlyName")
-            
-            if group_id:
-                if remote_group_id != group_id:
-                     is_group_diff = True
-            elif group_only_name:
-                if remote_group_name != group_only_name:
-                     is_group_diff = True
-            
-            # 判断是否需要更新
-            if self._force_update:
-                need_update = True
-                logger.info(f"强制更新开启: {site.name}, 将执行更新")
-            elif (remote_title != target_title or 
-                remote_url != site_url or
-                remote_desc != site_description or
+        if self._force_update:
+            logger.info(f"强制更新开启: {card['title']}, 将执行更新")
+            return "更新"
+        if (remote_title != card["title"] or
+                remote_url != card["url"] or
+                remote_desc != card["description"] or
                 is_group_diff):
-                need_update = True
-                logger.info(f"站点信息变更: {site.name}, 将执行更新")
-            else:
-                logger.debug(f"站点信息未变更: {site.name}, 跳过更新")
-                return True
-        else:
-            need_update = True
-        
-        if not need_update:
-            return True
+            logger.info(f"站点信息变更: {card['title']}, 将执行更新")
+            return "更新"
+        logger.debug(f"站点信息未变更: {card['title']}, 跳过更新")
+        return None
 
-        icon_url = ""
+    def __send_card(self, card: dict, group_id, group_only_name, action: str) -> bool:
+        """
+        创建/更新单个站点卡片
+        """
+        icon_url = card["icon_url"]
         final_base64_icon = ""
-        
+
         # 1. 优先尝试从图标库获取
-        if self._icon_repo_url:
-             repo_icon_url = self._get_icon_from_repo(site)
-             if repo_icon_url:
-                 repo_base64 = self._get_icon_base64(repo_icon_url)
-                 if repo_base64:
-                     final_base64_icon = repo_base64
-                     icon_url = repo_icon_url 
-                     logger.debug(f"{site.name} 使用图标库图标")
+        if card["repo_icon_path"]:
+            final_base64_icon = self._get_icon_base64(card["repo_icon_path"])
+            if final_base64_icon:
+                icon_url = card["repo_icon_path"]
+                logger.debug(f"{card['title']} 使用图标库图标")
 
         # 2. 默认逻辑
-        if not final_base64_icon:
-            site_icon = SiteOper().get_icon_by_domain(site.domain)
-            icon_url = site_icon.url if site_icon else ""
-            if not icon_url:
-                icon_url = f"{site_url}/favicon.ico"
+        if not icon_url:
+            icon_url = f"{card['url']}/favicon.ico"
 
         payload = {
-            "onlyName": item_only_name,
-            "title": target_title,
-            "url": site_url,
-            "description": site_description,
+            "onlyName": card["onlyName"],
+            "title": card["title"],
+            "url": card["url"],
+            "description": card["description"],
             "iconUrl": icon_url,
-            "isSaveIcon": True 
+            "isSaveIcon": True
         }
-        
+
         # Base64 / 代理逻辑
         if final_base64_icon:
             payload["iconUrl"] = final_base64_icon
@@ -803,7 +993,7 @@ class SpanelHelper(_PluginBase):
             if base64_icon:
                 payload["iconUrl"] = base64_icon
                 payload["isSaveIcon"] = False
-        
+
         # 分组参数
         if group_id:
             payload["itemGroupID"] = group_id
@@ -813,10 +1003,25 @@ class SpanelHelper(_PluginBase):
         # 发送请求
         if action == "更新":
             update_url = f"{self._spanel_url.rstrip('/')}/openapi/v1/item/update"
-            return self.__send_item_request(update_url, payload, site.name, "更新")
+            return self.__send_item_request(update_url, payload, card["title"], "更新")
         else:
             create_url = f"{self._spanel_url.rstrip('/')}/openapi/v1/item/create"
-            return self.__send_item_request(create_url, payload, site.name, "创建")
+            return self.__send_item_request(create_url, payload, card["title"], "创建")
+
+    def __delete_item(self, item_only_name: str) -> bool:
+        """
+        删除已不再启用站点的卡片，失败时只记录日志，不再重试
+        """
+        delete_url = f"{self._spanel_url.rstrip('/')}/openapi/v1/item/delete"
+        try:
+            res = RequestUtils(headers=self.__get_request_headers()).post_res(delete_url, json={"onlyName": item_only_name})
+            if res and res.status_code == 200 and res.json().get("code") == 0:
+                logger.info(f"删除站点卡片成功: {item_only_name}")
+                return True
+            logger.warning(f"删除站点卡片失败 {item_only_name}: {res.text if res else 'No Response'}，请手动删除")
+        except Exception as e:
+            logger.warning(f"删除站点卡片异常 {item_only_name}: {e}，请手动删除")
+        return False
 
     def __send_item_request(self, url: str, payload: dict, site_name: str, action: str) -> bool:
         """
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 插件依赖 MoviePilot 主程序的 app 包，需在主程序环境中运行
+pytest.importorskip("app")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from plugins.groupchatzone.sites import ShoutboxFeedbackCollector  # noqa: E402
+
+
+def _collector(pages):
+    polls = iter(pages)
+    return ShoutboxFeedbackCollector(lambda: next(polls, pages[-1]), backoff=(0, 0, 0))
+
+
+def test_row_claimed_once_across_polls():
+    """同一条反馈在多次轮询中一直留在页面上，只能归属一条消息"""
+    reply = "感谢 @bob 的支持，魔力值 +100"
+    collector = _collector([[(0, reply)], [(-1, "路人甲: 早"), (0, reply)], [(-2, "路人乙: 好"), (-1, "路人甲: 早"), (0, reply)]])
+    collector.track("求魔力", "bob", ("魔力",))
+    collector.track("求魔力 ", "bob", ("魔力",))
+
+    assert collector.collect() == 3
+    results = [collector.pop("求魔力"), collector.pop("求魔力 ")]
+    assert sorted(results, key=lambda r: r is None) == [reply, None]
+
+
+def test_new_identical_row_claimed_by_next_message():
+    """后续轮询出现的相同文本新反馈可以归属另一条消息"""
+    reply = "感谢 @bob 的支持，魔力值 +100"
+    collector = _collector([[(0, reply)], [(0, reply), (-1, reply)]])
+    collector.track("求魔力", "bob", ("魔力",))
+    collector.track("求魔力 ", "bob", ("魔力",))
+
+    assert collector.collect() == 2
+    assert collector.pop("求魔力") == reply
+    assert collector.pop("求魔力 ") == reply